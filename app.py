@@ -1,6 +1,7 @@
 from flask import Flask
 from flask_login import LoginManager, current_user
-from models.engine.database import session
+from models.engine.database import init_app
+from models import metrics
 from models.users import Users
 from routes.routes_home import home_bp
 from routes.routes_strategic import strategic_bp
@@ -37,6 +38,8 @@ app.register_blueprint(projects_bp)
 app.register_blueprint(api_bp)
 app.register_blueprint(users_bp)
 app.secret_key = os.getenv("SECRET_KEY")
+init_app(app)
+metrics.init_app(app)
 
 
 login_manager = LoginManager()
@@ -55,28 +58,13 @@ def load_user(user_id):
     Returns:
         Users or None: The user object if found, None otherwise.
     """
-    try:
-        user = session.get(Users, int(user_id))
-    except Exception as e:
-        session.rollback()
-        print(f"An error occurred: {e}")
-    finally:
-        session.close()
-    return user
+    return Users.get_cached(int(user_id))
 
 
 @app.route('/check_role')
 def check_role():
     if current_user.is_authenticated:
-        try:
-            user = session.query(Users).filter_by(id=current_user.id).first()
-        except Exception as e:
-            session.rollback()
-            print(f"An error occurred: {e}")
-        finally:
-            session.close()
-        if current_user.has_role(user.role):
-            return "You are logged in as a {}".format(user.role)
+        return "You are logged in as a {}".format(current_user.role)
     else:
         return "You are not logged in"
     
@@ -0,0 +1,312 @@
+"""
+Benchmarks for the dashboard read paths.
+
+Seeds a database with a synthetic dataset and times the model functions
+behind the dashboard pages, then the /home, /GIS and /Servicing pages
+themselves through the Flask test client. The results are written as
+JSON so that runs on different commits can be compared:
+
+    python -m benchmarks.run_benchmarks --projects 100000 --output new.json
+    python -m benchmarks.run_benchmarks --compare old.json
+
+By default a fresh SQLite database is created in a temporary directory.
+Pass --database to benchmark another database; it must be empty unless
+--reuse is given, in which case its existing data is benchmarked as is.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Models are imported only after --database has been applied, because
+# the engine is created when models.engine.database is first imported.
+DEFAULT_VOLUMES = {
+    'projects': 10000,
+    'project_managers': 50,
+    'strategic_tasks': 2000,
+    'gis_outputs': 50,
+    'gis_activities_per_output': 20,
+    'gis_tasks_per_activity': 20,
+    'gis_responsible_people': 20,
+}
+
+
+def parse_args(argv=None):
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the dashboard read paths.")
+    parser.add_argument('--database',
+                        help="SQLAlchemy URL of the database to use "
+                        "(default: a new SQLite file in a temporary "
+                        "directory)")
+    parser.add_argument('--reuse', action='store_true',
+                        help="benchmark the data already in --database "
+                        "instead of seeding it")
+    for name, default in DEFAULT_VOLUMES.items():
+        parser.add_argument('--' + name.replace('_', '-'), type=int,
+                            default=default,
+                            help="default: {}".format(default))
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="timed runs per benchmark (default: 5)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="random seed for the dataset (default: 0)")
+    parser.add_argument('--output',
+                        help="write the JSON results to this file "
+                        "instead of stdout")
+    parser.add_argument('--compare',
+                        help="JSON results of an earlier run to compare "
+                        "the median times against")
+    return parser.parse_args(argv)
+
+
+def summarise(samples, queries):
+    """
+    Summarises the timings of one benchmark.
+
+    Args:
+        samples (list): The run times in seconds.
+        queries (list): The number of SQL queries of each run.
+
+    Returns:
+        dict: The run count, min, median, mean and max in milliseconds,
+        and the number of queries of the last run.
+    """
+    return {
+        'runs': len(samples),
+        'min_ms': round(min(samples) * 1000, 3),
+        'median_ms': round(statistics.median(samples) * 1000, 3),
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+        'queries': queries[-1],
+    }
+
+
+def time_function(app, run, repeat, setup=None):
+    """
+    Times a function called inside a request context, counting its SQL
+    queries with the request metrics.
+
+    Args:
+        app (Flask): The Flask application.
+        run (callable): The function to time.
+        repeat (int): The number of timed runs.
+        setup (callable): Called before every run, outside the timing.
+    """
+    from flask import g
+    from models.metrics import RequestMetrics
+
+    samples, queries = [], []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with app.test_request_context():
+            g.request_metrics = RequestMetrics()
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+            queries.append(g.request_metrics.query_count)
+    return summarise(samples, queries)
+
+
+def time_request(client, path, repeat, setup=None):
+    """
+    Times a GET request made through the Flask test client.
+
+    The query count is read from the response's Server-Timing header.
+
+    Args:
+        client (FlaskClient): A test client with a logged in user.
+        path (str): The path to request.
+        repeat (int): The number of timed runs.
+        setup (callable): Called before every run, outside the timing.
+    """
+    samples, queries = [], []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError("GET {} returned {}".format(
+                path, response.status_code))
+        match = re.search(r'desc="(\d+) queries"',
+                          response.headers.get('Server-Timing', ''))
+        queries.append(int(match.group(1)) if match else None)
+    return summarise(samples, queries)
+
+
+def run_benchmarks(repeat):
+    """
+    Runs every benchmark against the configured database.
+
+    Args:
+        repeat (int): The number of timed runs per benchmark.
+
+    Returns:
+        dict: The summary of each benchmark, by name.
+    """
+    from app import app
+    from sqlalchemy import select
+    from models.cache import projects_cache, data_version
+    from models.chart_store import home_chart_store
+    from models.engine.database import session
+    from models.projects import ProjectsData
+    from models.strategic import StrategicTask
+    from models.gis import GISHierarchy, gis_data_to_dict_list
+    from models.users import Users
+    from models.plot_functions import (
+        plot_home_page_charts, plot_servicing_page_charts
+    )
+    from benchmarks.seed import BENCHMARK_USER
+
+    def reset_home_charts():
+        # As after a write: the projects data is read again and the
+        # charts are plotted from it.
+        projects_cache.clear()
+        data_version.bump()
+        home_chart_store.charts = None
+        home_chart_store.fingerprint = None
+        home_chart_store.version_key = None
+
+    with app.app_context():
+        user_id = session.execute(
+            select(Users.id).where(
+                Users.username == BENCHMARK_USER['username'])).scalar()
+        servicing_id = session.execute(
+            select(ProjectsData.id)
+            .where(ProjectsData.contract_type_id == 1)
+            .order_by(ProjectsData.id)).scalar()
+        projects_data = ProjectsData.projects_data_to_dict_list()
+
+    results = {
+        'projects_data_to_dict_list': time_function(
+            app, ProjectsData.projects_data_to_dict_list, repeat,
+            setup=projects_cache.clear),
+        'projects_data_to_dict_list (cached)': time_function(
+            app, ProjectsData.projects_data_to_dict_list, repeat),
+        'plot_home_page_charts': time_function(
+            app, lambda: plot_home_page_charts(projects_data), repeat),
+        'plot_servicing_page_charts': time_function(
+            app, plot_servicing_page_charts, repeat,
+            setup=projects_cache.clear),
+        'gis_data_to_dict_list': time_function(
+            app, gis_data_to_dict_list, repeat),
+        'GISHierarchy.load': time_function(
+            app, GISHierarchy.load, repeat),
+        'strategic_tasks_to_dict_list': time_function(
+            app, StrategicTask.strategic_tasks_to_dict_list, repeat),
+    }
+
+    if user_id is None:
+        print("No '{}' user, skipping the request benchmarks".format(
+            BENCHMARK_USER['username']), file=sys.stderr)
+        return results
+
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user_id)
+        flask_session['_fresh'] = True
+
+    results['GET /home (charts rebuilt)'] = time_request(
+        client, '/home', repeat, setup=reset_home_charts)
+    results['GET /home'] = time_request(client, '/home', repeat)
+    results['GET /GIS'] = time_request(client, '/GIS', repeat)
+    results['GET /Servicing'] = time_request(client, '/Servicing', repeat)
+    if servicing_id is not None:
+        results['GET /Servicing/charts/<id>'] = time_request(
+            client, '/Servicing/charts/{}'.format(servicing_id), repeat)
+    return results
+
+
+def compare(results, baseline):
+    """
+    Compares the median times with those of an earlier run.
+
+    Returns:
+        dict: For every benchmark in both runs, the baseline and current
+        median and their ratio (above 1 is slower).
+    """
+    comparison = {}
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None or not before['median_ms']:
+            continue
+        comparison[name] = {
+            'baseline_median_ms': before['median_ms'],
+            'median_ms': result['median_ms'],
+            'ratio': round(result['median_ms'] / before['median_ms'], 3),
+        }
+    return comparison
+
+
+def git_commit():
+    """Returns the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database = args.database
+    if database is None:
+        directory = tempfile.mkdtemp(prefix='dashboard-benchmark-')
+        database = 'sqlite:///' + os.path.join(directory, 'benchmark.db')
+    os.environ['db_connection_string'] = database
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    from models.engine.database import engine
+    from models.base import Base
+    from benchmarks.seed import seed_database, table_counts
+
+    volumes = {name: getattr(args, name) for name in DEFAULT_VOLUMES}
+    Base.metadata.create_all(engine)
+    existing = table_counts()
+    if not args.reuse:
+        if any(existing.values()):
+            sys.exit("The database is not empty. Pass --reuse to "
+                     "benchmark its existing data.")
+        start = time.perf_counter()
+        seed_database(volumes, seed=args.seed)
+        print("Seeded the database in {:.1f}s".format(
+            time.perf_counter() - start), file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': engine.dialect.name,
+            'seeded': not args.reuse,
+            'volumes': volumes if not args.reuse else None,
+            'row_counts': table_counts(),
+            'repeat': args.repeat,
+        },
+        'results': run_benchmarks(args.repeat),
+    }
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            report['comparison'] = compare(report['results'],
+                                           json.load(baseline_file))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
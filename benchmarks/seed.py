@@ -0,0 +1,194 @@
+""" Synthetic dataset for the benchmarks """
+from sqlalchemy import insert, select, func
+from models.engine.database import engine
+from models.base import Base
+from models.projects import ContractType, Section, ProjectManagers, ProjectsData
+from models.strategic import StrategicTask
+from models.gis import Output, Activity, ResponsiblePerson, Task
+from models.users import Users
+from datetime import date, timedelta
+from decimal import Decimal
+import random
+
+CHUNK_SIZE = 5000
+
+CONTRACT_TYPES = ['Servicing', 'Services', 'Goods', 'Works']
+SECTIONS = ['Projects', 'Water', 'Sanitation', 'Strategic Planning',
+            'Electromechanical']
+PROJECT_STATUSES = ['Completed', 'Stopped', 'In Progress', 'Retendered',
+                    'Yet to start']
+TASK_STATUSES = ['Complete', 'In Progress', 'Overdue', 'Not Started']
+TASK_PRIORITIES = ['High', 'Medium', 'Low']
+
+BENCHMARK_USER = {
+    'name': 'Benchmark',
+    'surname': 'User',
+    'username': 'benchmark',
+    'password': 'benchmark',
+    'email': 'benchmark@example.com',
+    'role': 'admin',
+}
+
+
+def insert_rows(conn, table, rows, chunk_size=CHUNK_SIZE):
+    """
+    Inserts rows into a table with one executemany per chunk.
+
+    Args:
+        conn (Connection): The connection to insert with.
+        table (Table): The table to insert into.
+        rows (iterable): Dictionaries of column name to value.
+        chunk_size (int): The number of rows per executemany.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            conn.execute(insert(table), chunk)
+            chunk = []
+    if chunk:
+        conn.execute(insert(table), chunk)
+
+
+def money(rng, low, high):
+    """Returns a random amount with two decimal places."""
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+def percentage(rng):
+    """Returns a random percentage with two decimal places."""
+    return money(rng, 0, 100)
+
+
+def project_rows(rng, count, project_managers):
+    """Yields count rows of synthetic projects data."""
+    for number in range(1, count + 1):
+        start = date(2018, 1, 1) + timedelta(days=rng.randint(0, 2500))
+        weeks = rng.randint(4, 156)
+        value = money(rng, 10000, 5000000)
+        yield {
+            'contract_number': 'BCC/{:07d}'.format(number),
+            'contract_name': 'Synthetic contract {}'.format(number),
+            'contract_type_id': rng.randint(1, len(CONTRACT_TYPES)),
+            'project_manager_id': rng.randint(1, project_managers),
+            'section_id': rng.randint(1, len(SECTIONS)),
+            'contractor': 'Contractor {}'.format(rng.randint(1, 500)),
+            'year': str(start.year),
+            'date_contract_signed': start - timedelta(days=30),
+            'date_contract_signed_by_bcc': start - timedelta(days=20),
+            'early_start_date': start,
+            'contract_duration_weeks': Decimal(weeks),
+            'contract_duration_months': Decimal(weeks * 12 // 52),
+            'early_finish_date': start + timedelta(weeks=weeks),
+            'extension_of_time': None,
+            'project_status': rng.choice(PROJECT_STATUSES),
+            'contract_value_including_ten_percent_contingency': value,
+            'performance_guarantee_value': value / 10,
+            'performance_guarantee_expiry_date':
+                start + timedelta(weeks=weeks + 52),
+            'advance_payment_value': value / 5,
+            'advance_payment_guarantee_expiry_date':
+                start + timedelta(weeks=weeks),
+            'total_certified_interim_payments_to_date':
+                value * percentage(rng) / 100,
+            'financial_progress_percentage': percentage(rng),
+            'roads_progress': percentage(rng),
+            'water_progress': percentage(rng),
+            'sewer_progress': percentage(rng),
+            'storm_drainage_progress': percentage(rng),
+            'public_lighting_progress': percentage(rng),
+            'physical_progress_percentage': percentage(rng),
+            'tax_clearance_validation': 'Valid',
+            'link': 'https://drive.google.com/drive/folders/{}'.format(number),
+        }
+
+
+def strategic_task_rows(rng, count, project_managers):
+    """Yields count rows of synthetic strategic tasks."""
+    for number in range(1, count + 1):
+        deadline = date(2023, 1, 1) + timedelta(days=rng.randint(0, 1000))
+        estimated_hours = Decimal(rng.randint(8, 400))
+        yield {
+            'status': rng.choice(TASK_STATUSES),
+            'priority': rng.choice(TASK_PRIORITIES),
+            'deadline': deadline,
+            'task': 'Strategic task {}'.format(number),
+            'description': 'Description of strategic task {}'.format(number),
+            'assigned_to': rng.randint(1, project_managers),
+            'deliverables': 'Deliverables of task {}'.format(number),
+            'percentage_done': percentage(rng),
+            'fixed_cost': money(rng, 100, 50000),
+            'estimated_hours': estimated_hours,
+            'actual_hours': estimated_hours * percentage(rng) / 100,
+        }
+
+
+def seed_database(volumes, seed=0):
+    """
+    Creates the tables and fills them with a synthetic dataset.
+
+    The contract types and sections match the production lookup tables,
+    so contract type 1 is Servicing. A 'benchmark' admin user is added
+    for the request benchmarks.
+
+    Args:
+        volumes (dict): Row counts, with the keys of
+            run_benchmarks.DEFAULT_VOLUMES.
+        seed (int): The random seed, so runs are reproducible.
+    """
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    managers = volumes['project_managers']
+    outputs = volumes['gis_outputs']
+    activities = outputs * volumes['gis_activities_per_output']
+    people = volumes['gis_responsible_people']
+
+    with engine.begin() as conn:
+        insert_rows(conn, ContractType.__table__, [
+            {'id': number, 'name': name}
+            for number, name in enumerate(CONTRACT_TYPES, 1)])
+        insert_rows(conn, Section.__table__, [
+            {'id': number, 'name': name}
+            for number, name in enumerate(SECTIONS, 1)])
+        insert_rows(conn, ProjectManagers.__table__, [
+            {'id': number, 'name': 'Manager {}'.format(number),
+             'section': rng.choice(SECTIONS)}
+            for number in range(1, managers + 1)])
+        insert_rows(conn, Users.__table__, [BENCHMARK_USER])
+        insert_rows(conn, ProjectsData.__table__,
+                    project_rows(rng, volumes['projects'], managers))
+        insert_rows(conn, StrategicTask.__table__,
+                    strategic_task_rows(rng, volumes['strategic_tasks'],
+                                        managers))
+        insert_rows(conn, Output.__table__, [
+            {'id': number, 'name': 'Output {}'.format(number)}
+            for number in range(1, outputs + 1)])
+        insert_rows(conn, ResponsiblePerson.__table__, [
+            {'id': number, 'name': 'Person {}'.format(number),
+             'designation': 'Designation {}'.format(number)}
+            for number in range(1, people + 1)])
+        insert_rows(conn, Activity.__table__, (
+            {'id': number, 'activity': 'Activity {}'.format(number),
+             'output_id': (number - 1)
+             // volumes['gis_activities_per_output'] + 1,
+             'responsible_person_id': rng.randint(1, people)}
+            for number in range(1, activities + 1)))
+        insert_rows(conn, Task.__table__, (
+            {'activity_id': activity_id,
+             'description': 'Task {} of activity {}'.format(
+                 number, activity_id),
+             'percentage_of_activity': percentage(rng)}
+            for activity_id in range(1, activities + 1)
+            for number in range(1, volumes['gis_tasks_per_activity'] + 1)))
+
+
+def table_counts():
+    """Returns the number of rows in every seeded table."""
+    tables = [ContractType, Section, ProjectManagers, ProjectsData,
+              StrategicTask, Output, Activity, ResponsiblePerson, Task, Users]
+    with engine.connect() as conn:
+        return {
+            model.__tablename__: conn.execute(
+                select(func.count()).select_from(model.__table__)).scalar()
+            for model in tables
+        }
@@ -0,0 +1,5 @@
+-- Composite index used by the per-section pages (/Servicing, /Goods,
+-- /Works and /Services), which filter projects_data by contract type
+-- and order by id.
+CREATE INDEX `ix_projects_data_contract_type_id_id`
+    ON `projects_data` (`contract_type_id`, `id`);
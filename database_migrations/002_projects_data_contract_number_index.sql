@@ -0,0 +1,4 @@
+-- Index used by the bulk projects import, which matches uploaded rows
+-- to existing projects by contract number.
+CREATE INDEX `ix_projects_data_contract_number`
+    ON `projects_data` (`contract_number`);
@@ -0,0 +1,21 @@
+-- Portfolio totals per section, contract type, project manager and
+-- year, maintained by the projects write paths. After creating the
+-- table, fill it with:
+--     flask projects rebuild-kpi-summary
+CREATE TABLE `project_kpi_summary` (
+    `id` INT NOT NULL AUTO_INCREMENT,
+    `section_id` INT DEFAULT NULL,
+    `contract_type_id` INT DEFAULT NULL,
+    `project_manager_id` INT DEFAULT NULL,
+    `year` VARCHAR(20) DEFAULT NULL,
+    `number_of_projects` INT NOT NULL DEFAULT 0,
+    `contract_value` DECIMAL(24, 2) NOT NULL DEFAULT 0,
+    `certified_payments` DECIMAL(24, 2) NOT NULL DEFAULT 0,
+    `physical_progress_weighted` DECIMAL(34, 4) NOT NULL DEFAULT 0,
+    `physical_progress_weight` DECIMAL(24, 2) NOT NULL DEFAULT 0,
+    `financial_progress_weighted` DECIMAL(34, 4) NOT NULL DEFAULT 0,
+    `financial_progress_weight` DECIMAL(24, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (`id`),
+    KEY `ix_project_kpi_summary_group`
+        (`section_id`, `contract_type_id`, `project_manager_id`, `year`)
+);
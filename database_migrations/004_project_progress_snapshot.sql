@@ -0,0 +1,14 @@
+-- The history of the progress of every project. Rows are appended by
+-- the projects write paths and by a daily
+--     flask projects snapshot-progress
+-- which also records the starting point after creating the table.
+CREATE TABLE `project_progress_snapshot` (
+    `project_id` INT NOT NULL,
+    `snapshot_date` DATE NOT NULL,
+    `section_id` INT DEFAULT NULL,
+    `physical_progress_percentage` DECIMAL(10, 2) DEFAULT NULL,
+    `financial_progress_percentage` DECIMAL(10, 2) DEFAULT NULL,
+    `total_certified_interim_payments_to_date` DECIMAL(20, 2) DEFAULT NULL,
+    PRIMARY KEY (`project_id`, `snapshot_date`),
+    KEY `ix_project_progress_snapshot_snapshot_date` (`snapshot_date`)
+);
@@ -0,0 +1,6 @@
+-- Indexes used by the guarantee expiry timeline, which reads the
+-- guarantees of each type in expiry date order.
+CREATE INDEX `ix_projects_data_performance_guarantee_expiry_date`
+    ON `projects_data` (`performance_guarantee_expiry_date`);
+CREATE INDEX `ix_projects_data_advance_payment_guarantee_expiry_date`
+    ON `projects_data` (`advance_payment_guarantee_expiry_date`);
@@ -0,0 +1,10 @@
+-- Turns the free-text deadline of strategic tasks into an indexed date.
+-- The text is kept in deadline_text. After applying this file, parse it
+-- into the new column with:
+--     flask strategic backfill-deadlines
+-- which reports the tasks whose deadline could not be read as a date.
+ALTER TABLE `strategic_tasks`
+    CHANGE `deadline` `deadline_text` VARCHAR(255) DEFAULT NULL,
+    ADD COLUMN `deadline` DATE DEFAULT NULL AFTER `priority`,
+    ADD KEY `ix_strategic_tasks_deadline` (`deadline`),
+    ADD KEY `ix_strategic_tasks_status_deadline` (`status`, `deadline`);
@@ -0,0 +1,93 @@
+""" Database-side aggregations of projects data """
+from sqlalchemy import select, func
+from models.engine.database import session
+from models.cache import projects_cache
+from models.projects import ProjectsData, ProjectManagers, Section
+
+HOME_DISTRIBUTIONS_KEY = 'home_distributions'
+
+
+def count_by(column, label):
+    """
+    Counts the projects per value of a column with a GROUP BY query.
+
+    Projects are joined to their contract type, project manager and
+    section like ProjectsData.projects_data_to_dict_list, so the counts
+    cover the same rows. Null values are not counted.
+
+    Args:
+        column (Column): The column to group by.
+        label (str): The key of the column value in each row.
+
+    Returns:
+        list: One dictionary per value, holding the value, the
+        number_of_projects and the first_id of the projects with that
+        value, ordered by first_id.
+    """
+    query = ProjectsData.join_related(select(
+        column.label(label),
+        func.count().label('number_of_projects'),
+        func.min(ProjectsData.id).label('first_id')
+    )).where(column.isnot(None)).group_by(column).order_by(
+        func.min(ProjectsData.id))
+    return ProjectsData.fetch_dicts(query)
+
+
+def value_totals_by(column, label):
+    """
+    Sums the contract values and certified payments of the projects per
+    value of a column.
+
+    Args:
+        column (Column): The column to group by.
+        label (str): The key of the column value in each row.
+
+    Returns:
+        list: One dictionary per value, ordered by value, holding the
+        number_of_projects, contract_value and certified_payments.
+    """
+    query = ProjectsData.join_related(select(
+        column.label(label),
+        func.count().label('number_of_projects'),
+        func.coalesce(func.sum(
+            ProjectsData.contract_value_including_ten_percent_contingency
+        ), 0).label('contract_value'),
+        func.coalesce(func.sum(
+            ProjectsData.total_certified_interim_payments_to_date
+        ), 0).label('certified_payments')
+    )).group_by(column).order_by(column)
+    return ProjectsData.fetch_dicts(query)
+
+
+def home_distributions():
+    """
+    Returns the distributions shown on the home page, computed in the
+    database and cached until projects data changes.
+
+    Returns:
+        dict: Lists of dictionaries under the keys by_year, by_status,
+        by_manager, totals_by_status and totals_by_section. The lists are
+        empty if the database could not be queried.
+    """
+    cached = projects_cache.get(HOME_DISTRIBUTIONS_KEY)
+    if cached is not None:
+        return cached
+
+    try:
+        distributions = {
+            'by_year': count_by(ProjectsData.year, 'year'),
+            'by_status': count_by(ProjectsData.project_status,
+                                  'project_status'),
+            'by_manager': count_by(ProjectManagers.name, 'project_manager'),
+            'totals_by_status': value_totals_by(ProjectsData.project_status,
+                                                'project_status'),
+            'totals_by_section': value_totals_by(Section.name, 'section'),
+        }
+    except Exception as e:
+        session.rollback()
+        print(f"An error occurred: {e}")
+        return {key: [] for key in ('by_year', 'by_status', 'by_manager',
+                                    'totals_by_status', 'totals_by_section')}
+
+    projects_cache.set(HOME_DISTRIBUTIONS_KEY, distributions)
+    return distributions
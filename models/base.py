@@ -4,7 +4,9 @@ Base = declarative_base()
 
 
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import select
 from models.engine.database import session
+from models.cache import projects_changed
 
 Base = declarative_base()
 
@@ -14,17 +16,55 @@ class BaseModel(Base):
     def to_dict(self):
         """Converts a SQLAlchemy model instance to a dictionary."""
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+    @classmethod
+    def projection(cls, **extra_columns):
+        """
+        Returns a Core select of every column of the model's table plus
+        the given extra columns, labelled by their keyword names.
+
+        Selecting columns instead of the model skips building ORM
+        objects, so rows come back as plain tuples.
+
+        Args:
+            **extra_columns: Column expressions to add, such as the
+            names from joined tables.
+
+        Returns:
+            Select: The select statement.
+        """
+        return select(
+            *cls.__table__.columns,
+            *[column.label(name) for name, column in extra_columns.items()]
+        )
+
+    @staticmethod
+    def fetch_dicts(query):
+        """
+        Executes a Core select and returns one dictionary per row,
+        keyed by the selected column labels.
+
+        Args:
+            query (Select): The statement to execute.
+
+        Returns:
+            list: A list of dictionaries.
+        """
+        return [dict(row) for row in session.execute(query).mappings()]
     
     def add(self):
         """Adds the current instance to the session."""
         session.add(self)
         session.commit()
+        projects_changed()
 
     def update(self):
         """Commits the changes made to the current instance."""
         session.commit()
+        projects_changed()
 
     def delete(self):
         """Deletes the current instance from the session."""
         session.delete(self)
         session.commit()
+        projects_changed()
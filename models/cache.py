@@ -0,0 +1,247 @@
+""" In-process caches """
+from collections import OrderedDict
+from sqlalchemy import event
+from models.engine.database import Session
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+import threading
+import hashlib
+import time
+import uuid
+import os
+
+load_dotenv()
+
+
+class TTLCache:
+    """
+    A thread-safe least-recently-used cache whose entries expire
+    after a fixed number of seconds.
+
+    Attributes:
+        maxsize (int): The maximum number of entries kept.
+        ttl (float): The number of seconds an entry stays valid.
+    """
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for key, or default if it is missing
+        or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Stores value under key, evicting the least recently used entry."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Removes a single entry from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+projects_cache = TTLCache(
+    maxsize=int(os.getenv('PROJECTS_CACHE_SIZE', 16)),
+    ttl=float(os.getenv('PROJECTS_CACHE_TTL', 300))
+)
+
+user_cache = TTLCache(
+    maxsize=int(os.getenv('USER_CACHE_SIZE', 256)),
+    ttl=float(os.getenv('USER_CACHE_TTL', 60))
+)
+
+
+_projects_listeners = []
+
+
+def on_projects_changed(callback):
+    """
+    Registers a callback that is run whenever projects data changes.
+
+    Args:
+        callback (callable): A function taking no arguments.
+
+    Returns:
+        callable: The callback, so this can be used as a decorator.
+    """
+    _projects_listeners.append(callback)
+    return callback
+
+
+def projects_changed():
+    """
+    Invalidates the cached projects data and notifies every registered
+    listener. Call this after committing a write that affects projects,
+    project managers, sections or contract types.
+    """
+    projects_cache.clear()
+    for callback in _projects_listeners:
+        callback()
+
+
+class DataVersion:
+    """
+    A counter that is bumped whenever a transaction that wrote to the
+    database is committed.
+
+    ETags built from it change on every write. They also carry an id
+    unique to this process and the current ttl period, so a worker that
+    did not see a write made in another worker stops answering
+    304 Not Modified once the period ends, just as its data caches
+    expire.
+
+    Attributes:
+        ttl (float): The length of an ETag period in seconds.
+        version (int): The number of writes seen by this process.
+        modified_at (float): The time of the last write seen by this
+        process, or of its start.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.version = 0
+        self.modified_at = time.time()
+        self.process_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+    def bump(self):
+        """Records that the data has changed."""
+        with self._lock:
+            self.version += 1
+            self.modified_at = time.time()
+
+    def key(self):
+        """
+        Returns the current version and ttl period, which change
+        whenever data seen by this process may have changed.
+        """
+        return self.version, int(time.time() // self.ttl)
+
+    def last_modified(self):
+        """
+        Returns a Last-Modified time for the current data version: the
+        last write seen by this process, or the start of the current
+        ttl period if that is later, for the same reason ETags carry
+        the period. HTTP dates have no fractions of a second.
+
+        Returns:
+            datetime: The time, in UTC.
+        """
+        period_start = int(time.time() // self.ttl) * self.ttl
+        return datetime.fromtimestamp(
+            int(max(self.modified_at, period_start)), timezone.utc)
+
+    def etag(self, *parts):
+        """
+        Returns an ETag for the current data version.
+
+        Args:
+            *parts: Extra values the response depends on, such as the
+            user id or the request path.
+
+        Returns:
+            str: The ETag.
+        """
+        key = [self.process_id, *self.key(), *parts]
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+data_version = DataVersion(ttl=projects_cache.ttl)
+
+
+class VersionedMemo:
+    """
+    Memoises the result of a function against the data version, so it
+    is recomputed only after a write, or once the ttl period ends, and
+    otherwise shared by every request.
+
+    Only the latest result is kept. Results for other arguments, such
+    as another date, replace it.
+
+    Attributes:
+        function (callable): The function whose result is memoised.
+        version (DataVersion): The data version results are tied to.
+    """
+
+    def __init__(self, function, version=data_version):
+        self.function = function
+        self.version = version
+        self._key = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        """
+        Returns the result of the function for args, computing it if
+        the data version or the args changed since the last call.
+        """
+        key = (self.version.key(), args)
+        with self._lock:
+            if self._key == key:
+                return self._value
+        value = self.function(*args)
+        with self._lock:
+            self._key, self._value = key, value
+        return value
+
+    def clear(self):
+        """Forgets the memoised result."""
+        with self._lock:
+            self._key = self._value = None
+
+
+@event.listens_for(Session, 'after_flush')
+def mark_data_changed(session, flush_context):
+    """Flags the session as having written to the database."""
+    session.info['data_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def mark_bulk_data_changed(orm_execute_state):
+    """
+    Flags the session as having written to the database when an INSERT,
+    UPDATE or DELETE statement is executed directly, without a flush.
+    """
+    if (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        orm_execute_state.session.info['data_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def bump_data_version(session):
+    """Bumps the data version when a transaction with writes commits."""
+    if session.info.pop('data_changed', False):
+        data_version.bump()
+
+
+@event.listens_for(Session, 'after_rollback')
+def clear_data_changed(session):
+    """Forgets the writes of a transaction that was rolled back."""
+    session.info.pop('data_changed', None)
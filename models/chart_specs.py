@@ -0,0 +1,299 @@
+""" Plain dictionary Plotly figure specs and their fast serialisation """
+import plotly.io as pio
+import numpy as np
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def template_json():
+    """
+    Serialises the default Plotly template once.
+
+    plotly_express adds the default template to the layout of every
+    figure. It is the largest part of every chart, so it is serialised
+    once and spliced into each chart by figure_json.
+
+    Returns:
+        str: The template as JSON.
+    """
+    template = pio.templates[pio.templates.default].to_plotly_json()
+    return json.dumps(template, default=encode_value)
+
+
+@lru_cache(maxsize=1)
+def color_sequence():
+    """Returns the default discrete colors of plotly_express."""
+    return tuple(json.loads(template_json())["layout"]["colorway"])
+
+
+def encode_value(value):
+    """
+    Converts the values json cannot serialise the way
+    PlotlyJSONEncoder does.
+
+    Decimals become floats, dates ISO strings and NumPy values their
+    Python equivalents. Not-a-number decimals become null.
+
+    Raises:
+        TypeError: If the value has no JSON representation.
+    """
+    if isinstance(value, Decimal):
+        return None if value.is_nan() else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError("Object of type {} is not JSON serializable".format(
+        type(value).__name__))
+
+
+def is_null(value):
+    """Tells whether pandas would treat a value as missing."""
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return value != value
+    if isinstance(value, Decimal):
+        return value.is_nan()
+    return False
+
+
+def column_values(rows, key):
+    """
+    Reads one column of a list of dictionaries with the types pandas
+    gives it.
+
+    A column of integers and floats is stored by pandas as int64, or
+    as float64 if it also holds floats or missing values, so its
+    values are converted to match. Other columns keep their values.
+    Missing values become None.
+
+    Args:
+        rows (list): The dictionaries to read.
+        key (str): The column name.
+
+    Returns:
+        list: The column values.
+    """
+    values = [row.get(key) for row in rows]
+    types = set()
+    has_nulls = False
+    for value in values:
+        if is_null(value):
+            has_nulls = True
+        else:
+            types.add(type(value))
+    if types and types <= {int, float}:
+        if has_nulls or float in types:
+            return [None if is_null(value) else float(value)
+                    for value in values]
+        return values
+    if has_nulls:
+        return [None if is_null(value) else value for value in values]
+    return values
+
+
+def hovertemplate(*parts):
+    """Joins label=value pairs into a plotly_express hover template."""
+    return "<br>".join(
+        "{}={}".format(label, value) for label, value in parts
+    ) + "<extra></extra>"
+
+
+def bar_traces(x, y, color, labels, colors):
+    """
+    Builds the traces px.bar makes for a bar chart colored by a column.
+
+    There is one trace per color value, in order of first appearance.
+    Bars whose color value is missing are left out, although the
+    missing value still takes a color, unless it is the only value.
+
+    Args:
+        x (list): The x values.
+        y (list): The y values.
+        color (list): The values the bars are colored by.
+        labels (tuple): The x, y and color column names.
+        colors (list): The color sequence.
+
+    Returns:
+        list: The trace dictionaries.
+    """
+    x_label, y_label, color_label = labels
+    order = list(dict.fromkeys(color))
+    palette = {value: colors[index % len(colors)]
+               for index, value in enumerate(order)}
+    if len(order) == 1:
+        groups = {order[0]: range(len(color))}
+    else:
+        groups = {value: [] for value in order if value is not None}
+        for index, value in enumerate(color):
+            if value is not None:
+                groups[value].append(index)
+
+    traces = []
+    for value, indices in groups.items():
+        name = str(value)
+        traces.append({
+            "alignmentgroup": "True",
+            "hovertemplate": hovertemplate(
+                (color_label, name), (x_label, "%{x}"), (y_label, "%{y}")),
+            "legendgroup": name,
+            "marker": {
+                "color": palette[value],
+                "pattern": {"shape": ""}
+            },
+            "name": name,
+            "offsetgroup": name,
+            "orientation": "v",
+            "showlegend": name != "",
+            "textposition": "auto",
+            "x": [x[index] for index in indices],
+            "xaxis": "x",
+            "y": [y[index] for index in indices],
+            "yaxis": "y",
+            "type": "bar"
+        })
+    return traces
+
+
+def pie_trace(names, values, labels):
+    """
+    Builds the trace px.pie makes.
+
+    Args:
+        names (list): The slice names.
+        values (list): The slice values.
+        labels (tuple): The names and values column names.
+    """
+    names_label, values_label = labels
+    return {
+        "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+        "hovertemplate": hovertemplate(
+            (names_label, "%{label}"), (values_label, "%{value}")),
+        "labels": names,
+        "legendgroup": "",
+        "name": "",
+        "showlegend": True,
+        "values": values,
+        "type": "pie"
+    }
+
+
+def hierarchy_trace(trace_type, names, values, labels, colors=None,
+                    color_map=None):
+    """
+    Builds the trace px.treemap or px.sunburst makes for a path of one
+    column, optionally colored by that same column.
+
+    Like plotly_express, the values of equal names are summed and the
+    names are sorted.
+
+    Args:
+        trace_type (str): 'treemap' or 'sunburst'.
+        names (list): The path column values.
+        values (list): The values to size by.
+        labels (tuple): The path and values column names.
+        colors (list): The color sequence, if the chart is colored by
+        the path column. Defaults to None.
+        color_map (dict): Colors of given names, the other names taking
+        colors from the sequence. Defaults to None.
+    """
+    path_label, values_label = labels
+    totals = {}
+    for name, value in zip(names, values):
+        totals[name] = totals.get(name, 0) + value
+    keys = sorted(totals)
+    ids = [str(key) for key in keys]
+
+    parts = [("labels", "%{label}"), (values_label, "%{value}"),
+             ("parent", "%{parent}"), ("id", "%{id}")]
+    trace = {"branchvalues": "total"}
+    if colors is not None:
+        trace["customdata"] = [[key] for key in keys]
+        parts.append((path_label, "%{customdata[0]}"))
+    trace["domain"] = {"x": [0.0, 1.0], "y": [0.0, 1.0]}
+    trace["hovertemplate"] = hovertemplate(*parts)
+    trace["ids"] = ids
+    trace["labels"] = ids
+    if colors is not None:
+        mapping = dict(color_map or {})
+        for key in keys:
+            if mapping.get(key) is None:
+                mapping[key] = colors[len(mapping) % len(colors)]
+        trace["marker"] = {"colors": [mapping[key] for key in keys]}
+    trace["name"] = ""
+    trace["parents"] = [""] * len(keys)
+    trace["values"] = [totals[key] for key in keys]
+    trace["type"] = trace_type
+    return trace
+
+
+def axis(anchor, title, font_size):
+    """Returns the layout of a plotly_express cartesian axis."""
+    return {
+        "anchor": anchor,
+        "domain": [0.0, 1.0],
+        "title": {"text": title, "font": {"size": font_size}}
+    }
+
+
+def legend(title, font_size, has_traces=True):
+    """
+    Returns a plotly_express legend layout with a title.
+
+    plotly_express only titles the legend of a chart with traces, so
+    the keys of the legend of an empty chart are in another order.
+    """
+    if not has_traces:
+        return {"tracegroupgap": 0,
+                "title": {"font": {"size": font_size}, "text": title}}
+    return {"title": {"text": title, "font": {"size": font_size}},
+            "tracegroupgap": 0}
+
+
+def title_layout(text, font_size, x, y):
+    """Returns a centred title layout in the Arial font."""
+    title = {} if text is None else {"text": text}
+    title["font"] = {"size": font_size, "family": "Arial"}
+    title["x"] = x
+    title["y"] = y
+    return title
+
+
+def figure(data, layout):
+    """
+    Returns a figure spec.
+
+    Args:
+        data (list): The trace dictionaries.
+        layout (dict): The layout, without the template, which
+        figure_json adds.
+    """
+    return {"data": data, "layout": layout}
+
+
+def figure_json(spec):
+    """
+    Serialises a figure spec with the default template.
+
+    The output is the same as json.dumps of the equivalent
+    plotly_express figure with PlotlyJSONEncoder, but the values are
+    encoded in a single pass of the C encoder instead of being checked
+    by the figure validators, encoded, parsed and encoded again.
+
+    Args:
+        spec (dict): The figure spec, as returned by figure.
+
+    Returns:
+        str: The figure as JSON.
+    """
+    layout = json.dumps(spec["layout"], default=encode_value)
+    separator = ", " if spec["layout"] else ""
+    return '{{"data": {}, "layout": {{"template": {}{}{}}}'.format(
+        json.dumps(spec["data"], default=encode_value),
+        template_json(), separator, layout[1:])
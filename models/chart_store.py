@@ -0,0 +1,119 @@
+""" Prebuilt home page charts """
+from models.cache import on_projects_changed, data_version
+from models.decorators import data_fingerprint
+from models.engine.database import session
+from models.plot_functions import plot_home_page_charts
+from models.projects import ProjectsData
+import threading
+
+
+class HomeChartStore:
+    """
+    Holds the five serialised home page charts together with the
+    fingerprint of the data they were built from and the data version
+    they were checked against.
+
+    The charts are rebuilt in a background thread when projects data
+    changes, so the /home page only reads the prebuilt JSON. A rebuild
+    is also scheduled when a page finds the data version has moved on
+    since the charts were checked, so writes made by other workers or
+    CLI commands are picked up once the ttl period ends.
+
+    Attributes:
+        version (DataVersion): The data version the charts are tied to.
+    """
+
+    def __init__(self, version=data_version):
+        self.charts = None
+        self.fingerprint = None
+        self.version = version
+        self.version_key = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._stale = False
+        self._worker = None
+
+    def get_charts(self):
+        """
+        Returns the prebuilt chart JSON strings.
+
+        The first call builds them, in one thread while the others
+        wait. Later calls return the current charts at once, scheduling
+        a background rebuild if the data version has changed since
+        they were checked.
+
+        Returns:
+            tuple: The five chart JSON strings returned by
+            plot_home_page_charts.
+        """
+        if self.charts is None:
+            with self._build_lock:
+                if self.charts is None:
+                    self._rebuild()
+        elif self.version_key != self.version.key():
+            self.schedule_rebuild()
+        return self.charts
+
+    def rebuild(self):
+        """
+        Rebuilds the charts from the current projects data.
+
+        Plotting is skipped when the data fingerprint has not changed.
+
+        Returns:
+            bool: True if the charts were rebuilt, False otherwise.
+        """
+        with self._build_lock:
+            return self._rebuild()
+
+    def _rebuild(self):
+        """Rebuilds the charts; the caller holds the build lock."""
+        # Read before the data, so a write made while it is read leaves
+        # the charts tied to an older version.
+        version_key = self.version.key()
+        projects_data = ProjectsData.projects_data_to_dict_list()
+        fingerprint = data_fingerprint(projects_data)
+        if fingerprint == self.fingerprint:
+            with self._lock:
+                self.version_key = version_key
+            return False
+
+        charts = plot_home_page_charts(projects_data)
+        with self._lock:
+            self.charts = charts
+            self.fingerprint = fingerprint
+            self.version_key = version_key
+        return True
+
+    def schedule_rebuild(self):
+        """
+        Marks the charts as stale and rebuilds them in a background
+        thread. Several changes made while a rebuild is running are
+        folded into a single further rebuild.
+        """
+        with self._lock:
+            self._stale = True
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Rebuilds the charts until no further changes are pending."""
+        try:
+            while True:
+                with self._lock:
+                    if not self._stale:
+                        self._worker = None
+                        return
+                    self._stale = False
+                try:
+                    self.rebuild()
+                except Exception as e:
+                    print(f"An error occurred: {e}")
+        finally:
+            session.remove()
+
+
+home_chart_store = HomeChartStore()
+on_projects_changed(home_chart_store.schedule_rebuild)
@@ -1,7 +1,13 @@
 """ Required Roles """
-from flask import flash, redirect, url_for
+from flask import (
+    flash, redirect, url_for, request, session, make_response, Response
+)
 from flask_login import current_user
 from functools import wraps
+from datetime import date
+from models.cache import data_version
+import hashlib
+import json
 
 
 def required_roles(*roles):
@@ -21,4 +27,85 @@ def required_roles(*roles):
                 return redirect(url_for('landing.denied_access'))
             return f(*args, **kwargs)
         return wrapped
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def data_fingerprint(data):
+    """
+    Returns a fingerprint of the data a response is built from, for use
+    as its ETag.
+
+    Args:
+        data: JSON-serialisable data; other values such as dates and
+        decimals are converted with str.
+
+    Returns:
+        str: A hex digest that changes whenever the data changes.
+    """
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Tells whether the browser's copy of a response is still current.
+
+    If-None-Match is checked against the ETag when the request has one;
+    otherwise If-Modified-Since is checked against last_modified.
+
+    Args:
+        etag (str): The ETag of the current response.
+        last_modified (datetime, optional): When its data last changed.
+
+    Returns:
+        bool: True if a 304 Not Modified can be sent.
+    """
+    if request.if_none_match:
+        return etag in request.if_none_match
+    return (last_modified is not None
+            and request.if_modified_since is not None
+            and last_modified <= request.if_modified_since)
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Sets the ETag and Last-Modified headers of a response, and makes
+    browsers check with the server before reusing it.
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def conditional_get(f):
+    """Decorator that answers unchanged pages with 304 Not Modified
+
+    The ETag is built from the data version, the current user and their
+    role, today's date and the request URL. When the browser already holds a page
+    with that ETag, the view is not called, so neither the database
+    nor the template is touched. Responses with pending flash messages
+    are always rendered.
+
+    Apply it below login_required and required_roles.
+    """
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        if request.method != 'GET' or session.get('_flashes'):
+            return f(*args, **kwargs)
+
+        etag = data_version.etag(current_user.get_id(),
+                                 getattr(current_user, 'role', None),
+                                 date.today().isoformat(),
+                                 request.full_path)
+        if not_modified(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        return set_validators(response, etag)
+    return wrapped
@@ -1,14 +1,103 @@
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from flask import has_app_context
+from flask.globals import app_ctx
 from dotenv import load_dotenv
+from models.metrics import record_query
+import threading
+import time
 import os
 
 load_dotenv()
 
 db_connection_string = os.getenv('db_connection_string')
 
-engine = create_engine(db_connection_string)
+
+def pool_options(connection_string):
+    """
+    Builds the connection pool keyword arguments for create_engine.
+
+    The QueuePool settings are read from the environment so that they can
+    be tuned per deployment to match the number of gunicorn worker threads.
+    SQLite uses its own single-connection pools, so no options are
+    returned for it.
+
+    Args:
+        connection_string (str): The database connection string.
+
+    Returns:
+        dict: Keyword arguments for create_engine.
+    """
+    if make_url(connection_string).get_backend_name() == 'sqlite':
+        return {}
+
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower()
+        in ('1', 'true', 'yes'),
+    }
+
+
+def session_scope():
+    """
+    Returns the key that identifies the current session scope.
+
+    Inside Flask every app context (and so every request) gets its own
+    session. Code running outside Flask, such as scripts and tests,
+    falls back to one session per thread.
+    """
+    if has_app_context():
+        return id(app_ctx._get_current_object())
+    return threading.get_ident()
+
+
+engine = create_engine(db_connection_string,
+                       **pool_options(db_connection_string))
+
+
+@event.listens_for(engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context,
+                      executemany):
+    """Notes when a SQL statement starts executing."""
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context,
+                     executemany):
+    """Adds the statement's execution time to the request metrics."""
+    start = conn.info['query_start_time'].pop()
+    record_query(statement, time.perf_counter() - start)
+
+
+@event.listens_for(engine, 'handle_error')
+def discard_query_timer(exception_context):
+    """Drops the start time of a statement that failed."""
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start_time'):
+        conn.info['query_start_time'].pop()
+
 
 Session = sessionmaker(bind=engine)
 
-session = Session()
\ No newline at end of file
+session = scoped_session(Session, scopefunc=session_scope)
+
+
+def init_app(app):
+    """
+    Registers the session teardown hook on the Flask application.
+
+    The session of the current app context is closed and its connection
+    returned to the pool once the request finishes, whether it succeeded
+    or not. Uncommitted work is rolled back.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        session.remove()
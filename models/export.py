@@ -0,0 +1,86 @@
+""" Streaming data export """
+from models.engine.database import session
+from decimal import Decimal
+from datetime import date
+import csv
+import io
+import json
+
+CHUNK_SIZE = 1000
+
+
+def json_default(value):
+    """
+    Converts values the json module cannot serialise.
+
+    Dates are written in ISO format and decimals as strings so that no
+    precision is lost.
+    """
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} "
+                    "is not JSON serializable")
+
+
+def stream_rows(query, chunk_size=CHUNK_SIZE):
+    """
+    Executes a select statement on a server-side cursor and yields
+    its rows as mappings.
+
+    Only chunk_size rows are held in memory at any time.
+
+    Args:
+        query (Select): The statement to execute.
+        chunk_size (int): The number of rows fetched per round trip.
+
+    Yields:
+        RowMapping: One mapping per row.
+    """
+    result = session.execute(
+        query.execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    try:
+        for row in result.mappings():
+            yield row
+    finally:
+        result.close()
+
+
+def ndjson_lines(rows):
+    """
+    Yields one JSON document per row, each terminated by a newline.
+
+    Args:
+        rows (iterable): Mappings of column name to value.
+    """
+    for row in rows:
+        yield json.dumps(dict(row), default=json_default) + "\n"
+
+
+def csv_lines(columns, rows):
+    """
+    Yields a CSV header line followed by one line per row.
+
+    Args:
+        columns (list): The column names, in output order.
+        rows (iterable): Mappings of column name to value.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return line
+
+    writer.writerow(columns)
+    yield flush()
+    for row in rows:
+        writer.writerow([
+            value.isoformat() if isinstance(value, date) else value
+            for value in (row[column] for column in columns)
+        ])
+        yield flush()
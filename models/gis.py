@@ -1,11 +1,11 @@
 from sqlalchemy import Column, Integer, String, Text, DECIMAL, ForeignKey
 from sqlalchemy.orm import relationship
-from sqlalchemy import select
-from models.base import Base
+from sqlalchemy import select, union_all, literal, literal_column, cast, null
+from models.base import BaseModel
 from models.engine.database import session
 
 
-class Output(Base):
+class Output(BaseModel):
     __tablename__ = "output"
 
     id = Column(Integer, primary_key=True)
@@ -26,26 +26,20 @@ class Output(Base):
         Returns:
             list: A list of dictionaries containing output data.
         """
-        output_list = []
         try:
-            query = session.query(cls.id, cls.name).all()
+            output_list = cls.fetch_dicts(select(
+                cls.id.label("output_id"),
+                cls.name.label("output_name")
+            ))
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
-        finally:
-            session.close()
-
-        for row in query:
-            output_dict = {
-                "output_id": row[0],
-                "output_name": row[1]
-            }
-            output_list.append(output_dict)
+            return []
 
         return output_list
 
 
-class Activity(Base):
+class Activity(BaseModel):
     __tablename__ = "activities"
 
     id = Column(Integer, primary_key=True)
@@ -81,29 +75,22 @@ class Activity(Base):
         Returns:
             list: A list of dictionaries containing activity data.
         """
-        activity_list = []
         try:
-            query = session.query(cls.id, cls.activity, cls.output_id,
-                                  cls.responsible_person_id).all()
+            activity_list = cls.fetch_dicts(select(
+                cls.id.label("activity_id"),
+                cls.activity.label("activity_name"),
+                cls.output_id,
+                cls.responsible_person_id
+            ))
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
-        finally:
-            session.close()
-
-        for row in query:
-            activity_dict = {
-                "activity_id": row[0],
-                "activity_name": row[1],
-                "output_id": row[2],
-                "responsible_person_id": row[3]
-            }
-            activity_list.append(activity_dict)
+            return []
 
         return activity_list
 
 
-class ResponsiblePerson(Base):
+class ResponsiblePerson(BaseModel):
     __tablename__ = "responsiblepeople"
 
     id = Column(Integer, primary_key=True)
@@ -126,27 +113,21 @@ class ResponsiblePerson(Base):
 
     @classmethod
     def gis_responsible_person_data_to_dict_list(cls):
-        responsible_person_list = []
         try:
-            query = session.query(cls.id, cls.name, cls.designation).all()
+            responsible_person_list = cls.fetch_dicts(select(
+                cls.id.label("responsible_person_id"),
+                cls.name.label("responsible_person_name"),
+                cls.designation
+            ))
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
-        finally:
-            session.close()
-
-        for row in query:
-            responsible_person_dict = {
-                "responsible_person_id": row[0],
-                "responsible_person_name": row[1],
-                "designation": row[2]
-            }
-            responsible_person_list.append(responsible_person_dict)
+            return []
 
         return responsible_person_list
 
 
-class Task(Base):
+class Task(BaseModel):
     """ Represents a task. """
     __tablename__ = "tasks"
 
@@ -183,29 +164,50 @@ class Task(Base):
         Returns:
             list: A list of dictionaries containing GIS task data.
         """
-        task_list = []
         try:
-            query = session.query(cls.id, cls.description,
-                                  cls.percentage_of_activity,
-                                  cls.activity_id).all()
+            task_list = cls.fetch_dicts(select(
+                cls.id.label("task_id"),
+                cls.description.label("task_description"),
+                cls.percentage_of_activity,
+                cls.activity_id
+            ))
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
-        finally:
-            session.close()
-
-        for row in query:
-            task_dict = {
-                "task_id": row[0],
-                "task_description": row[1],
-                "percentage_of_activity": row[2],
-                "activity_id": row[3]
-            }
-            task_list.append(task_dict)
+            return []
 
         return task_list
 
 
+def gis_data_query():
+    """
+    Returns the select statement joining outputs, activities,
+    responsible people and tasks, with one labelled column per
+    GIS data field, ordered by output, activity and task id so that
+    the rows of each output are adjacent.
+    """
+    return select(
+        Output.id.label("output_id"),
+        Output.name.label("output_name"),
+        Activity.activity.label("activity"),
+        ResponsiblePerson.name.label("responsible_person"),
+        ResponsiblePerson.designation.label("designation"),
+        Task.description.label("task_description"),
+        Task.percentage_of_activity.label("percentage_of_activity")
+    ).select_from(
+        Output
+    ).outerjoin(
+        Activity, Output.id == Activity.output_id
+    ).outerjoin(
+        ResponsiblePerson,
+        Activity.responsible_person_id == ResponsiblePerson.id
+    ).outerjoin(
+        Task, Activity.id == Task.activity_id
+    ).order_by(
+        Output.id, Activity.id, Task.id
+    )
+
+
 def gis_data_to_dict_list():
     """
     Returns a list of dictionaries containing GIS data.
@@ -221,42 +223,230 @@ def gis_data_to_dict_list():
         A list of dictionaries for GIS Data
     """
     try:
-        query = select(
-            Output.id,
-            Output.name,
-            Activity.activity,
-            ResponsiblePerson.name,
-            ResponsiblePerson.designation,
-            Task.description,
-            Task.percentage_of_activity
-        ).select_from(
-            Output
-        ).outerjoin(
-            Activity, Output.id == Activity.output_id
-        ).outerjoin(
-            ResponsiblePerson,
-            Activity.responsible_person_id == ResponsiblePerson.id
-        ).outerjoin(
-            Task, Activity.id == Task.activity_id
-        )
-
-        results = session.execute(query).fetchall()
-
-        gis_data = []
-        for row in results:
-            gis_dict = {
-                "output_id": row[0],
-                "output_name": row[1],
-                "activity": row[2],
-                "responsible_person": row[3],
-                "designation": row[4],
-                "task_description": row[5],
-                "percentage_of_activity": row[6]
-            }
-            gis_data.append(gis_dict)
-
+        gis_data = BaseModel.fetch_dicts(gis_data_query())
     except Exception as e:
         session.rollback()
         print(f"An error occurred: {e}")
+        return []
 
     return gis_data
+
+
+
+class GISHierarchy:
+    """
+    An in-memory snapshot of the GIS tables, loaded in one query.
+
+    Outputs, activities, responsible people and tasks are indexed by
+    id and linked into an Output -> Activity -> Task tree. The flat
+    join returned by gis_data_to_dict_list and the four lookup lists
+    of the GIS models are all built from this one snapshot.
+
+    Attributes:
+        outputs (dict): Output dictionaries by id, each with an
+        'activities' list.
+        activities (dict): Activity dictionaries by id, each with a
+        'tasks' list.
+        responsible_people (dict): Responsible person dictionaries by id.
+        tasks (dict): Task dictionaries by id.
+    """
+
+    def __init__(self, rows=()):
+        self.outputs = {}
+        self.activities = {}
+        self.responsible_people = {}
+        self.tasks = {}
+
+        for row in rows:
+            if row["kind"] == "output":
+                self.outputs[row["id"]] = {
+                    "output_id": row["id"],
+                    "output_name": row["name"],
+                    "activities": []
+                }
+            elif row["kind"] == "activity":
+                self.activities[row["id"]] = {
+                    "activity_id": row["id"],
+                    "activity_name": row["name"],
+                    "output_id": row["output_id"],
+                    "responsible_person_id": row["responsible_person_id"],
+                    "tasks": []
+                }
+            elif row["kind"] == "responsible_person":
+                self.responsible_people[row["id"]] = {
+                    "responsible_person_id": row["id"],
+                    "responsible_person_name": row["name"],
+                    "designation": row["designation"]
+                }
+            else:
+                self.tasks[row["id"]] = {
+                    "task_id": row["id"],
+                    "task_description": row["name"],
+                    "percentage_of_activity": row["percentage_of_activity"],
+                    "activity_id": row["activity_id"]
+                }
+
+        for activity in self.activities.values():
+            output = self.outputs.get(activity["output_id"])
+            if output is not None:
+                output["activities"].append(activity)
+        for task in self.tasks.values():
+            activity = self.activities.get(task["activity_id"])
+            if activity is not None:
+                activity["tasks"].append(task)
+
+    @staticmethod
+    def query():
+        """
+        Returns one UNION ALL statement over the four GIS tables, with
+        every row projected onto the same columns and tagged by kind.
+        Rows are ordered by id, so every index is in id order.
+        """
+        no_integer = cast(null(), Integer)
+        no_text = cast(null(), String(255))
+        no_percentage = cast(null(), DECIMAL(5, 2))
+        return union_all(
+            select(literal("output").label("kind"),
+                   Output.id.label("id"),
+                   cast(Output.name, Text).label("name"),
+                   no_integer.label("output_id"),
+                   no_integer.label("responsible_person_id"),
+                   no_integer.label("activity_id"),
+                   no_text.label("designation"),
+                   no_percentage.label("percentage_of_activity")),
+            select(literal("activity"), Activity.id,
+                   cast(Activity.activity, Text), Activity.output_id,
+                   Activity.responsible_person_id, no_integer,
+                   no_text, no_percentage),
+            select(literal("responsible_person"), ResponsiblePerson.id,
+                   cast(ResponsiblePerson.name, Text), no_integer,
+                   no_integer, no_integer, ResponsiblePerson.designation,
+                   no_percentage),
+            select(literal("task"), Task.id, Task.description, no_integer,
+                   no_integer, Task.activity_id, no_text,
+                   Task.percentage_of_activity),
+        ).order_by(literal_column("id"))
+
+    @classmethod
+    def load(cls):
+        """
+        Loads the GIS hierarchy from the database in a single query.
+
+        Returns:
+            GISHierarchy: The snapshot, or an empty one if the query
+            fails.
+        """
+        try:
+            rows = session.execute(cls.query()).mappings().all()
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return cls()
+
+        return cls(rows)
+
+    def grouped_outputs(self):
+        """
+        Groups the GIS data by output in a single pass over the tree.
+
+        Each output carries its flat join rows, its activities with their
+        tasks, and completion totals summed from percentage_of_activity.
+        An activity's percentage_total is the sum over its tasks, and an
+        output's completion is the mean of its activities' totals, since
+        activities add up to 100% of the output.
+
+        Returns:
+            list: One dictionary per output, in id order, with the keys
+            output_id, output_name, rows, activities, percentage_total
+            and completion.
+        """
+        grouped = []
+        for output in self.outputs.values():
+            row = {
+                "output_id": output["output_id"],
+                "output_name": output["output_name"],
+                "activity": None,
+                "responsible_person": None,
+                "designation": None,
+                "task_description": None,
+                "percentage_of_activity": None
+            }
+            rows = []
+            activities = []
+            output_total = 0
+            if not output["activities"]:
+                rows.append(row)
+            for activity in output["activities"]:
+                person = self.responsible_people.get(
+                    activity["responsible_person_id"], {})
+                activity_row = dict(
+                    row,
+                    activity=activity["activity_name"],
+                    responsible_person=person.get("responsible_person_name"),
+                    designation=person.get("designation")
+                )
+                activity_total = 0
+                if not activity["tasks"]:
+                    rows.append(activity_row)
+                for task in activity["tasks"]:
+                    rows.append(dict(
+                        activity_row,
+                        task_description=task["task_description"],
+                        percentage_of_activity=task["percentage_of_activity"]
+                    ))
+                    activity_total += task["percentage_of_activity"] or 0
+                activities.append({
+                    "activity_id": activity["activity_id"],
+                    "activity_name": activity["activity_name"],
+                    "responsible_person": activity_row["responsible_person"],
+                    "designation": activity_row["designation"],
+                    "tasks": activity["tasks"],
+                    "percentage_total": activity_total
+                })
+                output_total += activity_total
+
+            completion = (round(output_total / len(activities), 2)
+                          if activities else 0)
+            grouped.append({
+                "output_id": output["output_id"],
+                "output_name": output["output_name"],
+                "rows": rows,
+                "activities": activities,
+                "percentage_total": output_total,
+                "completion": completion
+            })
+        return grouped
+
+    def gis_data(self):
+        """
+        Returns the flat Output -> Activity -> Task join, in the format
+        of gis_data_to_dict_list.
+        """
+        return [row for output in self.grouped_outputs()
+                for row in output["rows"]]
+
+    def output_list(self):
+        """Returns the outputs in the format of gis_output_data_to_dict_list."""
+        return [
+            {"output_id": output["output_id"],
+             "output_name": output["output_name"]}
+            for output in self.outputs.values()
+        ]
+
+    def activity_list(self):
+        """Returns the activities in the format of gis_activity_data_to_dict_list."""
+        return [
+            {key: value for key, value in activity.items() if key != "tasks"}
+            for activity in self.activities.values()
+        ]
+
+    def responsible_person_list(self):
+        """
+        Returns the responsible people in the format of
+        gis_responsible_person_data_to_dict_list.
+        """
+        return [dict(person) for person in self.responsible_people.values()]
+
+    def task_list(self):
+        """Returns the tasks in the format of gis_task_data_to_dict_list."""
+        return [dict(task) for task in self.tasks.values()]
@@ -0,0 +1,230 @@
+""" Guarantee expiry timeline and expiring guarantee queries """
+from sqlalchemy import select, or_
+from models.cache import projects_cache
+from models.projects import ProjectsData, ProjectManagers, Section
+from models.schedule_risk import CLOSED_STATUSES
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+import heapq
+
+TIMELINE_KEY = 'guarantee_expiry_timeline'
+DEFAULT_DAYS = 30
+MAX_DAYS = 3650
+DIGEST_WINDOWS = (7, 30, 90)
+
+# The expiry date and value columns of each type of guarantee.
+GUARANTEE_TYPES = {
+    'performance': ('performance_guarantee_expiry_date',
+                    'performance_guarantee_value'),
+    'advance_payment': ('advance_payment_guarantee_expiry_date',
+                        'advance_payment_value'),
+}
+
+
+class ExpiryTimeline:
+    """
+    The guarantees of one type, sorted by expiry date, answering date
+    window queries by binary search.
+
+    Attributes:
+        rows (list): One dictionary per guarantee, ordered by expiry
+        date and project id.
+        days (list): The expiry date of each row as a day number.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.days = [row['expiry_date'].toordinal() for row in rows]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def bounds(self, start=None, end=None):
+        """
+        Returns the start and stop indices of the rows expiring from
+        start to end, both included. A missing start or end leaves that side open.
+        """
+        low = 0 if start is None else bisect_left(self.days,
+                                                  start.toordinal())
+        high = (len(self.days) if end is None
+                else bisect_right(self.days, end.toordinal()))
+        return low, max(low, high)
+
+    def window(self, start=None, end=None):
+        """Returns the rows expiring from start to end."""
+        low, high = self.bounds(start, end)
+        return self.rows[low:high]
+
+    def totals(self, start=None, end=None):
+        """Returns the number and summed value of the rows in a window."""
+        rows = self.window(start, end)
+        return {'count': len(rows),
+                'value': sum((row['guarantee_value'] or Decimal(0)
+                              for row in rows), Decimal(0))}
+
+
+def load_timeline(guarantee):
+    """
+    Reads the guarantees of one type held for open projects, in expiry
+    date order, using the index on the expiry date column.
+
+    Args:
+        guarantee (str): A key of GUARANTEE_TYPES.
+
+    Returns:
+        ExpiryTimeline: The guarantees.
+    """
+    date_column, value_column = (getattr(ProjectsData, name)
+                                 for name in GUARANTEE_TYPES[guarantee])
+    query = ProjectsData.join_related(select(
+        ProjectsData.id.label('project_id'),
+        ProjectsData.contract_number,
+        ProjectsData.contract_name,
+        ProjectsData.project_status,
+        ProjectManagers.name.label('project_manager'),
+        Section.name.label('section'),
+        value_column.label('guarantee_value'),
+        date_column.label('expiry_date'),
+    )).where(
+        date_column.isnot(None),
+        or_(ProjectsData.project_status.is_(None),
+            ProjectsData.project_status.notin_(CLOSED_STATUSES)),
+    ).order_by(date_column, ProjectsData.id)
+    rows = ProjectsData.fetch_dicts(query)
+    for row in rows:
+        row['guarantee'] = guarantee
+    return ExpiryTimeline(rows)
+
+
+def expiry_timelines():
+    """
+    Returns the timeline of every guarantee type, built once and cached
+    until projects data changes.
+
+    Returns:
+        dict: An ExpiryTimeline per key of GUARANTEE_TYPES.
+    """
+    timelines = projects_cache.get(TIMELINE_KEY)
+    if timelines is None:
+        timelines = {guarantee: load_timeline(guarantee)
+                     for guarantee in GUARANTEE_TYPES}
+        projects_cache.set(TIMELINE_KEY, timelines)
+    return timelines
+
+
+def check_guarantee(guarantee):
+    """
+    Raises:
+        ValueError: If guarantee is not None or a guarantee type.
+    """
+    if guarantee is not None and guarantee not in GUARANTEE_TYPES:
+        raise ValueError("guarantee must be one of {}".format(
+            ', '.join(GUARANTEE_TYPES)))
+
+
+def expiring_guarantees(days=DEFAULT_DAYS, today=None, guarantee=None,
+                        include_expired=False):
+    """
+    Returns the guarantees of open projects that expire within a number
+    of days.
+
+    Args:
+        days (int): The length of the window from today, from 0 to
+        MAX_DAYS. Defaults to DEFAULT_DAYS.
+        today (date): The first day of the window. Defaults to today.
+        guarantee (str): Only return guarantees of this type. Defaults
+        to every type.
+        include_expired (bool): Also return the guarantees that have
+        already expired. Defaults to False.
+
+    Returns:
+        list: One dictionary per guarantee, ordered by expiry date, with
+        the project, the guarantee type, value, expiry_date and
+        days_to_expiry.
+
+    Raises:
+        ValueError: If days or guarantee is not valid.
+    """
+    if not 0 <= days <= MAX_DAYS:
+        raise ValueError(f"days must be between 0 and {MAX_DAYS}")
+    check_guarantee(guarantee)
+
+    today = today or date.today()
+    start = None if include_expired else today
+    end = today + timedelta(days=days)
+    timelines = expiry_timelines()
+    windows = [timelines[name].window(start, end)
+               for name in GUARANTEE_TYPES
+               if guarantee in (None, name)]
+    return [
+        dict(row, days_to_expiry=(row['expiry_date'] - today).days)
+        for row in heapq.merge(
+            *windows,
+            key=lambda row: (row['expiry_date'], row['project_id']))
+    ]
+
+
+def guarantee_digest(today=None, windows=DIGEST_WINDOWS):
+    """
+    Returns a digest of the guarantees of open projects: how many have
+    expired and how many expire within each window, with their values,
+    and the guarantees expiring within the first window.
+
+    Args:
+        today (date): The date of the digest. Defaults to today.
+        windows (tuple): The window lengths in days, shortest first.
+        Defaults to DIGEST_WINDOWS.
+
+    Returns:
+        dict: The as_of date, the windows, a dictionary per guarantee
+        type of the expired and within_<n>_days totals, and the
+        expiring_soon guarantees.
+    """
+    today = today or date.today()
+    timelines = expiry_timelines()
+    guarantees = {}
+    for name, timeline in timelines.items():
+        totals = {'expired': timeline.totals(
+            end=today - timedelta(days=1))}
+        for days in windows:
+            totals[f'within_{days}_days'] = timeline.totals(
+                today, today + timedelta(days=days))
+        guarantees[name] = totals
+    return {
+        'as_of': today.isoformat(),
+        'windows': list(windows),
+        'guarantees': guarantees,
+        'expiring_soon': expiring_guarantees(windows[0], today),
+    }
+
+
+def format_digest(digest):
+    """
+    Formats a guarantee digest as plain text, for the console or email.
+
+    Args:
+        digest (dict): A digest returned by guarantee_digest.
+
+    Returns:
+        str: The report.
+    """
+    lines = ['Guarantee expiry digest for {}'.format(digest['as_of']), '']
+    for name, totals in digest['guarantees'].items():
+        lines.append('{} guarantees:'.format(
+            name.replace('_', ' ').capitalize()))
+        for key, total in totals.items():
+            lines.append('  {:<16} {:>6}  {:>20,.2f}'.format(
+                key.replace('_', ' '), total['count'], total['value']))
+    lines.append('')
+    lines.append('Expiring within {} days:'.format(digest['windows'][0]))
+    for row in digest['expiring_soon']:
+        value = row['guarantee_value']
+        lines.append('  {}  {:<20} {:<16} {:>20}  {}'.format(
+            row['expiry_date'].isoformat(), row['contract_number'],
+            row['guarantee'].replace('_', ' '),
+            '' if value is None else '{:,.2f}'.format(value),
+            row['project_manager']))
+    if not digest['expiring_soon']:
+        lines.append('  None')
+    return '\n'.join(lines)
@@ -0,0 +1,241 @@
+""" Request timing and SQL query instrumentation """
+from flask import g, has_app_context, request
+from flask import before_render_template, template_rendered
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import threading
+import time
+import math
+import os
+
+load_dotenv()
+
+SAMPLE_SIZE = int(os.getenv('METRICS_SAMPLE_SIZE', 500))
+PERCENTILES = (50, 90, 99)
+
+
+class RequestMetrics:
+    """
+    The timings collected while serving a single request.
+
+    Attributes:
+        started_at (float): The perf_counter value when the request began.
+        query_count (int): The number of SQL statements executed.
+        sql_time (float): The total SQL time in seconds.
+        slowest_query (str): The slowest SQL statement executed.
+        slowest_query_time (float): The time of the slowest statement.
+        timings (dict): Other named durations in seconds, such as
+        'render' for Jinja and 'plotly' for chart serialisation.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.slowest_query = None
+        self.slowest_query_time = 0.0
+        self.timings = defaultdict(float)
+        self._render_starts = []
+
+    def add_query(self, statement, duration):
+        """Records one executed SQL statement."""
+        self.query_count += 1
+        self.sql_time += duration
+        if duration > self.slowest_query_time:
+            self.slowest_query = statement
+            self.slowest_query_time = duration
+
+    def elapsed(self):
+        """Returns the seconds since the request began."""
+        return time.perf_counter() - self.started_at
+
+    def server_timing(self):
+        """
+        Formats the timings as a Server-Timing header value.
+
+        Durations are given in milliseconds. The SQL statement text is
+        not included, only its duration.
+        """
+        metrics = [
+            'db;dur={:.2f};desc="{} queries"'.format(
+                self.sql_time * 1000, self.query_count),
+            'db-slowest;dur={:.2f}'.format(self.slowest_query_time * 1000),
+        ]
+        for name in sorted(self.timings):
+            metrics.append('{};dur={:.2f}'.format(
+                name, self.timings[name] * 1000))
+        metrics.append('total;dur={:.2f}'.format(self.elapsed() * 1000))
+        return ', '.join(metrics)
+
+
+def current_metrics():
+    """
+    Returns the RequestMetrics of the current request, or None outside
+    a request or in threads such as the chart rebuild worker.
+    """
+    if not has_app_context():
+        return None
+    return g.get('request_metrics')
+
+
+def record_query(statement, duration):
+    """Adds an executed SQL statement to the current request's metrics."""
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.add_query(statement, duration)
+
+
+@contextmanager
+def timed(name):
+    """
+    Adds the time spent in the with block to the named timing of the
+    current request.
+
+    Args:
+        name (str): The timing name, used as the Server-Timing metric.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.timings[name] += time.perf_counter() - start
+
+
+def percentile(values, pct):
+    """
+    Returns the nearest-rank percentile of a list of values.
+
+    Args:
+        values (list): The values, in any order.
+        pct (float): The percentile, between 0 and 100.
+
+    Returns:
+        float or None: The percentile, or None if values is empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class EndpointStats:
+    """
+    Keeps the most recent request samples of every endpoint and
+    summarises them for the admin dashboard.
+    """
+
+    def __init__(self, sample_size=SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._samples = {}
+        self._slowest = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, metrics, duration):
+        """
+        Stores the timings of a finished request.
+
+        Args:
+            endpoint (str): The Flask endpoint name.
+            metrics (RequestMetrics): The request's metrics.
+            duration (float): The total request time in seconds.
+        """
+        sample = (duration, metrics.query_count, metrics.sql_time,
+                  metrics.timings.get('render', 0.0),
+                  metrics.timings.get('plotly', 0.0))
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(
+                    maxlen=self.sample_size)
+            samples.append(sample)
+            slowest = self._slowest.get(endpoint)
+            if metrics.slowest_query is not None and (
+                    slowest is None
+                    or metrics.slowest_query_time > slowest[0]):
+                self._slowest[endpoint] = (metrics.slowest_query_time,
+                                           metrics.slowest_query)
+
+    def summary(self):
+        """
+        Returns one dictionary per endpoint, slowest p90 first.
+
+        Times are in milliseconds. Each dictionary holds the endpoint,
+        the number of samples, the p50, p90 and p99 total times, the
+        mean query count, SQL, render and Plotly times, and the slowest
+        SQL statement seen.
+        """
+        with self._lock:
+            snapshot = {endpoint: list(samples)
+                        for endpoint, samples in self._samples.items()}
+            slowest = dict(self._slowest)
+
+        rows = []
+        for endpoint, samples in snapshot.items():
+            durations = [sample[0] for sample in samples]
+            count = len(samples)
+            row = {'endpoint': endpoint, 'count': count}
+            for pct in PERCENTILES:
+                row['p{}'.format(pct)] = percentile(durations, pct) * 1000
+            row['queries'] = sum(sample[1] for sample in samples) / count
+            row['sql'] = sum(sample[2] for sample in samples) / count * 1000
+            row['render'] = sum(sample[3] for sample in samples) / count * 1000
+            row['plotly'] = sum(sample[4] for sample in samples) / count * 1000
+            slowest_time, slowest_query = slowest.get(endpoint, (0.0, None))
+            row['slowest_query'] = slowest_query
+            row['slowest_query_time'] = slowest_time * 1000
+            rows.append(row)
+        rows.sort(key=lambda row: row['p90'], reverse=True)
+        return rows
+
+    def clear(self):
+        """Removes every sample."""
+        with self._lock:
+            self._samples.clear()
+            self._slowest.clear()
+
+
+endpoint_stats = EndpointStats()
+
+
+def init_app(app):
+    """
+    Registers the request and template hooks that collect metrics.
+
+    Every response gets a Server-Timing header and its timings are
+    added to endpoint_stats.
+
+    Args:
+        app (Flask): The Flask application.
+    """
+    @app.before_request
+    def start_request_metrics():
+        g.request_metrics = RequestMetrics()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        metrics = current_metrics()
+        if metrics is None:
+            return response
+        response.headers['Server-Timing'] = metrics.server_timing()
+        if request.endpoint is not None and request.endpoint != 'static':
+            endpoint_stats.record(request.endpoint, metrics,
+                                  metrics.elapsed())
+        return response
+
+    def start_render(sender, template, context, **extra):
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics._render_starts.append(time.perf_counter())
+
+    def finish_render(sender, template, context, **extra):
+        metrics = current_metrics()
+        if metrics is not None and metrics._render_starts:
+            metrics.timings['render'] += (
+                time.perf_counter() - metrics._render_starts.pop())
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
@@ -1,11 +1,15 @@
 from flask import abort
 import pandas as pd
-import json
-import plotly
-import plotly_express as px
-import plotly.graph_objects as go
+import numpy as np
 from models.projects import ContractType, ProjectsData
+from models.aggregations import home_distributions
+from models.chart_specs import (
+    axis, bar_traces, color_sequence, column_values, figure, figure_json,
+    hierarchy_trace, legend, pie_trace, title_layout
+)
+from models.metrics import timed
 from datetime import datetime
+from functools import lru_cache
 
 
 def today_date():
@@ -23,94 +27,120 @@ def today_date():
     return formatted_date
 
 
-def plot_home_page_charts():
+def progress_bar_layout(title, y_title, legend_title, has_traces,
+                        paper_bgcolor):
+    """
+    Returns the layout of a home page progress bar chart.
+
+    Args:
+        title (str): The chart title.
+        y_title (str): The y axis title.
+        legend_title (str): The legend title.
+        has_traces (bool): Whether any project is plotted.
+        paper_bgcolor (str): The background color.
+
+    Returns:
+        dict: The layout, without the template.
+    """
+    return {
+        "xaxis": axis("y", "Contract Number", 17),
+        "yaxis": axis("x", y_title, 17),
+        "legend": legend(legend_title, 16, has_traces),
+        "title": title_layout(title, 25, 0.5, 0.93),
+        "barmode": "relative",
+        "margin": {"r": 50, "l": 50, "t": 80, "b": 50},
+        "paper_bgcolor": paper_bgcolor
+    }
+
+
+def progress_bar_chart(projects_data, progress_column, color_column,
+                       title, y_title, legend_title, paper_bgcolor):
+    """
+    Builds a bar chart of the progress of every project with a
+    progress value, colored by another column.
+
+    Args:
+        projects_data (list): A list of dictionaries of projects data.
+        progress_column (str): The progress column to plot.
+        color_column (str): The column the bars are colored by.
+        title (str): The chart title.
+        y_title (str): The y axis title.
+        legend_title (str): The legend title.
+        paper_bgcolor (str): The background color.
+
+    Returns:
+        dict: The figure spec.
+    """
+    progress = column_values(projects_data, progress_column)
+    plotted = [index for index, value in enumerate(progress)
+               if value is not None]
+    contract_numbers = column_values(projects_data, 'contract_number')
+    colors = column_values(projects_data, color_column)
+    data = bar_traces(
+        [contract_numbers[index] for index in plotted],
+        [progress[index] for index in plotted],
+        [colors[index] for index in plotted],
+        ('contract_number', progress_column, color_column),
+        color_sequence())
+    return figure(data, progress_bar_layout(
+        title, y_title, legend_title, bool(data), paper_bgcolor))
+
+
+def distribution_layout(title, font_size, title_y, margin, paper_bgcolor):
+    """Returns the layout of a home page distribution chart."""
+    return {
+        "legend": {"tracegroupgap": 0},
+        "title": title_layout(title, font_size, 0.5, title_y),
+        "margin": margin,
+        "paper_bgcolor": paper_bgcolor
+    }
+
+
+def plot_home_page_charts(projects_data=None, distributions=None):
     """
     Generates and returns JSON representations of
     various plots for projects data
 
+    The progress bar charts plot every project. The distribution charts
+    by year, status and project manager are built from counts computed
+    in the database. The charts are built as plain figure specs, which
+    serialise to the same JSON as the plotly_express figures they
+    replace.
+
+    Args:
+        projects_data (list, optional): The projects data to plot.
+        Defaults to ProjectsData.projects_data_to_dict_list().
+        distributions (dict, optional): The project counts to plot.
+        Defaults to home_distributions().
+
     Returns:
     graph1JSON (str): JSON representation of the physical progress plot.
     graph2JSON (str): JSON representation of the reservoir levels plot.
     """
-    projects_data = ProjectsData.projects_data_to_dict_list()
-    df = pd.DataFrame(projects_data)
-
-    df_filtered_fig1 = df[df['physical_progress_percentage'].notnull()]
-
-    fig1 = px.bar(df_filtered_fig1, x='contract_number',
-                  y='physical_progress_percentage',
-                  color='project_manager',
-                  title="Physical Progress of Works")
-
-    fig1.update_layout(
-      legend_title_text='Project Managers',
-      title={
-          'x': 0.5,
-          'y': 0.93,
-          'font': {
-              'size': 25,
-              'family': 'Arial'
-          }
-      },
-      xaxis_title_text="Contract Number",
-      yaxis_title_text="Physical Progress (%)",
-      xaxis_title_font_size=17,
-      yaxis_title_font_size=17,
-      legend_title_font={'size': 16},
-      margin=dict(r=50, l=50, t=80, b=50),
-      paper_bgcolor='rgba(0, 0, 0, 0.1)'
-      )
-
-    df_filtered_fig2 = df[df['financial_progress_percentage'].notnull()]
-
-    fig2 = px.bar(df_filtered_fig2, x='contract_number',
-                  y='financial_progress_percentage',
-                  color='contract_type', title="Financial Progress of Works")
-    fig2.update_layout(
-      legend_title_text='Contract Type',
-      title={
-          'x': 0.5,
-          'y': 0.93,
-          'font': {
-              'size': 25,
-              'family': 'Arial'
-          }
-      },
-      xaxis_title_text="Contract Number",
-      yaxis_title_text="Financial Progress (%)",
-      xaxis_title_font_size=17,
-      yaxis_title_font_size=17,
-      legend_title_font={'size': 16},
-      margin=dict(r=50, l=50, t=80, b=50),
-      paper_bgcolor='rgba(47, 182, 182, 0.2)'
-      )
-
-    projects_by_year = (
-      df.groupby("year")
-      .size()
-      .reset_index(name="number_of_projects")
-      )
-
-    fig3 = px.pie(projects_by_year, values='number_of_projects', names='year',
-                  title='Distribution of Projects by Year')
-
-    fig3.update_layout(
-      title={
-          'x': 0.5,
-          'y': 0.95,
-          'font': {
-              'size': 25,
-              'family': 'Arial'
-          }
-      },
-      margin=dict(t=60, b=20),
-      paper_bgcolor='rgba(0, 0, 0, 0.1)'
-      )
-
-    projects_by_status = (
-      df.groupby('project_status')
-      .size().reset_index(name='number_of_projects')
-      )
+    if projects_data is None:
+        projects_data = ProjectsData.projects_data_to_dict_list()
+    if distributions is None:
+        distributions = home_distributions()
+
+    fig1 = progress_bar_chart(
+        projects_data, 'physical_progress_percentage', 'project_manager',
+        "Physical Progress of Works", "Physical Progress (%)",
+        'Project Managers', 'rgba(0, 0, 0, 0.1)')
+
+    fig2 = progress_bar_chart(
+        projects_data, 'financial_progress_percentage', 'contract_type',
+        "Financial Progress of Works", "Financial Progress (%)",
+        'Contract Type', 'rgba(47, 182, 182, 0.2)')
+
+    projects_by_year = sorted(distributions['by_year'],
+                              key=lambda row: row['year'])
+
+    fig3 = figure(
+        [pie_trace(column_values(projects_by_year, 'year'),
+                   column_values(projects_by_year, 'number_of_projects'),
+                   ('year', 'number_of_projects'))],
+        distribution_layout('Distribution of Projects by Year', 25, 0.95,
+                            {"t": 60, "b": 20}, 'rgba(0, 0, 0, 0.1)'))
 
     color_map = {
         'Completed': '#109618',
@@ -120,125 +150,194 @@ def plot_home_page_charts():
         'Yet to start': 'rgb(255, 166, 71)'
     }
 
-    fig4 = px.treemap(projects_by_status,
-                      path=['project_status'],
-                      values='number_of_projects',
-                      color='project_status',
-                      color_discrete_map=color_map,
-                      title='Distribution of Projects by Status')
-
-    fig4.update_layout(
-      title={
-          'x': 0.5,
-          'y': 0.93,
-          'font': {
-              'size': 22.5,
-              'family': 'Arial'
-          }
-      },
-      margin=dict(r=5, l=5, t=60, b=60),
-      paper_bgcolor='rgba(47, 182, 182, 0.2)'
-      )
-
-    projects_by_manager = df['project_manager'].value_counts().reset_index()
-    projects_by_manager.columns = ['project_manager', 'number_of_projects']
-
-    fig5 = px.sunburst(projects_by_manager, path=['project_manager'],
-                       values='number_of_projects',
-                       title='Distribution of Projects by Project Managers')
-
-    fig5.update_layout(
-      title={
-          'x': 0.5,
-          'y': 0.95,
-          'font': {
-              'size': 22,
-              'family': 'Arial'
-          }
-      },
-      margin=dict(t=60, b=20),
-      paper_bgcolor='rgba(0, 0, 0, 0.1)'
-      )
-
-    graph1JSON = json.dumps(fig1, cls=plotly.utils.PlotlyJSONEncoder)
-    graph2JSON = json.dumps(fig2, cls=plotly.utils.PlotlyJSONEncoder)
-    graph3JSON = json.dumps(fig3, cls=plotly.utils.PlotlyJSONEncoder)
-    graph4JSON = json.dumps(fig4, cls=plotly.utils.PlotlyJSONEncoder)
-    graph5JSON = json.dumps(fig5, cls=plotly.utils.PlotlyJSONEncoder)
+    fig4 = figure(
+        [hierarchy_trace(
+            'treemap',
+            column_values(distributions['by_status'], 'project_status'),
+            column_values(distributions['by_status'], 'number_of_projects'),
+            ('project_status', 'number_of_projects'),
+            color_sequence(), color_map)],
+        distribution_layout('Distribution of Projects by Status', 22.5,
+                            0.93, {"r": 5, "l": 5, "t": 60, "b": 60},
+                            'rgba(47, 182, 182, 0.2)'))
+
+    fig5 = figure(
+        [hierarchy_trace(
+            'sunburst',
+            column_values(distributions['by_manager'], 'project_manager'),
+            column_values(distributions['by_manager'], 'number_of_projects'),
+            ('project_manager', 'number_of_projects'))],
+        distribution_layout('Distribution of Projects by Project Managers',
+                            22, 0.95, {"t": 60, "b": 20},
+                            'rgba(0, 0, 0, 0.1)'))
+
+    with timed('plotly'):
+        graph1JSON = figure_json(fig1)
+        graph2JSON = figure_json(fig2)
+        graph3JSON = figure_json(fig3)
+        graph4JSON = figure_json(fig4)
+        graph5JSON = figure_json(fig5)
 
     return graph1JSON, graph2JSON, graph3JSON, graph4JSON, graph5JSON
 
 
-def plot_servicing_page_charts():
+SERVICING_PROGRESS_COLUMNS = {
+    "Water": "water_progress",
+    "Sewer": "sewer_progress",
+    "Roads": "roads_progress",
+    "Storm Drainage": "storm_drainage_progress",
+    "Public Lighting": "public_lighting_progress",
+    "Total Progress": "physical_progress_percentage",
+}
+
+SERVICING_COLORS = ['royalblue', 'goldenrod', 'grey',
+                    'green', 'orange', 'red']
+
+SERVICING_BG_COLORS = ['rgba(0, 0, 0, 0.1)', 'rgba(47, 182, 182, 0.2)']
+
+
+@lru_cache(maxsize=2)
+def servicing_chart_template(has_title=True):
     """
-    Generates a list of JSON representations of bar charts
-    displaying project progress with colors.
+    Builds the shared servicing chart figure spec once.
+
+    Every servicing chart has the same six bars, colors and layout. The
+    per-project values, title, axis title and background are filled in
+    by build_servicing_charts.
+
+    Args:
+        has_title (bool): Whether the chart has a title. plotly_express
+        adds a top margin to untitled charts, which is kept so that the
+        charts look the same. Defaults to True.
+
+    Returns:
+        dict: The figure spec.
+    """
+    progress_types = list(SERVICING_PROGRESS_COLUMNS)
+    data = bar_traces(progress_types, [0] * len(progress_types),
+                      progress_types,
+                      ("Progress Type", "Progress Percentage", "color"),
+                      SERVICING_COLORS)
+    layout = {
+        "xaxis": axis("y", "", 17),
+        "yaxis": axis("x", "Progress Percentage(%)", 17),
+        "legend": legend("Progress Type", 16),
+    }
+    # The keys are in the order plotly_express gives them.
+    title = title_layout("title" if has_title else None, 20, 0.5, 0.9)
+    if has_title:
+        layout.update(title=title, barmode="relative")
+    else:
+        layout.update(margin={"t": 60}, barmode="relative", title=title)
+    layout["bargap"] = 0.6
+    layout["paper_bgcolor"] = SERVICING_BG_COLORS[0]
+    return figure(data, layout)
+
+
+def servicing_progress_frame(servicing_data):
+    """
+    Reads the six progress columns of every servicing contract into
+    one columnar frame.
+
+    Args:
+        servicing_data (list): A list of dictionaries of projects data.
+
+    Returns:
+        tuple: A list of per-project progress value lists, in the order
+        of SERVICING_PROGRESS_COLUMNS with None for missing values, and
+        the frame with the contract name, contractor and link columns.
+    """
+    columns = list(SERVICING_PROGRESS_COLUMNS.values())
+    frame = pd.DataFrame(servicing_data,
+                         columns=columns + ["contract_name",
+                                            "contractor", "link"])
+    values = frame[columns].astype(float).to_numpy()
+    progress = np.where(np.isnan(values), None, values).tolist()
+    return progress, frame
+
+
+def build_servicing_charts(servicing_data, first_index=0):
+    """
+    Builds the JSON bar charts for a list of servicing contracts.
+
+    The progress values of all contracts are read in one vectorised
+    pass and each chart is derived from the shared
+    servicing_chart_template.
+
+    Args:
+        servicing_data (list): A list of dictionaries of projects data.
+        first_index (int): The position of the first contract on the
+        Servicing page, which picks its background color. Defaults to 0.
 
     Returns:
         list: A list of JSON strings representing the Plotly charts,
         one for each project.
     """
-
-    servicing_data = ContractType.contract_type_data_dict(1)
     servicing_charts = []
 
     if not servicing_data:
         return servicing_charts
 
-    bg_colors = ['rgba(0, 0, 0, 0.1)', 'rgba(47, 182, 182, 0.2)']
-    color_index = 0
-
-    for project_data in servicing_data:
-        contract_name = project_data.get("contract_name")
-        contractor = project_data.get("contractor")
-        link = project_data.get("link")
-        progress_data = {
-          "Progress Type": [
-            "Water", "Sewer", "Roads", "Storm Drainage",
-            "Public Lighting", "Total Progress"
-          ],
-          "Progress Percentage": [
-            project_data["water_progress"],
-            project_data["sewer_progress"],
-            project_data["roads_progress"],
-            project_data["storm_drainage_progress"],
-            project_data["public_lighting_progress"],
-            project_data["physical_progress_percentage"]
-          ]
-        }
-
-        color_list = ['royalblue', 'goldenrod', 'grey',
-                      'green', 'orange', 'red']
-
-        fig = px.bar(progress_data, x="Progress Type", y="Progress Percentage",
-                     title=contract_name, color=progress_data["Progress Type"],
-                     color_discrete_sequence=color_list)
-        fig.update_layout(
-          legend_title="Progress Type",
-          bargap=0.6,
-          title={
-            'text': contract_name,
-            'x': 0.5,
-            'y': 0.9,
-            'font': {
-              'size': 20,
-              'family': 'Arial'
-            }
-          },
-          xaxis_title_text=(
-            "Contractor - {} -- <a href='{}'>Link to Google Drive Folder</a>"
-            .format(contractor, link)
-          ),
-          yaxis_title_text="Progress Percentage(%)",
-          xaxis_title_font_size=17,
-          yaxis_title_font_size=17,
-          legend_title_font={'size': 16},
-          paper_bgcolor=bg_colors[color_index]
+    progress, frame = servicing_progress_frame(servicing_data)
+
+    x_titles = [
+        "Contractor - {} -- <a href='{}'>Link to Google Drive Folder</a>"
+        .format(contractor, link)
+        for contractor, link in zip(frame["contractor"], frame["link"])
+    ]
+
+    for index, (values, contract_name, x_title) in enumerate(
+            zip(progress, frame["contract_name"], x_titles), first_index):
+        template = servicing_chart_template(contract_name is not None)
+        layout = template["layout"]
+        fig = figure(
+            [dict(trace, y=[value])
+             for trace, value in zip(template["data"], values)],
+            dict(
+                layout,
+                title=(dict(layout["title"], text=contract_name)
+                       if contract_name is not None else layout["title"]),
+                xaxis=dict(layout["xaxis"],
+                           title=dict(layout["xaxis"]["title"],
+                                      text=x_title)),
+                paper_bgcolor=SERVICING_BG_COLORS[
+                    index % len(SERVICING_BG_COLORS)]
+            )
         )
 
-        color_index = (color_index + 1) % len(bg_colors)
-
-        graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        with timed('plotly'):
+            graphJSON = figure_json(fig)
         servicing_charts.append(graphJSON)
 
     return servicing_charts
+
+
+def plot_servicing_page_charts():
+    """
+    Generates a list of JSON representations of bar charts
+    displaying project progress with colors.
+
+    Returns:
+        list: A list of JSON strings representing the Plotly charts,
+        one for each project.
+    """
+    servicing_data = ContractType.contract_type_data_dict(1)
+    return build_servicing_charts(servicing_data)
+
+
+def find_servicing_project(project_id):
+    """
+    Finds a servicing contract and its position on the Servicing page.
+
+    Args:
+        project_id (int): The id of the project.
+
+    Returns:
+        tuple: The position and the dictionary of projects data, or
+        (None, None) if the project is not a servicing contract.
+    """
+    servicing_data = ContractType.contract_type_data_dict(1)
+    for index, project_data in enumerate(servicing_data):
+        if project_data["id"] == project_id:
+            return index, project_data
+    return None, None
@@ -0,0 +1,253 @@
+""" Progress curves over time, read from the progress snapshots """
+from sqlalchemy import select
+from models.projects import ProjectProgressSnapshot, Section
+from datetime import timedelta
+from decimal import Decimal
+
+MAX_POINTS = 120
+MAX_POINTS_LIMIT = 1000
+MAX_PROJECTS = 100
+
+VALUE_COLUMNS = ('physical_progress_percentage',
+                 'financial_progress_percentage',
+                 'total_certified_interim_payments_to_date')
+
+
+def check_range(start, end, max_points):
+    """
+    Validates the arguments of a curve query.
+
+    Raises:
+        ValueError: If start is after end or max_points is out of range.
+    """
+    if start > end:
+        raise ValueError("start must not be after end")
+    if not 2 <= max_points <= MAX_POINTS_LIMIT:
+        raise ValueError(
+            f"max_points must be between 2 and {MAX_POINTS_LIMIT}")
+
+
+def sample_dates(change_dates, start, end, max_points):
+    """
+    Returns the dates a curve is sampled at.
+
+    The start date and every date with a change are kept when there
+    are at most max_points of them. Longer ranges are downsampled to
+    max_points evenly spaced dates from start to end, each showing the
+    values as of that date.
+
+    Args:
+        change_dates (iterable): The dates of the snapshots in range.
+        start (date): The first date.
+        end (date): The last date.
+        max_points (int): The largest number of dates to return.
+
+    Returns:
+        list: The dates, in order.
+    """
+    dates = sorted({start, *change_dates})
+    if len(dates) <= max_points:
+        return dates
+    days = (end - start).days
+    return sorted({
+        start + timedelta(days=round(days * index / (max_points - 1)))
+        for index in range(max_points)
+    })
+
+
+def load_snapshots(start, end, project_ids=None):
+    """
+    Reads the snapshots a curve from start to end needs: the latest
+    snapshot of each project before start, and the snapshots in range.
+
+    Both queries are bounded by the date range or run on the primary
+    key index, so the history before start is not scanned.
+
+    Returns:
+        tuple: The snapshots before start and the snapshots in range,
+        ordered by date.
+    """
+    table = ProjectProgressSnapshot.__table__
+    carried = ProjectProgressSnapshot.latest(project_ids, start)
+    query = select(table).where(table.c.snapshot_date >= start,
+                                table.c.snapshot_date <= end)
+    if project_ids is not None:
+        query = query.where(table.c.project_id.in_(project_ids))
+    changes = ProjectProgressSnapshot.fetch_dicts(
+        query.order_by(table.c.snapshot_date, table.c.project_id))
+    return carried, changes
+
+
+def replay(carried, changes, dates):
+    """
+    Steps through the snapshots, yielding the latest snapshot of every
+    project as of each sample date.
+
+    Args:
+        carried (list): The snapshots before the first date.
+        changes (list): The snapshots in range, ordered by date.
+        dates (list): The sample dates, in order.
+
+    Yields:
+        tuple: The sample date, the dictionary of project id to its
+        latest snapshot, and the snapshots applied since the previous
+        sample date with the snapshots they replaced.
+    """
+    states = {row['project_id']: row for row in carried}
+    position = 0
+    for sample_date in dates:
+        applied = []
+        while (position < len(changes)
+               and changes[position]['snapshot_date'] <= sample_date):
+            row = changes[position]
+            applied.append((states.get(row['project_id']), row))
+            states[row['project_id']] = row
+            position += 1
+        yield sample_date, states, applied
+
+
+def project_progress_curves(project_ids, start, end, max_points=MAX_POINTS):
+    """
+    Returns the progress of projects over a date range.
+
+    Args:
+        project_ids (list): The project ids, at most MAX_PROJECTS.
+        start (date): The first date.
+        end (date): The last date.
+        max_points (int): The largest number of points per curve.
+        Defaults to MAX_POINTS.
+
+    Returns:
+        list: One dictionary per project, in the order of project_ids,
+        with the project_id, the dates and, for each date, the
+        physical_progress_percentage, financial_progress_percentage and
+        total_certified_interim_payments_to_date. A project's curve
+        starts at its first snapshot.
+
+    Raises:
+        ValueError: If the arguments are not valid.
+    """
+    check_range(start, end, max_points)
+    project_ids = list(dict.fromkeys(project_ids))
+    if not project_ids or len(project_ids) > MAX_PROJECTS:
+        raise ValueError(
+            f"Between 1 and {MAX_PROJECTS} project ids are required")
+
+    carried, changes = load_snapshots(start, end, project_ids)
+    dates = sample_dates((row['snapshot_date'] for row in changes),
+                         start, end, max_points)
+    curves = {project_id: {'project_id': project_id, 'dates': [],
+                           **{name: [] for name in VALUE_COLUMNS}}
+              for project_id in project_ids}
+    for sample_date, states, _ in replay(carried, changes, dates):
+        for project_id, curve in curves.items():
+            state = states.get(project_id)
+            if state is None:
+                continue
+            curve['dates'].append(sample_date.isoformat())
+            for name in VALUE_COLUMNS:
+                curve[name].append(state[name])
+    return list(curves.values())
+
+
+class SectionTotals:
+    """
+    The running totals of the projects of one section: their number,
+    certified payments, and the sums and counts of their progress.
+    """
+
+    def __init__(self):
+        self.number_of_projects = 0
+        self.certified_payments = Decimal(0)
+        self.progress_sums = {name: Decimal(0) for name in VALUE_COLUMNS[:2]}
+        self.progress_counts = {name: 0 for name in VALUE_COLUMNS[:2]}
+
+    def add(self, row, sign):
+        """Adds a project snapshot to the totals, or removes it."""
+        self.number_of_projects += sign
+        self.certified_payments += sign * (
+            row['total_certified_interim_payments_to_date'] or 0)
+        for name in self.progress_sums:
+            if row[name] is not None:
+                self.progress_sums[name] += sign * row[name]
+                self.progress_counts[name] += sign
+
+    def point(self):
+        """Returns the current totals and mean progress."""
+        point = {
+            'number_of_projects': self.number_of_projects,
+            'total_certified_interim_payments_to_date':
+                self.certified_payments,
+        }
+        for name, total in self.progress_sums.items():
+            count = self.progress_counts[name]
+            point[name] = round(total / count, 2) if count else None
+        return point
+
+
+def section_progress_curves(start, end, section_ids=None,
+                            max_points=MAX_POINTS):
+    """
+    Returns the progress of sections over a date range, for burn-up
+    charts.
+
+    A project counts towards the section it was in on each date. The
+    totals of every section are kept up to date as the snapshots are
+    replayed, so each sample costs the number of changes since the
+    previous one rather than the number of projects.
+
+    Args:
+        start (date): The first date.
+        end (date): The last date.
+        section_ids (list): The sections to return. Defaults to every
+        section with snapshots.
+        max_points (int): The largest number of points per curve.
+        Defaults to MAX_POINTS.
+
+    Returns:
+        list: One dictionary per section, ordered by section id, with
+        the section_id, section name, the dates and, for each date, the
+        number_of_projects, the summed
+        total_certified_interim_payments_to_date and the mean
+        physical_progress_percentage and financial_progress_percentage
+        of its projects.
+
+    Raises:
+        ValueError: If the arguments are not valid.
+    """
+    check_range(start, end, max_points)
+    carried, changes = load_snapshots(start, end)
+    dates = sample_dates((row['snapshot_date'] for row in changes),
+                         start, end, max_points)
+
+    totals = {}
+    for row in carried:
+        totals.setdefault(row['section_id'], SectionTotals()).add(row, 1)
+    for row in changes:
+        totals.setdefault(row['section_id'], SectionTotals())
+    wanted = sorted(
+        (section_id for section_id in totals if section_id is not None)
+        if section_ids is None else set(section_ids))
+
+    names = {row['id']: row['name'] for row in Section.fetch_dicts(
+        select(Section.id, Section.name).where(Section.id.in_(wanted)))}
+    curves = {section_id: {'section_id': section_id,
+                           'section': names.get(section_id), 'dates': [],
+                           'number_of_projects': [],
+                           **{name: [] for name in VALUE_COLUMNS}}
+              for section_id in wanted}
+
+    for sample_date, _, applied in replay(carried, changes, dates):
+        for old, new in applied:
+            if old is not None:
+                totals[old['section_id']].add(old, -1)
+            totals[new['section_id']].add(new, 1)
+        for section_id, curve in curves.items():
+            section_totals = totals.get(section_id)
+            if section_totals is None:
+                continue
+            point = section_totals.point()
+            curve['dates'].append(sample_date.isoformat())
+            for name, value in point.items():
+                curve[name].append(value)
+    return list(curves.values())
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Date, DECIMAL, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, Text, Date, DECIMAL, Boolean, ForeignKey, Index,
+    select, insert, update, func, or_, cast, case, bindparam
+)
 from sqlalchemy.orm import relationship
 from models.base import BaseModel
 from models.engine.database import session
+from models.cache import projects_cache, projects_changed
+from decimal import Decimal, InvalidOperation
+from datetime import date, timedelta
 
 
 class Section(BaseModel):
@@ -34,8 +40,8 @@ class ProjectManagers(BaseModel):
     @classmethod
     def project_managers_to_dict_list(cls, section_name=None):
         """
-        Convert SQLAlchemy query results into a list of dictionaries.
-        Exclude the _sa_instance_state attribute.
+        Select the project manager columns as plain rows and convert
+        them into a list of dictionaries.
 
         Args:
             section_name (str, optional): Name of the section to
@@ -45,16 +51,15 @@ class ProjectManagers(BaseModel):
             list: A list of dictionaries containing project managers.
         """
         try:
-            query_filter = (cls.section == section_name) if section_name else True
-            project_managers = session.query(cls).filter(query_filter).all()
+            query = cls.projection()
+            if section_name:
+                query = query.where(cls.section == section_name)
+            result_list = cls.fetch_dicts(query)
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
             return []
-        finally:
-            session.close()
 
-        result_list = [pm.to_dict() for pm in project_managers]
         return result_list
 
 
@@ -76,6 +81,10 @@ class ContractType(BaseModel):
         """
         Filters and returns project data for a specific contract type id.
 
+        The filter runs in the database on the
+        (contract_type_id, id) index, so only the rows of the
+        requested contract type are loaded.
+
         Args:
             contract_type_id: The contract type id to filter by.
 
@@ -87,22 +96,20 @@ class ContractType(BaseModel):
         if not isinstance(contract_type_id, int) or contract_type_id <= 0:
             raise ValueError("Invalid contract_type_id")
 
-        try:
-            data = ProjectsData.projects_data_to_dict_list()
-        except Exception as e:
-            print(f"Error retrieving data: {e}")
-            return []
-
-        filtered_data = [
-            row
-            for row in data
-            if row.get('contract_type_id') == contract_type_id
-        ]
-        return filtered_data
+        return ProjectsData.projects_data_to_dict_list(contract_type_id)
 
 
 class ProjectsData(BaseModel):
     __tablename__ = 'projects_data'
+    __table_args__ = (
+        Index('ix_projects_data_contract_type_id_id',
+              'contract_type_id', 'id'),
+        Index('ix_projects_data_contract_number', 'contract_number'),
+        Index('ix_projects_data_performance_guarantee_expiry_date',
+              'performance_guarantee_expiry_date'),
+        Index('ix_projects_data_advance_payment_guarantee_expiry_date',
+              'advance_payment_guarantee_expiry_date'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     contract_number = Column(String(50), nullable=False)
@@ -140,6 +147,35 @@ class ProjectsData(BaseModel):
     project_manager = relationship("ProjectManagers")
     section = relationship("Section")
 
+    # The columns of the home page table, which every user may read.
+    # Contract and guarantee values, tax clearance and links are only
+    # served to admins.
+    HOME_TABLE_COLUMNS = (
+        'id',
+        'contract_number',
+        'contract_name',
+        'project_manager',
+        'contractor',
+        'year',
+        'project_status',
+        'early_start_date',
+        'contract_duration_months',
+        'early_finish_date',
+        'extension_of_time',
+        'physical_progress_percentage',
+        'financial_progress_percentage',
+    )
+
+    PROGRESS_COLUMNS = (
+        'physical_progress_percentage',
+        'financial_progress_percentage',
+        'roads_progress',
+        'water_progress',
+        'sewer_progress',
+        'storm_drainage_progress',
+        'public_lighting_progress',
+    )
+
     def __init__(self, **kwargs):
         for key, value in kwargs.items():
             setattr(self, key, value)
@@ -151,8 +187,11 @@ class ProjectsData(BaseModel):
     @classmethod
     def projects_data_to_dict_list(cls, contract_type_id=None):
         """
-        Convert SQLAlchemy query results into a list of dictionaries.
-        Exclude the _sa_instance_state attribute.
+        Select the projects data columns and the joined names as plain
+        rows and convert them into a list of dictionaries.
+
+        Results are cached per contract_type_id in projects_cache until
+        they expire or a write invalidates them.
 
         Args:
             contract_type_id (int, optional): Filter results by contract_type_id.
@@ -164,34 +203,704 @@ class ProjectsData(BaseModel):
         """
         if contract_type_id and not isinstance(contract_type_id, int):
             raise ValueError("Invalid contract_type_id")
-        
+
+        cached = projects_cache.get(contract_type_id or None)
+        if cached is not None:
+            return list(cached)
+
         try:
-            query = (
-                session.query(cls)
-                .join(cls.contract_type)
-                .join(cls.project_manager)
-                .join(cls.section)
-            )
-            
+            query = cls.export_query()
+
             if contract_type_id:
-                query = query.filter(cls.contract_type_id == contract_type_id)
+                query = query.where(cls.contract_type_id == contract_type_id)
 
-            projects_data = query.all()
+            result_list = cls.fetch_dicts(query)
 
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
             return []
 
-        result_list = [
-        {
-            **row.to_dict(),
-            'contract_type': row.contract_type.name,
-            'project_manager': row.project_manager.name,
-            'section': row.section.name,
+        projects_cache.set(contract_type_id or None, result_list)
+        return list(result_list)
+
+    @classmethod
+    def table_columns(cls):
+        """
+        Returns the columns that can be selected, searched and ordered
+        in the projects data table, including the joined names.
+
+        Returns:
+            dict: A mapping of column name to column expression.
+        """
+        columns = {c.name: getattr(cls, c.name) for c in cls.__table__.columns}
+        columns['contract_type'] = ContractType.name
+        columns['project_manager'] = ProjectManagers.name
+        columns['section'] = Section.name
+        return columns
+
+    @classmethod
+    def join_related(cls, query):
+        """
+        Joins the contract type, project manager and section tables
+        onto a select statement over projects_data.
+
+        Args:
+            query (Select): The statement to extend.
+
+        Returns:
+            Select: The joined statement.
+        """
+        return (
+            query.select_from(cls)
+            .join(ContractType, cls.contract_type_id == ContractType.id)
+            .join(ProjectManagers,
+                  cls.project_manager_id == ProjectManagers.id)
+            .join(Section, cls.section_id == Section.id)
+        )
+
+    @classmethod
+    def export_query(cls):
+        """
+        Returns a select statement over every projects data column and
+        the joined names, ordered by id, for streaming exports.
+        """
+        return cls.join_related(cls.projection(
+            contract_type=ContractType.name,
+            project_manager=ProjectManagers.name,
+            section=Section.name,
+        )).order_by(cls.id)
+
+    @classmethod
+    def projects_data_table(cls, start=0, length=10, order_by='id',
+                            order_dir='asc', search=None,
+                            column_filters=None, after_id=None,
+                            columns=None, allowed_columns=None):
+        """
+        Returns one page of projects data for a server-side table.
+
+        Searching, filtering, ordering and paging all run in SQL.
+        When ordering by id, passing after_id pages with a keyset
+        condition on the primary key instead of an offset.
+
+        Args:
+            start (int): The number of rows to skip. Defaults to 0.
+            length (int): The number of rows to return. Defaults to 10.
+            order_by (str): The column to order by. Defaults to 'id'.
+            order_dir (str): 'asc' or 'desc'. Defaults to 'asc'.
+            search (str, optional): A value searched for in every
+            text column.
+            column_filters (dict, optional): A mapping of column name to
+            a value that column must contain.
+            after_id (int, optional): The last id of the previous page.
+            columns (list, optional): The column names to return.
+            Defaults to every allowed column.
+            allowed_columns (tuple, optional): The only columns that may
+            be returned, searched, filtered or ordered by. Defaults to
+            every column.
+
+        Returns:
+            tuple: The total number of rows, the number of rows after
+            filtering, and a list of dictionaries for the page.
+
+        Raises:
+            ValueError: If a column name or the order direction is invalid.
+        """
+        table_columns = cls.table_columns()
+        if allowed_columns is not None:
+            table_columns = {name: column
+                             for name, column in table_columns.items()
+                             if name in allowed_columns}
+        columns = columns or list(table_columns)
+        requested = set(columns) | set(column_filters or {}) | {order_by}
+        unknown = requested - set(table_columns)
+        if unknown:
+            raise ValueError(f"Invalid column: {', '.join(sorted(unknown))}")
+        if order_dir not in ('asc', 'desc'):
+            raise ValueError("Invalid order direction")
+
+        def contains(column, value):
+            if not isinstance(column.type, (String, Text)):
+                column = cast(column, String)
+            return column.contains(value, autoescape=True)
+
+        conditions = []
+        if search:
+            conditions.append(or_(*[
+                contains(column, search)
+                for column in table_columns.values()
+                if isinstance(column.type, (String, Text))
+            ]))
+        for name, value in (column_filters or {}).items():
+            if value:
+                conditions.append(contains(table_columns[name], value))
+
+        order_column = table_columns[order_by]
+        ordering = [order_column.desc() if order_dir == 'desc'
+                    else order_column.asc()]
+        if order_by != 'id':
+            ordering.append(cls.id.asc())
+
+        query = cls.join_related(select(
+            *[table_columns[name].label(name) for name in columns]
+        )).where(*conditions).order_by(*ordering).limit(length)
+
+        if after_id is not None and order_by == 'id':
+            query = query.where(cls.id < after_id if order_dir == 'desc'
+                                else cls.id > after_id)
+        else:
+            query = query.offset(start)
+
+        try:
+            records_total = session.execute(
+                cls.join_related(select(func.count()))).scalar()
+            records_filtered = records_total
+            if conditions:
+                records_filtered = session.execute(
+                    cls.join_related(select(func.count())).where(*conditions)
+                ).scalar()
+            rows = session.execute(query).mappings().all()
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return 0, 0, []
+
+        return records_total, records_filtered, [dict(row) for row in rows]
+
+    @classmethod
+    def parse_progress_change(cls, change):
+        """
+        Validates one change sent to update_progress.
+
+        Args:
+            change (dict): The project id and one or more progress
+            columns with their new percentage, or None to clear it.
+
+        Returns:
+            tuple: The project id and a dictionary of column to value.
+
+        Raises:
+            ValueError: If the id, a column name or a value is invalid.
+        """
+        if not isinstance(change, dict):
+            raise ValueError("A change must be an object")
+        project_id = change.get('id')
+        if isinstance(project_id, bool) or not isinstance(project_id, int):
+            raise ValueError("Invalid id")
+
+        values = {}
+        for name, value in change.items():
+            if name == 'id':
+                continue
+            if name not in cls.PROGRESS_COLUMNS:
+                raise ValueError(f"Invalid column: {name}")
+            if value is not None:
+                try:
+                    value = Decimal(str(value))
+                except InvalidOperation:
+                    raise ValueError(f"{name} is not a number")
+                if not value.is_finite():
+                    raise ValueError(f"{name} is not a number")
+                if not 0 <= value <= 100:
+                    raise ValueError(f"{name} must be between 0 and 100")
+                value = value.quantize(Decimal('0.01'))
+            values[name] = value
+        if not values:
+            raise ValueError("No progress columns given")
+        return project_id, values
+
+    @classmethod
+    def update_progress(cls, changes):
+        """
+        Updates the progress percentages of many projects at once.
+
+        All valid changes are applied in one transaction by a single
+        executemany UPDATE, together with the ProjectKpiSummary update
+        and the ProjectProgressSnapshot of the changed projects. Every
+        column changed anywhere in the batch is set with a CASE
+        expression, so rows that change different columns share one
+        statement and leave their other columns as they are. The
+        projects cache is invalidated once for the batch.
+
+        Args:
+            changes (list): Dictionaries holding a project id and the
+            progress columns to change, for example
+            {"id": 1, "water_progress": 50}. Later changes to the same
+            project win.
+
+        Returns:
+            list: One dictionary per change, in order, with the id, a
+            status of 'updated', 'invalid', 'not_found' or 'error', and
+            an error message unless the change was applied.
+        """
+        results = []
+        updates = {}
+        for change in changes:
+            try:
+                project_id, values = cls.parse_progress_change(change)
+            except ValueError as e:
+                results.append({
+                    'id': change.get('id') if isinstance(change, dict)
+                    else None,
+                    'status': 'invalid',
+                    'error': str(e)
+                })
+                continue
+            updates.setdefault(project_id, {}).update(values)
+            results.append({'id': project_id, 'status': 'updated'})
+
+        if not updates:
+            return results
+
+        table = cls.__table__
+        try:
+            existing = set(session.execute(
+                select(cls.id).where(cls.id.in_(list(updates)))
+            ).scalars())
+            columns = sorted({name for project_id, values in updates.items()
+                              if project_id in existing
+                              for name in values})
+            if columns:
+                changed = cls.id.in_(list(existing))
+                old_projects = ProjectKpiSummary.snapshot(changed)
+                statement = (
+                    update(table)
+                    .where(table.c.id == bindparam('project_id'))
+                    .values({
+                        name: case(
+                            (bindparam(f'set_{name}', type_=Boolean),
+                             bindparam(f'value_{name}',
+                                       type_=table.c[name].type)),
+                            else_=table.c[name])
+                        for name in columns
+                    })
+                )
+                params = []
+                for project_id, values in updates.items():
+                    if project_id not in existing:
+                        continue
+                    row = {'project_id': project_id}
+                    for name in columns:
+                        row[f'set_{name}'] = name in values
+                        row[f'value_{name}'] = values.get(name)
+                    params.append(row)
+                session.execute(statement, params)
+                ProjectKpiSummary.apply_changes(
+                    old_projects, ProjectKpiSummary.snapshot(changed))
+                ProjectProgressSnapshot.record(changed)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            for result in results:
+                if result['status'] == 'updated':
+                    result['status'] = 'error'
+                    result['error'] = 'The changes could not be saved'
+            return results
+
+        for result in results:
+            if result['status'] == 'updated' and result['id'] not in existing:
+                result['status'] = 'not_found'
+                result['error'] = 'No project with this id'
+        if columns:
+            projects_changed()
+        return results
+
+
+class ProjectKpiSummary(BaseModel):
+    """
+    Portfolio totals per section, contract type, project manager and
+    year, kept up to date by the projects write paths.
+
+    Every column besides the group keys is a sum, so a change to a
+    project is applied by adding its new contribution and subtracting
+    its old one. The mean physical and financial progress of a group is
+    weighted by contract value and stored as a weighted sum and the sum
+    of its weights; projects without a contract value or progress do not
+    count towards it.
+    """
+    __tablename__ = 'project_kpi_summary'
+    __table_args__ = (
+        Index('ix_project_kpi_summary_group', 'section_id',
+              'contract_type_id', 'project_manager_id', 'year'),
+    )
+
+    GROUP_COLUMNS = ('section_id', 'contract_type_id', 'project_manager_id',
+                     'year')
+    SUM_COLUMNS = ('number_of_projects', 'contract_value',
+                   'certified_payments', 'physical_progress_weighted',
+                   'physical_progress_weight', 'financial_progress_weighted',
+                   'financial_progress_weight')
+    GROUP_NAMES = {
+        'section': (Section, 'section_id'),
+        'contract_type': (ContractType, 'contract_type_id'),
+        'project_manager': (ProjectManagers, 'project_manager_id'),
+    }
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    section_id = Column(Integer)
+    contract_type_id = Column(Integer)
+    project_manager_id = Column(Integer)
+    year = Column(String(20))
+    number_of_projects = Column(Integer, nullable=False, default=0)
+    contract_value = Column(DECIMAL(24, 2), nullable=False, default=0)
+    certified_payments = Column(DECIMAL(24, 2), nullable=False, default=0)
+    physical_progress_weighted = Column(DECIMAL(34, 4), nullable=False,
+                                        default=0)
+    physical_progress_weight = Column(DECIMAL(24, 2), nullable=False,
+                                      default=0)
+    financial_progress_weighted = Column(DECIMAL(34, 4), nullable=False,
+                                         default=0)
+    financial_progress_weight = Column(DECIMAL(24, 2), nullable=False,
+                                       default=0)
+
+    @classmethod
+    def snapshot(cls, condition):
+        """
+        Selects the columns of the projects that feed the summary.
+
+        Call this before and after changing projects and pass both
+        results to apply_changes.
+
+        Args:
+            condition: A where clause on ProjectsData, such as
+            ProjectsData.id.in_(ids).
+
+        Returns:
+            list: One dictionary per matching project.
+        """
+        return ProjectsData.fetch_dicts(select(
+            ProjectsData.section_id, ProjectsData.contract_type_id,
+            ProjectsData.project_manager_id, ProjectsData.year,
+            ProjectsData.contract_value_including_ten_percent_contingency,
+            ProjectsData.total_certified_interim_payments_to_date,
+            ProjectsData.physical_progress_percentage,
+            ProjectsData.financial_progress_percentage
+        ).where(condition))
+
+    @classmethod
+    def contribution(cls, project):
+        """
+        Returns the group key of a project and the amounts it adds to
+        each sum column.
+        """
+        value = project['contract_value_including_ten_percent_contingency']
+        certified = project['total_certified_interim_payments_to_date']
+        physical = project['physical_progress_percentage']
+        financial = project['financial_progress_percentage']
+        amounts = {
+            'number_of_projects': 1,
+            'contract_value': Decimal(value or 0),
+            'certified_payments': Decimal(certified or 0),
+            'physical_progress_weighted': Decimal(0),
+            'physical_progress_weight': Decimal(0),
+            'financial_progress_weighted': Decimal(0),
+            'financial_progress_weight': Decimal(0),
         }
-        for row in projects_data
-        ]
+        if value is not None and physical is not None:
+            amounts['physical_progress_weighted'] = Decimal(physical) * value
+            amounts['physical_progress_weight'] = Decimal(value)
+        if value is not None and financial is not None:
+            amounts['financial_progress_weighted'] = Decimal(financial) * value
+            amounts['financial_progress_weight'] = Decimal(value)
+        key = tuple(project[name] for name in cls.GROUP_COLUMNS)
+        return key, amounts
+
+    @classmethod
+    def apply_changes(cls, old_projects, new_projects):
+        """
+        Updates the summary for projects that were added, changed or
+        removed, in the current transaction.
+
+        Only the groups whose totals change are written: one UPDATE
+        adding the difference, or an INSERT for a group seen for the
+        first time. The caller commits.
+
+        Args:
+            old_projects (list): snapshot of the projects before the
+            change; empty for new projects.
+            new_projects (list): snapshot of the same projects after the
+            change; empty for deleted projects.
+        """
+        deltas = {}
+        for projects, sign in ((new_projects, 1), (old_projects, -1)):
+            for project in projects:
+                key, amounts = cls.contribution(project)
+                delta = deltas.setdefault(
+                    key, dict.fromkeys(cls.SUM_COLUMNS, 0))
+                for name, amount in amounts.items():
+                    delta[name] += sign * amount
+
+        table = cls.__table__
+        for key, delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            conditions = [
+                table.c[name].is_(None) if value is None
+                else table.c[name] == value
+                for name, value in zip(cls.GROUP_COLUMNS, key)
+            ]
+            group_id = session.execute(
+                select(table.c.id).where(*conditions).limit(1)
+            ).scalar()
+            if group_id is None:
+                session.execute(insert(table).values(
+                    {**dict(zip(cls.GROUP_COLUMNS, key)), **delta}))
+            else:
+                session.execute(
+                    update(table).where(table.c.id == group_id).values({
+                        name: table.c[name] + amount
+                        for name, amount in delta.items() if amount
+                    }))
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Recomputes the whole summary from projects_data with one
+        INSERT ... SELECT ... GROUP BY.
+
+        Returns:
+            int: The number of groups, or None if the rebuild failed.
+        """
+        table = cls.__table__
+        value = ProjectsData.contract_value_including_ten_percent_contingency
+
+        def weighted(progress):
+            weights = case((progress.isnot(None), value))
+            return (func.coalesce(func.sum(progress * weights), 0),
+                    func.coalesce(func.sum(weights), 0))
+
+        physical_weighted, physical_weight = weighted(
+            ProjectsData.physical_progress_percentage)
+        financial_weighted, financial_weight = weighted(
+            ProjectsData.financial_progress_percentage)
+        groups = [getattr(ProjectsData, name) for name in cls.GROUP_COLUMNS]
+        query = select(
+            *groups,
+            func.count(),
+            func.coalesce(func.sum(value), 0),
+            func.coalesce(func.sum(
+                ProjectsData.total_certified_interim_payments_to_date), 0),
+            physical_weighted, physical_weight,
+            financial_weighted, financial_weight
+        ).group_by(*groups)
+
+        try:
+            session.execute(table.delete())
+            session.execute(table.insert().from_select(
+                list(cls.GROUP_COLUMNS) + list(cls.SUM_COLUMNS), query))
+            session.commit()
+            return session.execute(
+                select(func.count()).select_from(table)).scalar()
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return None
+
+    @classmethod
+    def summary(cls, group_by=('section',)):
+        """
+        Returns the portfolio totals grouped by the given dimensions.
+
+        The totals are read from the summary table, so the cost depends
+        on the number of groups, not the number of projects.
+
+        Args:
+            group_by (tuple): Any of 'section', 'contract_type',
+            'project_manager' and 'year'.
+
+        Returns:
+            list: One dictionary per group with the group names, the
+            number_of_projects, contract_value, certified_payments and
+            the value-weighted physical_progress and financial_progress.
+
+        Raises:
+            ValueError: If a dimension is unknown.
+        """
+        unknown = set(group_by) - set(cls.GROUP_NAMES) - {'year'}
+        if unknown:
+            raise ValueError(f"Invalid group: {', '.join(sorted(unknown))}")
+
+        table = cls.__table__
+        columns, groups, joins = [], [], []
+        for name in group_by:
+            if name == 'year':
+                columns.append(table.c.year.label('year'))
+                groups.append(table.c.year)
+                continue
+            model, id_column = cls.GROUP_NAMES[name]
+            columns.append(model.name.label(name))
+            groups.extend([table.c[id_column], model.name])
+            joins.append((model, model.id == table.c[id_column]))
+
+        query = select(*columns, *[
+            func.sum(table.c[name]).label(name) for name in cls.SUM_COLUMNS
+        ]).select_from(table)
+        for model, condition in joins:
+            query = query.outerjoin(model, condition)
+        query = query.group_by(*groups).order_by(*groups)
+
+        try:
+            rows = ProjectsData.fetch_dicts(query)
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return []
 
-        sorted_result_list = sorted(result_list, key=lambda x: x["id"])
-        return sorted_result_list
\ No newline at end of file
+        summary = []
+        for row in rows:
+            if not row['number_of_projects']:
+                continue
+            result = {name: row[name] for name in group_by}
+            result['number_of_projects'] = row['number_of_projects']
+            result['contract_value'] = row['contract_value']
+            result['certified_payments'] = row['certified_payments']
+            for progress in ('physical_progress', 'financial_progress'):
+                weight = row[f'{progress}_weight']
+                result[progress] = (
+                    round(Decimal(row[f'{progress}_weighted']) / weight, 2)
+                    if weight else None)
+            summary.append(result)
+        return summary
+
+
+class ProjectProgressSnapshot(BaseModel):
+    """
+    The history of the progress of every project, one row per project
+    and date.
+
+    Rows are only written when a project's progress, certified payments
+    or section differ from its previous snapshot, so a project's values
+    on any date are those of its latest snapshot on or before that
+    date. Rows of earlier dates are never changed.
+    """
+    __tablename__ = 'project_progress_snapshot'
+    __table_args__ = (
+        Index('ix_project_progress_snapshot_snapshot_date', 'snapshot_date'),
+    )
+
+    TRACKED_COLUMNS = ('section_id', 'physical_progress_percentage',
+                       'financial_progress_percentage',
+                       'total_certified_interim_payments_to_date')
+    CHUNK_SIZE = 1000
+
+    project_id = Column(Integer, primary_key=True, autoincrement=False)
+    snapshot_date = Column(Date, primary_key=True)
+    section_id = Column(Integer)
+    physical_progress_percentage = Column(DECIMAL(10, 2))
+    financial_progress_percentage = Column(DECIMAL(10, 2))
+    total_certified_interim_payments_to_date = Column(DECIMAL(20, 2))
+
+    @classmethod
+    def latest(cls, project_ids, before):
+        """
+        Selects the latest snapshot of each project before a date.
+
+        Args:
+            project_ids (list): The project ids, or None for every
+            project.
+            before (date): Only snapshots before this date are read.
+
+        Returns:
+            list: One dictionary per project that has such a snapshot.
+        """
+        table = cls.__table__
+        latest_dates = select(
+            table.c.project_id,
+            func.max(table.c.snapshot_date).label('snapshot_date')
+        ).where(table.c.snapshot_date < before)
+        if project_ids is not None:
+            latest_dates = latest_dates.where(
+                table.c.project_id.in_(project_ids))
+        latest_dates = latest_dates.group_by(table.c.project_id).subquery()
+        return cls.fetch_dicts(select(table).join(
+            latest_dates,
+            (table.c.project_id == latest_dates.c.project_id)
+            & (table.c.snapshot_date == latest_dates.c.snapshot_date)))
+
+    @classmethod
+    def record(cls, condition=None, snapshot_date=None):
+        """
+        Snapshots the current progress of projects, in the current
+        transaction.
+
+        Projects whose values are those of their latest snapshot are
+        skipped. A project already snapshotted on snapshot_date has
+        that row replaced, so the last values of a day are kept. The
+        rows are written with executemany statements of CHUNK_SIZE
+        rows. The caller commits.
+
+        Args:
+            condition: A where clause on ProjectsData selecting the
+            projects, or None for every project.
+            snapshot_date (date): The date of the snapshot. Defaults to
+            today.
+
+        Returns:
+            int: The number of projects snapshotted.
+        """
+        snapshot_date = snapshot_date or date.today()
+        query = select(ProjectsData.id.label('project_id'), *[
+            getattr(ProjectsData, name) for name in cls.TRACKED_COLUMNS])
+        if condition is not None:
+            query = query.where(condition)
+        projects = ProjectsData.fetch_dicts(query)
+        if not projects:
+            return 0
+
+        project_ids = ([project['project_id'] for project in projects]
+                       if condition is not None else None)
+        previous = {row['project_id']: row for row in cls.latest(
+            project_ids, snapshot_date + timedelta(days=1))}
+
+        new_rows, changed_rows = [], []
+        for project in projects:
+            row = previous.get(project['project_id'])
+            if row is not None and all(
+                    row[name] == project[name]
+                    for name in cls.TRACKED_COLUMNS):
+                continue
+            project['snapshot_date'] = snapshot_date
+            if row is not None and row['snapshot_date'] == snapshot_date:
+                changed_rows.append(project)
+            else:
+                new_rows.append(project)
+
+        table = cls.__table__
+        for start in range(0, len(new_rows), cls.CHUNK_SIZE):
+            session.execute(insert(table),
+                            new_rows[start:start + cls.CHUNK_SIZE])
+        if changed_rows:
+            statement = update(table).where(
+                table.c.project_id == bindparam('match_project_id'),
+                table.c.snapshot_date == snapshot_date
+            ).values({name: bindparam(name) for name in cls.TRACKED_COLUMNS})
+            for start in range(0, len(changed_rows), cls.CHUNK_SIZE):
+                session.execute(statement, [
+                    {'match_project_id': row['project_id'],
+                     **{name: row[name] for name in cls.TRACKED_COLUMNS}}
+                    for row in changed_rows[start:start + cls.CHUNK_SIZE]
+                ])
+        return len(new_rows) + len(changed_rows)
+
+    @classmethod
+    def capture(cls, snapshot_date=None):
+        """
+        Snapshots the progress of every project and commits.
+
+        Args:
+            snapshot_date (date): The date of the snapshot. Defaults to
+            today.
+
+        Returns:
+            int: The number of projects snapshotted, or None if the
+            snapshot failed.
+        """
+        try:
+            count = cls.record(snapshot_date=snapshot_date)
+            session.commit()
+            return count
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return None
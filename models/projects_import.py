@@ -0,0 +1,496 @@
+""" Bulk import of projects data from CSV and Excel files """
+from sqlalchemy import (
+    Integer, String, Date, DECIMAL, insert, update, select, bindparam
+)
+from models.engine.database import session
+from models.cache import projects_changed
+from models.projects import (
+    ContractType, ProjectManagers, ProjectsData, ProjectKpiSummary,
+    ProjectProgressSnapshot, Section
+)
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+import csv
+import io
+import os
+import zipfile
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+
+# Columns holding a name that is looked up to fill in an id column.
+NAME_COLUMNS = {
+    'contract_type': ('contract_type_id', ContractType),
+    'project_manager': ('project_manager_id', ProjectManagers),
+    'section': ('section_id', Section),
+}
+
+# Columns without which a new project would not be shown on the
+# dashboard, which joins projects to these tables.
+REQUIRED_FOR_NEW_PROJECTS = ('contract_type_id', 'project_manager_id',
+                             'section_id')
+
+# Columns that may appear in a file, for example one produced by the
+# export endpoint, but are not imported.
+IGNORED_COLUMNS = {'id'}
+
+
+class RowError(ValueError):
+    """Raised when a value in an imported row is not valid."""
+
+
+def read_csv_rows(stream):
+    """
+    Yields the rows of a CSV file one at a time.
+
+    Args:
+        stream: A binary file object.
+
+    Yields:
+        tuple: The header first, then every data row.
+
+    Raises:
+        ValueError: If the file is not valid UTF-8 CSV.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.reader(text):
+            yield tuple(row)
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ValueError("The file is not a valid UTF-8 CSV file: {}".format(
+            e)) from e
+
+
+def read_xlsx_rows(stream):
+    """
+    Yields the rows of the first worksheet of an Excel workbook one at a
+    time. The workbook is opened in read-only mode, so rows are parsed as
+    they are read instead of loading the whole sheet.
+
+    Args:
+        stream: A seekable binary file object.
+
+    Yields:
+        tuple: The header first, then every data row.
+
+    Raises:
+        ValueError: If the file is not a valid Excel workbook.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+    from xml.etree.ElementTree import ParseError
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                yield row
+        finally:
+            workbook.close()
+    except (zipfile.BadZipFile, InvalidFileException, KeyError,
+            ParseError) as e:
+        raise ValueError("The file is not a valid Excel workbook: {}".format(
+            e)) from e
+
+
+def read_rows(stream, filename):
+    """
+    Returns a row iterator for an uploaded file, chosen by its extension.
+
+    Raises:
+        ValueError: If the file is not a .csv or .xlsx file.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return read_csv_rows(stream)
+    if extension == '.xlsx':
+        return read_xlsx_rows(stream)
+    raise ValueError("Only .csv and .xlsx files can be imported")
+
+
+def coerce_value(column, value):
+    """
+    Converts a value read from a file to the type of a ProjectsData
+    column.
+
+    Empty cells become None.
+
+    Args:
+        column (Column): The column the value belongs to.
+        value: The value read from the file.
+
+    Returns:
+        The converted value.
+
+    Raises:
+        RowError: If the value does not fit the column.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+    if value is None or value == '':
+        if not column.nullable:
+            raise RowError("{} is required".format(column.name))
+        return None
+
+    column_type = column.type
+    if isinstance(column_type, Date):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(str(value), date_format).date()
+            except ValueError:
+                pass
+        raise RowError("{} is not a date: {!r}".format(column.name, value))
+
+    if isinstance(column_type, DECIMAL):
+        try:
+            number = Decimal(str(value).replace(',', ''))
+        except InvalidOperation:
+            raise RowError("{} is not a number: {!r}".format(
+                column.name, value))
+        if not number.is_finite():
+            raise RowError("{} is not a number: {!r}".format(
+                column.name, value))
+        limit = Decimal(10) ** (column_type.precision - column_type.scale)
+        try:
+            # Quantizing fails when the digits exceed the decimal context
+            # precision, which is also too large for the column.
+            number = number.quantize(Decimal(1).scaleb(-column_type.scale))
+        except InvalidOperation:
+            number = limit
+        if abs(number) >= limit:
+            raise RowError("{} is too large: {}".format(column.name, value))
+        return number
+
+    if isinstance(column_type, Integer):
+        try:
+            number = Decimal(str(value))
+        except InvalidOperation:
+            raise RowError("{} is not a whole number: {!r}".format(
+                column.name, value))
+        if number != number.to_integral_value():
+            raise RowError("{} is not a whole number: {!r}".format(
+                column.name, value))
+        return int(number)
+
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value)
+    if (isinstance(column_type, String) and column_type.length
+            and len(value) > column_type.length):
+        raise RowError("{} is longer than {} characters".format(
+            column.name, column_type.length))
+    return value
+
+
+def lookup_maps():
+    """
+    Loads the names of the contract types, project managers and sections.
+
+    Returns:
+        dict: For each name column, a dictionary of lower-cased name to
+        id. Names shared by several rows map to None.
+    """
+    maps = {}
+    for name_column, (_, model) in NAME_COLUMNS.items():
+        names = {}
+        for row in session.execute(select(model.id, model.name)):
+            if row.name is None:
+                continue
+            key = row.name.strip().lower()
+            names[key] = None if key in names else row.id
+        maps[name_column] = names
+    return maps
+
+
+class ProjectsImport:
+    """
+    Imports rows of projects data, inserting new contracts and updating
+    existing ones matched by contract number.
+
+    Rows are validated against the ProjectsData columns as they are read
+    and written in chunks, each chunk in its own transaction with one
+    executemany INSERT and one executemany UPDATE. Invalid rows are
+    skipped and reported, so a corrected file can simply be imported
+    again.
+
+    Attributes:
+        inserted (int): The number of new projects.
+        updated (int): The number of updated projects.
+        error_count (int): The number of rows that were not imported.
+        errors (list): The first MAX_REPORTED_ERRORS row errors, as
+        dictionaries with the row number and the error message.
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.inserted = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.table = ProjectsData.__table__
+
+    def add_error(self, row_number, message):
+        """Records a row that could not be imported."""
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    def result(self):
+        """Returns the outcome of the import as a dictionary."""
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    def parse_header(self, header):
+        """
+        Maps the header of the file to table columns.
+
+        Returns:
+            list: For each file column, the table column, a name column
+            key from NAME_COLUMNS, or None if the column is ignored.
+
+        Raises:
+            ValueError: If a column is unknown or contract_number is
+            missing.
+        """
+        fields = []
+        unknown = []
+        for name in header:
+            name = (name or '').strip()
+            if name in IGNORED_COLUMNS or name == '':
+                fields.append(None)
+            elif name in NAME_COLUMNS:
+                fields.append(name)
+            elif name in self.table.columns:
+                fields.append(self.table.columns[name])
+            else:
+                unknown.append(name)
+        if unknown:
+            raise ValueError("Unknown columns: {}".format(
+                ', '.join(unknown)))
+        if 'contract_number' not in {
+                (name or '').strip() for name in header}:
+            raise ValueError("The contract_number column is required")
+        return fields
+
+    def parse_row(self, fields, values, names):
+        """
+        Validates one row and returns it as a dictionary of column name
+        to value.
+
+        Raises:
+            RowError: If a value is not valid.
+        """
+        record = {}
+        looked_up = {}
+        values = list(values) + [None] * (len(fields) - len(values))
+        for field, value in zip(fields, values):
+            if field is None:
+                continue
+            if isinstance(field, str):
+                if isinstance(value, str):
+                    value = value.strip()
+                id_column = NAME_COLUMNS[field][0]
+                if value is None or value == '':
+                    # Every row of a file has the same keys, as the
+                    # executemany INSERT and UPDATE take their columns
+                    # from the first row.
+                    looked_up[id_column] = None
+                    continue
+                key = str(value).lower()
+                if key not in names[field]:
+                    raise RowError("Unknown {}: {!r}".format(
+                        field.replace('_', ' '), value))
+                if names[field][key] is None:
+                    raise RowError("More than one {} is named {!r}".format(
+                        field.replace('_', ' '), value))
+                looked_up[id_column] = names[field][key]
+            else:
+                record[field.name] = coerce_value(field, value)
+
+        for id_column, value in looked_up.items():
+            if value is None:
+                record.setdefault(id_column, None)
+                continue
+            if record.get(id_column) not in (None, value):
+                raise RowError("{} does not match its name".format(
+                    id_column))
+            record[id_column] = value
+        return record
+
+    def write_chunk(self, records, row_numbers):
+        """
+        Writes a chunk of validated rows, and the matching
+        ProjectKpiSummary changes and ProjectProgressSnapshot rows, in
+        one transaction.
+
+        New projects without a contract type, project manager or section
+        are skipped and reported.
+
+        Args:
+            records (dict): Rows by contract number; a contract number
+            that appears twice in the file keeps its last row.
+            row_numbers (dict): The file row number of each record.
+        """
+        numbers = list(records)
+        existing = set(session.execute(
+            select(self.table.c.contract_number)
+            .where(self.table.c.contract_number.in_(numbers))
+        ).scalars())
+
+        old_projects = ProjectKpiSummary.snapshot(
+            self.table.c.contract_number.in_(list(existing)))
+
+        new_rows, skipped = [], []
+        for number in numbers:
+            if number in existing:
+                continue
+            missing = [name[:-3].replace('_', ' ')
+                       for name in REQUIRED_FOR_NEW_PROJECTS
+                       if records[number].get(name) is None]
+            if missing:
+                skipped.append((row_numbers[number],
+                                "New projects need a {}".format(
+                                    ', '.join(missing))))
+            else:
+                new_rows.append(records[number])
+        changed_rows = [
+            dict(records[number], match_contract_number=number)
+            for number in numbers if number in existing
+        ]
+        if new_rows:
+            session.execute(insert(self.table), new_rows)
+        if changed_rows:
+            # The SET clause is taken from the keys of the rows.
+            session.execute(
+                update(self.table)
+                .where(self.table.c.contract_number
+                       == bindparam('match_contract_number')),
+                changed_rows
+            )
+        written = self.table.c.contract_number.in_(numbers)
+        ProjectKpiSummary.apply_changes(
+            old_projects, ProjectKpiSummary.snapshot(written))
+        ProjectProgressSnapshot.record(written)
+        session.commit()
+        self.inserted += len(new_rows)
+        self.updated += len(changed_rows)
+        for row_number, message in skipped:
+            self.add_error(row_number, message)
+
+    def flush(self, records, row_numbers):
+        """Writes a chunk, reporting its rows if the write fails."""
+        if not records:
+            return
+        try:
+            self.write_chunk(records, row_numbers)
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            for number in records:
+                self.add_error(row_numbers[number],
+                               "Could not be saved: {}".format(e))
+
+    def import_rows(self, rows, fields, names):
+        """
+        Imports the data rows of a file in chunks.
+
+        If the file cannot be read past some row, the rows read so far
+        are still imported and the unreadable row is reported as an
+        error.
+
+        Args:
+            rows (iterator): The data rows, after the header.
+            fields (list): The columns of the file, as from parse_header.
+            names (dict): The name to id maps, as from lookup_maps.
+        """
+        records, row_numbers = {}, {}
+        row_number = 1
+        try:
+            for row_number, values in enumerate(rows, 2):
+                if all(value is None or str(value).strip() == ''
+                       for value in values):
+                    continue
+                try:
+                    record = self.parse_row(fields, values, names)
+                except RowError as e:
+                    self.add_error(row_number, str(e))
+                    continue
+                number = record['contract_number']
+                records.pop(number, None)
+                records[number] = record
+                row_numbers[number] = row_number
+                if len(records) >= self.chunk_size:
+                    self.flush(records, row_numbers)
+                    records, row_numbers = {}, {}
+        except ValueError as e:
+            self.add_error(row_number + 1,
+                           "The rest of the file could not be read: "
+                           "{}".format(e))
+        self.flush(records, row_numbers)
+
+    def run(self, rows):
+        """
+        Imports the rows of a file.
+
+        The cache is invalidated whenever projects were written, even if
+        the import stops on an unexpected error.
+
+        Args:
+            rows (iterable): The header followed by the data rows.
+
+        Returns:
+            dict: The outcome of the import, as returned by result.
+
+        Raises:
+            ValueError: If the file is empty or its header is not valid.
+        """
+        rows = iter(rows)
+        try:
+            header = next(rows)
+        except StopIteration:
+            raise ValueError("The file is empty")
+        fields = self.parse_header(header)
+        names = lookup_maps()
+
+        try:
+            self.import_rows(rows, fields, names)
+        finally:
+            if self.inserted or self.updated:
+                projects_changed()
+        return self.result()
+
+
+def import_projects_data(stream, filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Imports projects data from an uploaded CSV or Excel file.
+
+    The first row holds column names: ProjectsData columns, plus
+    contract_type, project_manager and section, whose names are looked
+    up to fill in the matching id columns. Rows whose contract number
+    already exists update that project; other rows are inserted. Empty
+    cells are imported as empty values and columns missing from the file
+    are left unchanged on update.
+
+    Args:
+        stream: A binary file object.
+        filename (str): The file name, used to tell CSV from Excel.
+        chunk_size (int): The number of rows per transaction.
+
+    Returns:
+        dict: The number of inserted and updated projects and the rows
+        that could not be imported.
+
+    Raises:
+        ValueError: If the file type, or the header, is not valid, or
+        the file cannot be read at all.
+    """
+    return ProjectsImport(chunk_size).run(read_rows(stream, filename))
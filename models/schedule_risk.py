@@ -0,0 +1,309 @@
+""" Vectorised schedule-risk analysis of the projects portfolio """
+from sqlalchemy import select
+from models.engine.database import session
+from models.cache import projects_cache
+from models.projects import ProjectsData, ProjectManagers, Section
+from datetime import date
+import numpy as np
+
+SCHEDULE_RISK_KEY = 'schedule_risk'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 1000
+GUARANTEE_WARNING_DAYS = 30
+
+# Statuses of projects whose schedule is no longer tracked.
+CLOSED_STATUSES = ('Completed', 'Cancelled', 'Retendered')
+
+# The weights of the parts of the slippage score, which add up to 1:
+# the progress shortfall against elapsed time, the time past the planned
+# finish relative to the planned duration, and the extension of time
+# relative to the original duration.
+SLIPPAGE_WEIGHTS = {'behind': 0.6, 'overdue': 0.25, 'extended': 0.15}
+
+# The lowest slippage score of each risk level, from the highest level.
+RISK_LEVELS = (('high', 40.0), ('medium', 20.0), ('low', 0.0))
+
+DATE_COLUMNS = ('early_start_date', 'early_finish_date', 'extension_of_time',
+                'performance_guarantee_expiry_date',
+                'advance_payment_guarantee_expiry_date')
+NUMBER_COLUMNS = ('contract_duration_weeks', 'physical_progress_percentage')
+TEXT_COLUMNS = ('contract_number', 'contract_name', 'project_status',
+                'project_manager', 'section')
+
+
+def day_numbers(values):
+    """
+    Converts dates to day numbers in a float array, missing dates
+    becoming NaN, so that date arithmetic is plain float arithmetic.
+    """
+    return np.fromiter(
+        (np.nan if value is None else value.toordinal() for value in values),
+        dtype=float, count=len(values))
+
+
+def numbers(values):
+    """Converts numbers to a float array, missing numbers becoming NaN."""
+    return np.fromiter(
+        (np.nan if value is None else float(value) for value in values),
+        dtype=float, count=len(values))
+
+
+def load_schedule_columns():
+    """
+    Reads the schedule columns of every project in one query.
+
+    Projects are joined to their project manager and section like the
+    other dashboard views, so the same projects are analysed.
+
+    Returns:
+        dict: One array per column: the ids as integers, the dates as
+        day numbers, the durations and progress as floats, and the text
+        columns as object arrays.
+    """
+    query = ProjectsData.join_related(select(
+        ProjectsData.id,
+        *[getattr(ProjectsData, name)
+          for name in TEXT_COLUMNS[:3] + DATE_COLUMNS + NUMBER_COLUMNS],
+        ProjectManagers.name.label('project_manager'),
+        Section.name.label('section'),
+    )).order_by(ProjectsData.id)
+    # Executed on the connection, as Core, so that rows are not passed
+    # through the ORM loading machinery.
+    result = session.connection().execute(query)
+    names = list(result.keys())
+    rows = result.all()
+    values = dict(zip(names, zip(*rows))) if rows else {
+        name: () for name in names}
+
+    columns = {'id': np.fromiter(values['id'], dtype=np.int64,
+                                 count=len(rows))}
+    for name in DATE_COLUMNS:
+        columns[name] = day_numbers(values[name])
+    for name in NUMBER_COLUMNS:
+        columns[name] = numbers(values[name])
+    for name in TEXT_COLUMNS:
+        columns[name] = np.array(values[name], dtype=object)
+    return columns
+
+
+def analyse_schedules(columns, today):
+    """
+    Computes the schedule risk of every project at once.
+
+    The planned finish is the extension of time if one was granted,
+    otherwise the early finish date, otherwise the early start date
+    plus the contract duration. The expected progress is the share of
+    the planned duration elapsed by today, and the progress gap is the
+    expected minus the actual physical progress, positive when a
+    project is behind.
+
+    The slippage score, from 0 to 100, weighs the progress gap, the
+    time past the planned finish and the extension of time with
+    SLIPPAGE_WEIGHTS. Closed projects and projects that are complete
+    are not scored, nor are projects without a start date and planned
+    finish.
+
+    Args:
+        columns (dict): The arrays returned by load_schedule_columns.
+        today (date): The date to analyse the schedules at.
+
+    Returns:
+        dict: The columns, plus one array per computed measure. Day
+        counts and measures that cannot be computed are NaN.
+    """
+    today = float(today.toordinal())
+    start = columns['early_start_date']
+    weeks = columns['contract_duration_weeks']
+    actual = columns['physical_progress_percentage']
+
+    original_finish = np.where(np.isnan(columns['early_finish_date']),
+                               start + np.round(weeks * 7),
+                               columns['early_finish_date'])
+    extension = columns['extension_of_time']
+    planned_finish = np.where(np.isnan(extension), original_finish,
+                              extension)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        planned_days = planned_finish - start
+        original_days = original_finish - start
+        has_schedule = planned_days > 0
+        elapsed = np.clip((today - start) / planned_days, 0, 1)
+        expected = np.where(has_schedule, np.round(elapsed * 100, 2), np.nan)
+        gap = expected - actual
+        days_to_finish = planned_finish - today
+        extension_days = extension - original_finish
+
+        behind = np.clip(np.nan_to_num(gap), 0, 100)
+        overdue = np.clip(-days_to_finish / planned_days, 0, 1) * 100
+        extended = np.clip(extension_days / original_days, 0, 1) * 100
+        score = (SLIPPAGE_WEIGHTS['behind'] * behind
+                 + SLIPPAGE_WEIGHTS['overdue'] * np.nan_to_num(overdue)
+                 + SLIPPAGE_WEIGHTS['extended'] * np.nan_to_num(extended))
+
+    closed = (np.isin(columns['project_status'], CLOSED_STATUSES)
+              | (actual >= 100))
+    scored = has_schedule & ~closed
+    score = np.where(scored, np.round(score, 2), np.nan)
+
+    risk_level = np.full(len(score), 'unknown', dtype=object)
+    for level, threshold in reversed(RISK_LEVELS):
+        risk_level[scored & (score >= threshold)] = level
+    risk_level[closed] = 'closed'
+
+    return dict(
+        columns,
+        planned_finish=planned_finish,
+        expected_progress=expected,
+        progress_gap=np.round(gap, 2),
+        days_behind=np.round(gap / 100 * planned_days),
+        days_to_finish=days_to_finish,
+        extension_days=extension_days,
+        performance_guarantee_days_to_expiry=(
+            columns['performance_guarantee_expiry_date'] - today),
+        advance_payment_guarantee_days_to_expiry=(
+            columns['advance_payment_guarantee_expiry_date'] - today),
+        slippage_score=score,
+        risk_level=risk_level,
+        open=~closed,
+    )
+
+
+def risk_level_names():
+    """Returns the names of the risk levels, from the highest."""
+    return [level for level, _ in RISK_LEVELS] + ['unknown', 'closed']
+
+
+def guarantee_counts(days_to_expiry, open_projects):
+    """
+    Counts the guarantees of open projects that have expired or expire
+    within GUARANTEE_WARNING_DAYS.
+    """
+    with np.errstate(invalid='ignore'):
+        expired = open_projects & (days_to_expiry < 0)
+        expiring = (open_projects & (days_to_expiry >= 0)
+                    & (days_to_expiry <= GUARANTEE_WARNING_DAYS))
+    return {'expired': int(expired.sum()), 'expiring': int(expiring.sum())}
+
+
+def summarise(analysis):
+    """Returns the portfolio totals of an analysis."""
+    by_level = {level: int((analysis['risk_level'] == level).sum())
+                for level in risk_level_names()}
+
+    scored = ~np.isnan(analysis['slippage_score'])
+    with np.errstate(invalid='ignore'):
+        overdue = scored & (analysis['days_to_finish'] < 0)
+    gaps = analysis['progress_gap'][scored & ~np.isnan(
+        analysis['progress_gap'])]
+    return {
+        'number_of_projects': len(analysis['id']),
+        'by_risk_level': by_level,
+        'overdue': int(overdue.sum()),
+        'guarantee_warning_days': GUARANTEE_WARNING_DAYS,
+        'mean_progress_gap': round(float(gaps.mean()), 2) if len(gaps)
+        else None,
+        'performance_guarantees': guarantee_counts(
+            analysis['performance_guarantee_days_to_expiry'],
+            analysis['open']),
+        'advance_payment_guarantees': guarantee_counts(
+            analysis['advance_payment_guarantee_days_to_expiry'],
+            analysis['open']),
+    }
+
+
+def project_row(analysis, index):
+    """Returns the analysis of one project as a JSON-ready dictionary."""
+    def day_count(name):
+        value = analysis[name][index]
+        return None if np.isnan(value) else int(value)
+
+    def number(name):
+        value = analysis[name][index]
+        return None if np.isnan(value) else float(value)
+
+    planned_finish = analysis['planned_finish'][index]
+    row = {'id': int(analysis['id'][index])}
+    row.update({name: analysis[name][index] for name in TEXT_COLUMNS})
+    row.update({
+        'planned_finish': None if np.isnan(planned_finish)
+        else date.fromordinal(int(planned_finish)).isoformat(),
+        'expected_progress': number('expected_progress'),
+        'physical_progress_percentage': number(
+            'physical_progress_percentage'),
+        'progress_gap': number('progress_gap'),
+        'days_behind': day_count('days_behind'),
+        'days_to_finish': day_count('days_to_finish'),
+        'extension_days': day_count('extension_days'),
+        'performance_guarantee_days_to_expiry': day_count(
+            'performance_guarantee_days_to_expiry'),
+        'advance_payment_guarantee_days_to_expiry': day_count(
+            'advance_payment_guarantee_days_to_expiry'),
+        'slippage_score': number('slippage_score'),
+        'risk_level': analysis['risk_level'][index],
+    })
+    return row
+
+
+def schedule_analysis(today=None):
+    """
+    Returns the schedule analysis of the portfolio, computed once per
+    day and cached until projects data changes.
+
+    Args:
+        today (date): The date to analyse at. Defaults to today.
+
+    Returns:
+        dict: The arrays returned by analyse_schedules.
+    """
+    today = today or date.today()
+    key = (SCHEDULE_RISK_KEY, today.isoformat())
+    analysis = projects_cache.get(key)
+    if analysis is None:
+        analysis = analyse_schedules(load_schedule_columns(), today)
+        projects_cache.set(key, analysis)
+    return analysis
+
+
+def schedule_risk(today=None, limit=DEFAULT_LIMIT, risk_level=None):
+    """
+    Returns the portfolio schedule-risk totals and the projects with the
+    highest slippage scores.
+
+    Args:
+        today (date): The date to analyse at. Defaults to today.
+        limit (int): The number of projects to return, at most
+        MAX_LIMIT. Defaults to DEFAULT_LIMIT.
+        risk_level (str): Only return projects of this risk level.
+        Defaults to every scored project.
+
+    Returns:
+        dict: The as_of date, the summary returned by summarise, and
+        the projects ordered by slippage score, highest first.
+
+    Raises:
+        ValueError: If the limit or risk level is not valid.
+    """
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    levels = risk_level_names()
+    if risk_level is not None and risk_level not in levels:
+        raise ValueError("risk_level must be one of {}".format(
+            ', '.join(levels)))
+
+    today = today or date.today()
+    analysis = schedule_analysis(today)
+    score = analysis['slippage_score']
+    if risk_level is None:
+        selected = ~np.isnan(score)
+    else:
+        selected = analysis['risk_level'] == risk_level
+    indices = np.flatnonzero(selected)
+    # Highest score first, then lowest id; unscored projects last.
+    order = np.lexsort((analysis['id'][indices],
+                        -np.nan_to_num(score[indices], nan=-1)))
+    return {
+        'as_of': today.isoformat(),
+        'summary': summarise(analysis),
+        'projects': [project_row(analysis, index)
+                     for index in indices[order[:limit]]],
+    }
@@ -1,17 +1,76 @@
-from sqlalchemy import Column, Integer, String, Text, Date, DECIMAL, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, Text, Date, DECIMAL, ForeignKey, Index, select,
+    update, bindparam, func, case, or_
+)
 from sqlalchemy.orm import relationship
 from models.projects import ProjectManagers
 from models.base import BaseModel
 from models.engine.database import session
+from datetime import date, datetime, timedelta
+import re
+
+# Formats of the free-text deadlines entered before deadline was a date.
+# Slashed dates are read day first, and month first only when they
+# cannot be read day first.
+DEADLINE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y',
+                    '%d.%m.%Y', '%Y/%m/%d', '%d %B %Y', '%d %b %Y',
+                    '%B %d %Y', '%b %d %Y')
+
+# Statuses of tasks that can no longer be overdue.
+DONE_STATUSES = ('Complete',)
+
+DUE_FILTERS = ('overdue', 'this_week')
+
+BACKFILL_CHUNK_SIZE = 500
+
+
+def parse_deadline(text):
+    """
+    Parses a free-text deadline.
+
+    Ordinal suffixes and commas are ignored, so '1st July, 2024' is read
+    as '1 July 2024'.
+
+    Args:
+        text (str): The deadline as entered.
+
+    Returns:
+        tuple: The date, or None if the text is not a date, and whether
+        the text is a slashed date that reads as another valid date
+        month first.
+    """
+    text = re.sub(r'(\d)(st|nd|rd|th)\b', r'\1', text.replace(',', ' '))
+    text = ' '.join(text.split())
+    parsed = None
+    for deadline_format in DEADLINE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, deadline_format).date()
+            break
+        except ValueError:
+            pass
+    if parsed is None or deadline_format != '%d/%m/%Y':
+        return parsed, False
+    try:
+        month_first = datetime.strptime(text, '%m/%d/%Y').date()
+    except ValueError:
+        return parsed, False
+    return parsed, month_first != parsed
 
 
 class StrategicTask(BaseModel):
     __tablename__ = 'strategic_tasks'
+    __table_args__ = (
+        Index('ix_strategic_tasks_deadline', 'deadline'),
+        Index('ix_strategic_tasks_status_deadline', 'status', 'deadline'),
+    )
 
     task_id = Column(Integer, primary_key=True, autoincrement=True)
     status = Column(String(255))
     priority = Column(String(255))
-    deadline = Column(String(255))
+    deadline = Column(Date)
+    # The deadline as entered before it was a date, kept for deadlines
+    # such as 'Monthly' that are not dates.
+    deadline_text = Column(String(255))
     task = Column(Text)
     description = Column(Text)
     assigned_to = Column(Integer, ForeignKey('project_managers.id'))
@@ -46,28 +105,195 @@ class StrategicTask(BaseModel):
             f")>"
         )
 
+    @classmethod
+    def export_query(cls):
+        """
+        Returns a select statement over every strategic task column and
+        the assigned project manager's name and section, ordered by
+        task_id, for streaming exports.
+        """
+        return cls.projection_with_manager().order_by(cls.task_id)
+
+    @classmethod
+    def projection_with_manager(cls):
+        """
+        Returns a select of every strategic task column joined with the
+        assigned project manager's name and section.
+        """
+        return (
+            cls.projection(project_manager=ProjectManagers.name,
+                           section=ProjectManagers.section)
+            .join(ProjectManagers, cls.assigned_to == ProjectManagers.id)
+        )
+
     @classmethod
     def strategic_tasks_to_dict_list(cls) -> list:
+        """
+        Returns the strategic tasks with the assigned project manager's
+        name and section as a list of dictionaries.
+        """
+        try:
+            task_list = cls.fetch_dicts(cls.projection_with_manager())
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return []
+
+        return task_list
+
+    @classmethod
+    def due_condition(cls, due, today):
+        """
+        Returns the where clause of a due filter.
+
+        Tasks are overdue when their deadline has passed and they are
+        not complete, and due this week when they are not complete and
+        their deadline is from today to Sunday.
+
+        Args:
+            due (str): 'overdue' or 'this_week'.
+            today (date): The current date.
+
+        Raises:
+            ValueError: If due is not one of DUE_FILTERS.
+        """
+        not_done = or_(cls.status.is_(None), cls.status.notin_(DONE_STATUSES))
+        if due == 'overdue':
+            return cls.deadline < today, not_done
+        if due == 'this_week':
+            sunday = today + timedelta(days=6 - today.weekday())
+            return cls.deadline.between(today, sunday), not_done
+        raise ValueError("due must be one of {}".format(
+            ', '.join(DUE_FILTERS)))
+
+    @classmethod
+    def deadline_query(cls, due=None, status=None, today=None):
+        """
+        Returns a select of the strategic tasks with the assigned
+        project manager's name and section, filtered on the indexed
+        deadline and status columns and ordered by deadline.
+
+        Args:
+            due (str): 'overdue' or 'this_week'. Defaults to every task.
+            status (str): Only select tasks with this status. Defaults
+            to every status.
+            today (date): The current date. Defaults to today.
+
+        Raises:
+            ValueError: If due is not valid.
+        """
+        query = cls.projection_with_manager()
+        if due is not None:
+            query = query.where(*cls.due_condition(due,
+                                                   today or date.today()))
+        if status is not None:
+            query = query.where(cls.status == status)
+        return query.order_by(cls.deadline, cls.task_id)
+
+    @classmethod
+    def deadline_tasks(cls, due=None, status=None, today=None):
+        """
+        Returns the strategic tasks selected by deadline_query as a list
+        of dictionaries.
+
+        Raises:
+            ValueError: If due is not valid.
+        """
+        query = cls.deadline_query(due, status, today)
+        try:
+            return cls.fetch_dicts(query)
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return []
+
+    @classmethod
+    def deadline_summary(cls, today=None):
+        """
+        Counts the strategic tasks per status, with the number overdue
+        and due this week, in one GROUP BY query.
+
+        Args:
+            today (date): The current date. Defaults to today.
+
+        Returns:
+            list: One dictionary per status, ordered by status, with the
+            number_of_tasks, overdue and due_this_week counts.
+        """
+        today = today or date.today()
+
+        def count_where(due):
+            # Complete tasks are grouped apart and reset below, so only
+            # the deadline part of the due condition is needed here.
+            deadline_condition = cls.due_condition(due, today)[0]
+            return func.coalesce(func.sum(case((deadline_condition, 1),
+                                               else_=0)), 0)
+
+        query = select(
+            cls.status,
+            func.count().label('number_of_tasks'),
+            count_where('overdue').label('overdue'),
+            count_where('this_week').label('due_this_week'),
+        ).group_by(cls.status).order_by(cls.status)
         try:
-            query = (
-                session.query(cls, ProjectManagers.name, ProjectManagers.section)
-                .join(ProjectManagers, cls.assigned_to == ProjectManagers.id)
-            )
+            rows = cls.fetch_dicts(query)
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
-        finally:
-            session.close()
+            return []
+        for row in rows:
+            if row['status'] in DONE_STATUSES:
+                row['overdue'] = row['due_this_week'] = 0
+            else:
+                row['overdue'] = int(row['overdue'])
+                row['due_this_week'] = int(row['due_this_week'])
+        return rows
 
-        results = query.all()
+    @classmethod
+    def backfill_deadlines(cls, chunk_size=BACKFILL_CHUNK_SIZE):
+        """
+        Fills in the deadline of the tasks that only have a free-text
+        deadline_text, by parsing it with parse_deadline.
 
-        task_list = [
-            {
-                **task.StrategicTask.to_dict(),
-                'project_manager': task.name,
-                'section': task.section
-            }
-            for task in results
-        ]
+        Args:
+            chunk_size (int): The number of rows per UPDATE.
 
-        return task_list
\ No newline at end of file
+        Returns:
+            dict: The number of updated tasks, the unparsed tasks whose
+            text is not a date, and the ambiguous tasks whose slashed
+            date was read day first but is also a valid date month
+            first, each with their task_id and deadline_text. None if
+            the database could not be updated.
+        """
+        table = cls.__table__
+        try:
+            rows = session.execute(
+                select(table.c.task_id, table.c.deadline_text)
+                .where(table.c.deadline.is_(None),
+                       table.c.deadline_text.isnot(None))
+                .order_by(table.c.task_id)
+            ).all()
+            updates, unparsed, ambiguous = [], [], []
+            for task_id, text in rows:
+                parsed, is_ambiguous = parse_deadline(text)
+                if parsed is None:
+                    unparsed.append({'task_id': task_id,
+                                     'deadline_text': text})
+                    continue
+                updates.append({'match_task_id': task_id,
+                                'deadline': parsed})
+                if is_ambiguous:
+                    ambiguous.append({'task_id': task_id,
+                                      'deadline_text': text,
+                                      'deadline': parsed})
+            statement = update(table).where(
+                table.c.task_id == bindparam('match_task_id'))
+            for start in range(0, len(updates), chunk_size):
+                session.execute(statement, updates[start:start + chunk_size])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return None
+        return {'updated': len(updates), 'unparsed': unparsed,
+                'ambiguous': ambiguous}
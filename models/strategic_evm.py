@@ -0,0 +1,292 @@
+""" Earned value metrics of the strategic tasks """
+from sqlalchemy import select
+from models.engine.database import session
+from models.cache import VersionedMemo
+from models.projects import ProjectManagers
+from models.strategic import StrategicTask
+from datetime import date
+from decimal import Decimal
+import numpy as np
+
+# The summed amounts of a group of tasks, in cents.
+AMOUNT_COLUMNS = ('budget_at_completion', 'planned_value', 'earned_value',
+                  'actual_cost', 'scheduled_earned_value')
+
+# The columns the tasks are grouped by.
+GROUP_COLUMNS = ('project_manager', 'section')
+
+
+def cents(values):
+    """
+    Converts DECIMAL(10, 2) values to an int64 array of hundredths, so
+    that sums of amounts stay exact. Missing values become 0.
+    """
+    return np.fromiter(
+        (0 if value is None else int((Decimal(value) * 100)
+                                     .to_integral_value())
+         for value in values),
+        dtype=np.int64, count=len(values))
+
+
+def present(values):
+    """Returns a boolean array telling which values are not missing."""
+    return np.fromiter((value is not None for value in values), dtype=bool,
+                       count=len(values))
+
+
+def deadline_days(values):
+    """Converts deadlines to day numbers, NaN where they are missing."""
+    return np.fromiter(
+        (np.nan if value is None else value.toordinal() for value in values),
+        dtype=float, count=len(values))
+
+
+def load_tasks():
+    """
+    Reads the EVM inputs of every strategic task in one query, joined
+    with the assigned project manager's name and section like
+    StrategicTask.strategic_tasks_to_dict_list.
+
+    Returns:
+        dict: The task_id, task, status, project_manager and section
+        lists and the raw deadline, percentage_done, fixed_cost,
+        estimated_hours and actual_hours values.
+    """
+    query = (
+        select(StrategicTask.task_id, StrategicTask.task,
+               StrategicTask.status, StrategicTask.deadline,
+               StrategicTask.percentage_done, StrategicTask.fixed_cost,
+               StrategicTask.estimated_hours, StrategicTask.actual_hours,
+               ProjectManagers.name.label('project_manager'),
+               ProjectManagers.section.label('section'))
+        .join(ProjectManagers,
+              StrategicTask.assigned_to == ProjectManagers.id)
+        .order_by(StrategicTask.task_id)
+    )
+    result = session.execute(query)
+    names = list(result.keys())
+    rows = result.all()
+    return dict(zip(names, map(list, zip(*rows)))) if rows else {
+        name: [] for name in names}
+
+
+def task_amounts(tasks, today):
+    """
+    Computes the earned value amounts of every task at once, in cents.
+
+    The budget at completion of a task is its fixed cost. The earned
+    value is the percentage done of the budget, and the actual cost the
+    share of the budget used by the actual hours against the estimated
+    hours. The planned value follows the 0/100 rule, the whole budget
+    being planned by the deadline, as tasks have no start date.
+
+    Tasks without a fixed cost or estimated hours are not costed, and
+    tasks without a deadline date are not scheduled.
+
+    Args:
+        tasks (dict): The lists returned by load_tasks.
+        today (date): The status date.
+
+    Returns:
+        dict: The int64 arrays of AMOUNT_COLUMNS, and the costed and
+        scheduled boolean arrays.
+    """
+    budget = cents(tasks['fixed_cost'])
+    percentage = np.clip(cents(tasks['percentage_done']), 0, 10000)
+    estimated = cents(tasks['estimated_hours'])
+    actual = cents(tasks['actual_hours'])
+    deadline = deadline_days(tasks['deadline'])
+
+    costed = present(tasks['fixed_cost']) & (estimated > 0)
+    scheduled = costed & ~np.isnan(deadline)
+    budget = np.where(costed, budget, 0)
+    earned = np.rint(budget * (percentage / 10000)).astype(np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spent = np.where(costed, budget * (actual / estimated), 0)
+    planned = np.where(scheduled & (deadline <= today.toordinal()),
+                       budget, 0)
+    return {
+        'budget_at_completion': budget,
+        'planned_value': planned,
+        'earned_value': earned,
+        'actual_cost': np.rint(spent).astype(np.int64),
+        'scheduled_earned_value': np.where(scheduled, earned, 0),
+        'costed': costed,
+        'scheduled': scheduled,
+    }
+
+
+def group_totals(amounts, labels):
+    """
+    Sums the task amounts per group.
+
+    Args:
+        amounts (dict): The arrays returned by task_amounts.
+        labels (list): The group of each task.
+
+    Returns:
+        tuple: The group labels, sorted with None last, and a dictionary
+        of the summed AMOUNT_COLUMNS and the number_of_tasks,
+        costed_tasks and scheduled_tasks of each group.
+    """
+    keys = sorted(set(labels), key=lambda label: (label is None, label))
+    index = {key: position for position, key in enumerate(keys)}
+    groups = np.fromiter((index[label] for label in labels), dtype=np.intp,
+                         count=len(labels))
+    totals = {}
+    for name in AMOUNT_COLUMNS:
+        totals[name] = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(totals[name], groups, amounts[name])
+    totals['number_of_tasks'] = np.bincount(groups, minlength=len(keys))
+    totals['costed_tasks'] = np.bincount(
+        groups, weights=amounts['costed'], minlength=len(keys)).astype(int)
+    totals['scheduled_tasks'] = np.bincount(
+        groups, weights=amounts['scheduled'], minlength=len(keys)).astype(int)
+    return keys, totals
+
+
+def metrics(totals):
+    """
+    Derives the earned value metrics from summed amounts, for tasks and
+    groups alike.
+
+    The cost and schedule performance indices are the earned value over
+    the actual cost and over the planned value, the latter counting the
+    earned value of scheduled tasks only. The estimate at completion is
+    the budget at completion over the cost performance index, or the
+    budget itself while nothing has been spent.
+
+    Returns:
+        dict: Arrays of the variances and estimates in cents, and of the
+        indices, NaN where they are undefined.
+    """
+    budget = totals['budget_at_completion']
+    earned = totals['earned_value']
+    spent = totals['actual_cost']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cpi = np.where(spent > 0, earned / spent, np.nan)
+        spi = np.where(totals['planned_value'] > 0,
+                       totals['scheduled_earned_value']
+                       / totals['planned_value'], np.nan)
+        # Divided first, in float, as the product of two amounts in
+        # cents overflows int64 for large budgets.
+        estimate = np.where(spent > 0,
+                            np.where(earned > 0,
+                                     np.rint(budget * (spent / earned)),
+                                     np.nan),
+                            budget)
+    return {
+        'cost_variance': earned - spent,
+        'schedule_variance': (totals['scheduled_earned_value']
+                              - totals['planned_value']),
+        'cost_performance_index': cpi,
+        'schedule_performance_index': spi,
+        'estimate_at_completion': estimate,
+        'estimate_to_complete': estimate - spent,
+        'variance_at_completion': budget - estimate,
+    }
+
+
+def to_decimals(amounts):
+    """Converts an array of cents to Decimals, NaN becoming None."""
+    return [None if amount != amount else Decimal(int(amount)).scaleb(-2)
+            for amount in amounts.tolist()]
+
+
+def to_indices(values):
+    """Rounds an array of performance indices, NaN becoming None."""
+    return [None if value != value else round(value, 3)
+            for value in values.tolist()]
+
+
+def rows(totals, derived, extra):
+    """
+    Builds JSON-ready dictionaries from summed amounts and metrics.
+
+    Each column is converted at once, so no NumPy scalar is read one
+    at a time.
+
+    Args:
+        totals (dict): Amount arrays, as returned by task_amounts or
+        group_totals.
+        derived (dict): The arrays returned by metrics.
+        extra (dict): Lists of other values to add to every row.
+
+    Returns:
+        list: One dictionary per task or group.
+    """
+    columns = dict(extra)
+    for name in AMOUNT_COLUMNS[:-1]:
+        columns[name] = to_decimals(totals[name])
+    for name, values in derived.items():
+        columns[name] = (to_indices(values) if name.endswith('_index')
+                         else to_decimals(values))
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def compute_evm(today):
+    """
+    Computes the earned value metrics of every strategic task and their
+    totals per project manager, per section and overall.
+
+    Args:
+        today (date): The status date.
+
+    Returns:
+        dict: The as_of date, the totals, the by_project_manager and
+        by_section rows, and the tasks. Amounts are Decimals and indices
+        floats; metrics that are undefined are None.
+    """
+    tasks = load_tasks()
+    amounts = task_amounts(tasks, today)
+    result = {
+        'as_of': today.isoformat(),
+        'tasks': rows(amounts, metrics(amounts), {
+            'task_id': tasks['task_id'], 'task': tasks['task'],
+            'status': tasks['status'],
+            'project_manager': tasks['project_manager'],
+            'section': tasks['section'],
+            'costed': amounts['costed'].tolist(),
+            'scheduled': amounts['scheduled'].tolist(),
+        }),
+    }
+    for column in GROUP_COLUMNS:
+        keys, totals = group_totals(amounts, tasks[column])
+        result['by_' + column] = rows(totals, metrics(totals), {
+            column: keys,
+            'number_of_tasks': totals['number_of_tasks'].tolist(),
+            'costed_tasks': totals['costed_tasks'].tolist(),
+            'scheduled_tasks': totals['scheduled_tasks'].tolist(),
+        })
+    totals = {name: amounts[name].sum(keepdims=True)
+              for name in AMOUNT_COLUMNS}
+    result['totals'] = rows(totals, metrics(totals), {
+        'number_of_tasks': [len(tasks['task_id'])],
+        'costed_tasks': [int(amounts['costed'].sum())],
+        'scheduled_tasks': [int(amounts['scheduled'].sum())],
+    })[0]
+    return result
+
+
+_evm_memo = VersionedMemo(compute_evm)
+
+
+def strategic_evm(today=None):
+    """
+    Returns the earned value metrics of the strategic tasks, memoised
+    against the data version so that pages only read them.
+
+    Args:
+        today (date): The status date. Defaults to today.
+
+    Returns:
+        dict: The metrics returned by compute_evm, or None if the
+        database could not be queried.
+    """
+    try:
+        return _evm_memo(today or date.today())
+    except Exception as e:
+        session.rollback()
+        print(f"An error occurred: {e}")
+        return None
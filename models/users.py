@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String
 from flask_login import UserMixin
 from models.base import BaseModel
 from models.engine.database import session
+from models.cache import user_cache
 
 
 class Users(BaseModel, UserMixin):
@@ -47,13 +48,47 @@ class Users(BaseModel, UserMixin):
     
     def has_role(self, role):
         return self.role == role
+
+    @classmethod
+    def get_cached(cls, user_id):
+        """
+        Returns the user with the given id, from user_cache if possible.
+
+        Users loaded from the database are detached from the session
+        before being cached, so they stay usable after the request that
+        loaded them ends. The users routes invalidate the cache when a
+        user is updated or deleted, and entries expire after
+        USER_CACHE_TTL seconds.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            Users or None: The user object if found, None otherwise.
+        """
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+
+        try:
+            user = session.get(cls, user_id)
+        except Exception as e:
+            session.rollback()
+            print(f"An error occurred: {e}")
+            return None
+
+        if user is not None:
+            session.expunge(user)
+            user_cache.set(user_id, user)
+        return user
     
 
     @classmethod
     def user_data_to_dict_list(cls):
         try:
-            users = session.query(cls).all()
+            users = cls.fetch_dicts(cls.projection())
         except Exception as e:
             session.rollback()
             print(f"An error occurred: {e}")
-        return [user.to_dict() for user in users]
\ No newline at end of file
+            return []
+        return users
\ No newline at end of file
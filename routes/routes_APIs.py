@@ -1,15 +1,45 @@
-from flask import Blueprint, request, jsonify
-from flask_login import login_required
-from models.projects import ProjectsData
-from models.decorators import required_roles
+from flask import (
+    Blueprint, request, jsonify, abort, Response, stream_with_context
+)
+from flask_login import login_required, current_user
+from models.projects import ProjectsData, ProjectKpiSummary
+from models.strategic import StrategicTask
+from models.strategic_evm import strategic_evm
+from models.gis import gis_data_query
+from models.aggregations import home_distributions
+from models.progress_history import (
+    MAX_POINTS, project_progress_curves, section_progress_curves
+)
+from models.schedule_risk import DEFAULT_LIMIT, schedule_risk
+from models.guarantee_expiry import (
+    DEFAULT_DAYS, expiring_guarantees, guarantee_digest
+)
+from models.export import stream_rows, ndjson_lines, csv_lines
+from models.decorators import required_roles, conditional_get
+from datetime import date, timedelta
 
 
 api_bp = Blueprint('api', __name__)
 
+MAX_PAGE_LENGTH = 500
+MAX_PROGRESS_CHANGES = 1000
+DEFAULT_HISTORY_DAYS = 365
+
+# Progress history series only served to admins, like the certified
+# payments column of the projects table.
+ADMIN_ONLY_SERIES = ('total_certified_interim_payments_to_date',)
+
+EXPORT_QUERIES = {
+    'projects_data': ProjectsData.export_query,
+    'strategic_tasks': StrategicTask.export_query,
+    'gis_data': gis_data_query,
+}
+
 
 @api_bp.route("/api/projects_data", strict_slashes=False)
 @login_required
 @required_roles('admin')
+@conditional_get
 def projects_data_api():
     """
     Function to handle projects data API endpoint.
@@ -26,6 +56,439 @@ def projects_data_api():
     projects_data = ProjectsData.projects_data_to_dict_list()
     return jsonify(projects_data)
 
+
+@api_bp.route("/api/projects_data/summary", strict_slashes=False)
+@login_required
+@required_roles('admin')
+@conditional_get
+def projects_summary_api():
+    """
+    Returns project counts by year, status and project manager, and the
+    contract value and certified payment totals by status and section.
+
+    Returns:
+    - JSON response with the distributions computed by GROUP BY queries.
+    """
+    return jsonify(home_distributions())
+
+
+@api_bp.route("/api/projects_data/kpi_summary", strict_slashes=False)
+@login_required
+@required_roles('admin')
+@conditional_get
+def projects_kpi_summary_api():
+    """
+    Returns the portfolio KPIs from the project KPI summary table.
+
+    The group_by query parameter lists the dimensions to group by,
+    separated by commas, out of section, contract_type, project_manager
+    and year. Defaults to section.
+
+    Returns:
+    - JSON response with one object per group, or a 400 error for an
+    unknown dimension.
+    """
+    group_by = tuple(
+        name.strip()
+        for name in request.args.get('group_by', 'section').split(',')
+        if name.strip()
+    )
+    try:
+        summary = ProjectKpiSummary.summary(group_by)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(summary)
+
+
+def datatables_args(args):
+    """
+    Parses the query string sent by a DataTables server-side table.
+
+    Args:
+        args (MultiDict): The request arguments.
+
+    Returns:
+        dict: Keyword arguments for ProjectsData.projects_data_table.
+    """
+    columns = []
+    column_filters = {}
+    i = 0
+    while f'columns[{i}][data]' in args:
+        name = args.get(f'columns[{i}][data]')
+        columns.append(name)
+        value = args.get(f'columns[{i}][search][value]', '')
+        if value:
+            column_filters[name] = value
+        i += 1
+
+    order_index = args.get('order[0][column]', type=int)
+    order_by = 'id'
+    if order_index is not None and 0 <= order_index < len(columns):
+        order_by = columns[order_index]
+
+    length = args.get('length', 10, type=int)
+    if length < 0 or length > MAX_PAGE_LENGTH:
+        length = MAX_PAGE_LENGTH
+
+    return {
+        'start': max(args.get('start', 0, type=int), 0),
+        'length': length,
+        'order_by': order_by,
+        'order_dir': args.get('order[0][dir]', 'asc'),
+        'search': args.get('search[value]') or None,
+        'column_filters': column_filters,
+        'after_id': args.get('after_id', type=int),
+        'columns': columns or None,
+    }
+
+
+@api_bp.route("/api/projects_data/table", strict_slashes=False)
+@login_required
+@conditional_get
+def projects_data_table_api():
+    """
+    Function to handle the server-side projects data table endpoint.
+
+    Accepts the DataTables server-side processing parameters and
+    returns one page of projects data, searched, filtered and ordered
+    in the database. Users other than admins can only read the columns
+    of the home page table.
+
+    Parameters:
+    - None
+
+    Returns:
+    - JSON response in the DataTables server-side format, or a 400
+    error if a column or order direction is invalid.
+    """
+    try:
+        records_total, records_filtered, rows = (
+            ProjectsData.projects_data_table(
+                **datatables_args(request.args),
+                allowed_columns=None if current_user.has_role('admin')
+                else ProjectsData.HOME_TABLE_COLUMNS)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, date):
+                row[key] = value.isoformat()
+
+    return jsonify({
+        'draw': request.args.get('draw', 0, type=int),
+        'recordsTotal': records_total,
+        'recordsFiltered': records_filtered,
+        'data': rows,
+    })
+
+
+@api_bp.route("/api/projects_data/progress", methods=['PATCH'],
+              strict_slashes=False)
+@login_required
+@required_roles('admin', 'admin_projects')
+def update_projects_progress():
+    """
+    Updates the progress percentages of many projects in one request.
+
+    The request body is a JSON list of changes, each holding a project
+    id and one or more progress columns, for example
+    [{"id": 1, "water_progress": 50, "roads_progress": 20}].
+
+    Returns:
+    - JSON response with the number of updated projects and the result
+    of each change, or a 400 error if the body is not a list of at most
+    MAX_PROGRESS_CHANGES changes.
+    """
+    changes = request.get_json(silent=True)
+    if not isinstance(changes, list):
+        return jsonify({'error': 'Expected a JSON list of changes'}), 400
+    if len(changes) > MAX_PROGRESS_CHANGES:
+        return jsonify({
+            'error': f'At most {MAX_PROGRESS_CHANGES} changes are allowed'
+        }), 400
+
+    results = ProjectsData.update_progress(changes)
+    status = 500 if any(result['status'] == 'error'
+                        for result in results) else 200
+    return jsonify({
+        'updated': sum(result['status'] == 'updated' for result in results),
+        'results': results
+    }), status
+
+
+def history_args(args):
+    """
+    Parses the date range and point count of a progress history
+    request.
+
+    The start and end parameters are ISO dates; end defaults to today
+    and start to DEFAULT_HISTORY_DAYS before end. max_points defaults
+    to MAX_POINTS.
+
+    Args:
+        args (MultiDict): The request arguments.
+
+    Returns:
+        dict: The start, end and max_points keyword arguments.
+
+    Raises:
+        ValueError: If a date or the point count is not valid.
+    """
+    end = date.fromisoformat(args['end']) if args.get('end') else date.today()
+    start = (date.fromisoformat(args['start']) if args.get('start')
+             else end - timedelta(days=DEFAULT_HISTORY_DAYS))
+    return {'start': start, 'end': end,
+            'max_points': int(args.get('max_points', MAX_POINTS))}
+
+
+def id_list_arg(args, name):
+    """Parses a comma separated list of ids, or returns None."""
+    if not args.get(name):
+        return None
+    return [int(value) for value in args[name].split(',') if value.strip()]
+
+
+def visible_series(curves):
+    """
+    Returns progress curves without the ADMIN_ONLY_SERIES unless the
+    current user is an admin.
+    """
+    if current_user.has_role('admin'):
+        return curves
+    return [{name: values for name, values in curve.items()
+             if name not in ADMIN_ONLY_SERIES} for curve in curves]
+
+
+@api_bp.route("/api/projects_data/progress_history", strict_slashes=False)
+@login_required
+@conditional_get
+def projects_progress_history_api():
+    """
+    Returns the progress of projects over time from the progress
+    snapshots.
+
+    The project_id query parameter lists the projects, separated by
+    commas. start, end and max_points select the range and the largest
+    number of points per curve; longer ranges are downsampled. The
+    certified payments series is only returned to admins.
+
+    Returns:
+    - JSON response with one curve per project, or a 400 error for
+    invalid parameters.
+    """
+    try:
+        project_ids = id_list_arg(request.args, 'project_id') or []
+        curves = project_progress_curves(project_ids,
+                                         **history_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(visible_series(curves))
+
+
+@api_bp.route("/api/sections/progress_history", strict_slashes=False)
+@login_required
+@conditional_get
+def sections_progress_history_api():
+    """
+    Returns the progress of sections over time from the progress
+    snapshots, for burn-up charts.
+
+    The optional section_id query parameter lists the sections,
+    separated by commas. start, end and max_points work as for
+    /api/projects_data/progress_history, and the certified payments
+    series is likewise only returned to admins.
+
+    Returns:
+    - JSON response with one curve per section, or a 400 error for
+    invalid parameters.
+    """
+    try:
+        curves = section_progress_curves(
+            section_ids=id_list_arg(request.args, 'section_id'),
+            **history_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(visible_series(curves))
+
+
+@api_bp.route("/api/projects_data/schedule_risk", strict_slashes=False)
+@login_required
+@required_roles('admin')
+@conditional_get
+def projects_schedule_risk_api():
+    """
+    Returns the schedule risk of the portfolio: expected against actual
+    progress, guarantee expiries and slippage scores.
+
+    The limit query parameter sets the number of projects returned,
+    highest slippage score first, and risk_level keeps only the
+    projects of one risk level.
+
+    Returns:
+    - JSON response with the portfolio summary and the projects, or a
+    400 error for invalid parameters.
+    """
+    try:
+        risk = schedule_risk(
+            limit=int(request.args.get('limit', DEFAULT_LIMIT)),
+            risk_level=request.args.get('risk_level') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(risk)
+
+
+def iso_expiry_dates(rows):
+    """Returns guarantee rows with their expiry dates as ISO strings."""
+    return [dict(row, expiry_date=row['expiry_date'].isoformat())
+            for row in rows]
+
+
+@api_bp.route("/api/projects_data/guarantee_expiry", strict_slashes=False)
+@login_required
+@required_roles('admin')
+@conditional_get
+def guarantee_expiry_api():
+    """
+    Returns the guarantees of open projects expiring within a number of
+    days, from the cached guarantee expiry timeline.
+
+    The days query parameter sets the window, guarantee keeps one type
+    out of performance and advance_payment, and include_expired=true
+    adds the guarantees that have already expired.
+
+    Returns:
+    - JSON response with the guarantees ordered by expiry date, or a
+    400 error for invalid parameters.
+    """
+    try:
+        rows = expiring_guarantees(
+            days=int(request.args.get('days', DEFAULT_DAYS)),
+            guarantee=request.args.get('guarantee') or None,
+            include_expired=request.args.get('include_expired') == 'true')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(iso_expiry_dates(rows))
+
+
+@api_bp.route("/api/projects_data/guarantee_expiry/digest",
+              strict_slashes=False)
+@login_required
+@required_roles('admin')
+@conditional_get
+def guarantee_digest_api():
+    """
+    Returns the guarantee expiry digest: the number and value of the
+    guarantees expired and expiring within 7, 30 and 90 days per
+    guarantee type, and the guarantees expiring within 7 days.
+
+    Returns:
+    - JSON response with the digest.
+    """
+    digest = guarantee_digest()
+    digest['expiring_soon'] = iso_expiry_dates(digest['expiring_soon'])
+    return jsonify(digest)
+
+
+@api_bp.route("/api/strategic_tasks/evm", strict_slashes=False)
+@login_required
+@conditional_get
+def strategic_evm_api():
+    """
+    Returns the earned value metrics of the strategic tasks: planned
+    value, earned value, actual cost, cost and schedule performance
+    indices and estimates at completion, per task, per project manager,
+    per section and in total.
+
+    Returns:
+    - JSON response with the metrics, or a 500 error if they could not
+    be computed.
+    """
+    evm = strategic_evm()
+    if evm is None:
+        abort(500)
+    return jsonify(evm)
+
+
+@api_bp.route("/api/strategic_tasks", strict_slashes=False)
+@login_required
+@conditional_get
+def strategic_tasks_api():
+    """
+    Returns the strategic tasks ordered by deadline, from an indexed
+    query on the deadline date.
+
+    The due query parameter keeps the tasks that are overdue or due
+    this_week, and status keeps the tasks with one status.
+
+    Returns:
+    - JSON response with the tasks, or a 400 error for an invalid due
+    filter.
+    """
+    try:
+        rows = StrategicTask.deadline_tasks(
+            due=request.args.get('due') or None,
+            status=request.args.get('status') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify([
+        dict(row, deadline=row['deadline'] and row['deadline'].isoformat())
+        for row in rows])
+
+
+@api_bp.route("/api/strategic_tasks/deadlines", strict_slashes=False)
+@login_required
+@conditional_get
+def strategic_deadlines_api():
+    """
+    Returns the number of strategic tasks per status, with how many are
+    overdue and due this week.
+
+    Returns:
+    - JSON response with one row per status.
+    """
+    return jsonify(StrategicTask.deadline_summary())
+
+
+@api_bp.route("/api/export/<dataset>.<export_format>", strict_slashes=False)
+@login_required
+@required_roles('admin')
+def export_data(dataset, export_format):
+    """
+    Function to handle the streaming export endpoints.
+
+    Streams projects data, strategic tasks or GIS data as NDJSON or CSV.
+    Rows are read from a server-side cursor and written as they arrive,
+    so memory use does not grow with the size of the table.
+
+    Parameters:
+    - dataset: 'projects_data', 'strategic_tasks' or 'gis_data'.
+    - export_format: 'ndjson' or 'csv'.
+
+    Returns:
+    - A streamed response, or a 404 error for an unknown dataset
+    or format.
+    """
+    if dataset not in EXPORT_QUERIES or export_format not in ('ndjson', 'csv'):
+        abort(404)
+
+    query = EXPORT_QUERIES[dataset]()
+    rows = stream_rows(query)
+
+    if export_format == 'csv':
+        lines = csv_lines(list(query.selected_columns.keys()), rows)
+        mimetype = 'text/csv'
+    else:
+        lines = ndjson_lines(rows)
+        mimetype = 'application/x-ndjson'
+
+    response = Response(stream_with_context(lines), mimetype=mimetype)
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename={dataset}.{export_format}'
+    )
+    return response
+
 # @api_bp.route("/get_data_from_my_api", strict_slashes=False)
 # def get_data_from_my_api():
 #     response = requests.get("http://127.0.0.1:3000/api/projects_data")
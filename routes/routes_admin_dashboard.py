@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template
-from flask_login import login_required
+from flask_login import login_required, current_user
 from models.decorators import required_roles
+from models.metrics import endpoint_stats
 
 
 admin_dashboard_bp = Blueprint('admin_dashboard', __name__)
@@ -13,7 +14,12 @@ def admin_dashboard():
     """
     Renders the admin dashboard page.
 
+    Users with the 'admin' role also see the request metrics panel.
+
     Returns:
         flask.Response: The rendered admin dashboard template.
     """
-    return render_template("admin_dashboard.html")
+    metrics = None
+    if current_user.has_role('admin'):
+        metrics = endpoint_stats.summary()
+    return render_template("admin_dashboard.html", metrics=metrics)
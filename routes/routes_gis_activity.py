@@ -40,10 +40,6 @@ def insert_gis_activity_data():
             flash('An error occurred while inserting the data. It looks like the output or responsible person you selected is not valid. Please make sure that the output or responsible person exists before adding the activity.', 'error')
             
             return redirect(url_for('gis_data.gis_data'))
-        
-
-        finally:
-            session.close()
 
 
 @gis_activity_bp.route("/update_gis_activity_data/<int:gis_activity_data_id>", methods=['POST'])
@@ -77,9 +73,6 @@ def update_gis_activity_data(gis_activity_data_id):
             flash('An error occurred while updating the data. It looks like the output or responsible person you selected is not valid. Please make sure that the output or responsible person exists before updating the activity.', 'error')
             return redirect(url_for('gis_data.gis_data'))
 
-        finally:
-            session.close()
-
 
 @gis_activity_bp.route("/delete_gis_activity_data/<int:gis_activity_data_id>")
 @login_required
@@ -109,6 +102,3 @@ def delete_gis_activity_data(gis_activity_data_id):
 
         return redirect(url_for('gis_data.gis_data'))
 
-    finally:
-        session.close()
-
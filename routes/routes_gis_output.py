@@ -34,9 +34,6 @@ def insert_gis_output_data():
             flash(f'An error occurred while inserting data: {str(e)}', 'error')
             return redirect(url_for('gis_data.gis_data'))
 
-        finally:
-            session.close()
-
 
 @gis_output_bp.route("/update_gis_output_data/<int:gis_output_data_id>", methods=['POST'])
 @login_required
@@ -65,9 +62,6 @@ def update_gis_output_data(gis_output_data_id):
             flash(f'An error occurred while updating data: {str(e)}', 'error')
             return redirect(url_for('gis_data.gis_data'))
 
-        finally:
-            session.close()
-
 
 @gis_output_bp.route("/delete_gis_output_data/<int:gis_output_data_id>")
 @login_required
@@ -94,6 +88,3 @@ def delete_gis_output_data(gis_output_data_id):
         session.rollback()
         flash('An error occurred while deleting the output. It seems that the output is associated with an activity that cannot be empty. Please check the activities associated with the output.', 'error')
         return redirect(url_for('gis_data.gis_data'))
-
-    finally:
-        session.close()
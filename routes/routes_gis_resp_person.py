@@ -36,9 +36,6 @@ def insert_gis_resp_person_data():
             flash(f'An error occurred while inserting data: {str(e)}', 'error')
             return redirect(url_for('gis_data.gis_data'))
 
-        finally:
-            session.close()
-
 
 @gis_resp_person_bp.route("/update_gis_resp_person_data/<int:gis_resp_person_data_id>", methods=['POST'])
 @login_required
@@ -71,9 +68,6 @@ def update_gis_resp_person_data(gis_resp_person_data_id):
             flash(f'An error occurred while updating data: {str(e)}', 'error')
             return redirect(url_for('gis_data.gis_data'))
 
-        finally:
-            session.close()
-
 
 @gis_resp_person_bp.route("/delete_gis_resp_person_data/<int:gis_resp_person_data_id>")
 @login_required
@@ -102,6 +96,3 @@ def delete_gis_resp_person_data(gis_resp_person_data_id):
         session.rollback()
         flash('An error occurred while deleting the responsible person. It seems that the responsible person is associated with an activity that cannot be empty. Please check the activities associated with the responsible person.', 'error')
         return redirect(url_for('gis_data.gis_data'))
-
-    finally:
-        session.close()
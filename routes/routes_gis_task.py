@@ -35,9 +35,6 @@ def insert_gis_task_data():
             flash('An error occurred while inserting the data. It looks like the activity you selected is not valid. Please make sure that the activity exists before adding the task.', 'error')
             return redirect(url_for('gis_data.gis_data'))
 
-        finally:
-            session.close()
-
 
 @gis_task_bp.route("/update_gis_task_data/<int:gis_task_data_id>", methods=['POST'])
 @login_required
@@ -71,9 +68,6 @@ def update_gis_task_data(gis_task_data_id):
             flash('An error occurred while updating the data. It looks like the activity you selected is not valid. Please make sure that the activity exists before updating the task.', 'error')
             return redirect(url_for('gis_data.gis_data'))
 
-        finally:
-            session.close()
-
 
 @gis_task_bp.route("/delete_gis_task_data/<int:gis_task_data_id>")
 @login_required
@@ -101,6 +95,3 @@ def delete_gis_task_data(gis_task_data_id):
         session.rollback()
         flash(f'An error occurred while deleting data: {str(e)}', 'error')
         return redirect(url_for('gis_data.gis_data'))
-
-    finally:
-        session.close()
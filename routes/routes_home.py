@@ -1,20 +1,55 @@
-from flask import Blueprint, render_template
-from models.plot_functions import today_date, plot_home_page_charts
-from models.projects import ProjectsData
-from flask_login import login_required
+from flask import Blueprint, render_template, redirect, url_for, flash
+from models.plot_functions import today_date
+from models.chart_store import home_chart_store
+from models.engine.database import session
+from models.schedule_risk import schedule_risk
+from flask_login import login_required, current_user
+from models.decorators import required_roles, conditional_get
 
 
 home_bp = Blueprint('home', __name__)
 
+HOME_RISK_PROJECTS = 10
+
+
+def home_schedule_risk():
+    """
+    Returns the schedule risk shown on the home page, or None if it
+    could not be computed.
+    """
+    try:
+        return schedule_risk(limit=HOME_RISK_PROJECTS)
+    except Exception as e:
+        session.rollback()
+        print(f"An error occurred: {e}")
+        return None
+
 
 @home_bp.route("/home", strict_slashes=False)
 @login_required
+@conditional_get
 def index():
-    projects_data = ProjectsData.projects_data_to_dict_list()
-    graph1JSON, graph2JSON, graph3JSON, graph4JSON, graph5JSON = plot_home_page_charts()
+    graph1JSON, graph2JSON, graph3JSON, graph4JSON, graph5JSON = home_chart_store.get_charts()
     formatted_date = today_date()
     return render_template("home.html", graph1JSON=graph1JSON,
                                          today_date=formatted_date,
                                          graph2JSON=graph2JSON, graph3JSON=graph3JSON,
-                                         graph4JSON=graph4JSON, projects_data=projects_data,
-                                         graph5JSON=graph5JSON)
\ No newline at end of file
+                                         graph4JSON=graph4JSON,
+                                         graph5JSON=graph5JSON,
+                                         schedule_risk=home_schedule_risk(),
+                                         show_guarantees=current_user.has_role('admin'))
+
+
+@home_bp.route("/rebuild_charts", strict_slashes=False)
+@login_required
+@required_roles('admin', 'admin_projects')
+def rebuild_charts():
+    """
+    Schedules a background rebuild of the prebuilt home page charts.
+
+    Returns:
+        flask.Response: A redirect response to the home page.
+    """
+    home_chart_store.schedule_rebuild()
+    flash('Home page charts are being rebuilt.', 'success')
+    return redirect(url_for('home.index'))
\ No newline at end of file
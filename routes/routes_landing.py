@@ -31,8 +31,6 @@ def login():
         except Exception as e:
             session.rollback()
             print("Error:", e)
-        finally:
-            session.close()
         if user and user.password == form.password.data:
             login_user(user)
             return redirect(url_for('home.index'))
@@ -4,11 +4,16 @@ from flask import (
 )
 from flask_login import login_required
 from models.engine.database import session
+from models.cache import projects_changed
 from models.plot_functions import today_date
 from models.projects import (
-    ProjectsData, ProjectManagers
+    ProjectsData, ProjectManagers, ProjectKpiSummary,
+    ProjectProgressSnapshot
 )
+from models.projects_import import import_projects_data as import_file
+from models.guarantee_expiry import guarantee_digest, format_digest
 from models.decorators import required_roles
+import click
 
 
 projects_bp = Blueprint('projects', __name__)
@@ -55,6 +60,7 @@ def insert_project_manager():
             new_project_manager = ProjectManagers(name=name, section=section)
             session.add(new_project_manager)
             session.commit()
+            projects_changed()
             flash('Project manager added successfully!', 'success')
             return redirect(request.referrer)
 
@@ -63,9 +69,6 @@ def insert_project_manager():
             flash(f'An error occurred while adding the project manager: {str(e)}', 'error')
             return redirect(request.referrer)
 
-        finally:
-            session.close()
-
 
 @projects_bp.route(
     "/update_projects_project_manager/<int:project_manager_id>",
@@ -87,6 +90,7 @@ def update_projects_project_manager(project_manager_id):
                 project_manager.name = request.form.get('name')
                 project_manager.section = request.form.get('section')
                 session.commit()
+                projects_changed()
                 flash('Project manager updated successfully!', 'success')
             else:
                 flash('Project manager not found.', 'error')
@@ -98,9 +102,6 @@ def update_projects_project_manager(project_manager_id):
             flash(f'An error occurred while updating the project manager: {str(e)}', 'error')
             return redirect(request.referrer)
 
-        finally:
-            session.close()
-
 
 @projects_bp.route("/delete_projects_project_manager/<int:project_manager_id>")
 @login_required
@@ -124,6 +125,7 @@ def delete_projects_project_manager(project_manager_id):
         if project_manager:
             session.delete(project_manager)
             session.commit()
+            projects_changed()
             flash('Project manager deleted successfully!', 'success')
             return redirect(request.referrer)
         else:
@@ -133,9 +135,6 @@ def delete_projects_project_manager(project_manager_id):
         session.rollback()
         flash(f'An error occurred while deleting the project manager: {str(e)}', 'error')
         return redirect(request.referrer)
-    
-    finally:
-        session.close()
 
 
 @projects_bp.route('/insert_projects_data', methods=['POST'])
@@ -253,7 +252,13 @@ def insert_projects_data():
                 link=link)
 
             session.add(new_project_record)
+            session.flush()
+            inserted = ProjectsData.id == new_project_record.id
+            ProjectKpiSummary.apply_changes(
+                [], ProjectKpiSummary.snapshot(inserted))
+            ProjectProgressSnapshot.record(inserted)
             session.commit()
+            projects_changed()
             flash('Data inserted successfully')
             return redirect(url_for('projects.projects_data'))
 
@@ -261,5 +266,109 @@ def insert_projects_data():
             session.rollback()
             return jsonify({'error': str(e)}), 400
 
-        finally:
-            session.close()
+
+@projects_bp.route('/import_projects_data', methods=['POST'])
+@login_required
+@required_roles('admin', 'admin_projects')
+def import_projects_data():
+    """
+    Imports projects data from an uploaded CSV or Excel file and
+    redirects to the projects page.
+
+    Existing projects are matched by contract number and updated; the
+    other rows are inserted. Rows that fail validation are skipped and
+    reported in flash messages.
+
+    Returns:
+        flask.Response: A redirect response to the projects page.
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        flash('Please choose a file to import.', 'error')
+        return redirect(url_for('projects.projects_data'))
+
+    try:
+        result = import_file(upload.stream, upload.filename)
+    except ValueError as e:
+        flash(f'The file could not be imported: {str(e)}', 'error')
+        return redirect(url_for('projects.projects_data'))
+
+    flash('{} projects added and {} updated.'.format(
+        result['inserted'], result['updated']), 'success')
+    if result['error_count']:
+        flash('{} rows were not imported.'.format(result['error_count']),
+              'error')
+        for error in result['errors'][:10]:
+            flash('Row {}: {}'.format(error['row'], error['error']), 'error')
+    return redirect(url_for('projects.projects_data'))
+
+
+@projects_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=500, show_default=True,
+              help='Rows written per transaction.')
+def import_projects_data_command(path, chunk_size):
+    """
+    Imports projects data from a CSV or Excel file.
+
+    Usage: flask projects import PATH
+    """
+    with open(path, 'rb') as stream:
+        try:
+            result = import_file(stream, path, chunk_size=chunk_size)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    click.echo('{} projects added and {} updated.'.format(
+        result['inserted'], result['updated']))
+    for error in result['errors']:
+        click.echo('Row {}: {}'.format(error['row'], error['error']),
+                   err=True)
+    if result['error_count'] > len(result['errors']):
+        click.echo('... and {} more rows with errors.'.format(
+            result['error_count'] - len(result['errors'])), err=True)
+
+
+@projects_bp.cli.command('rebuild-kpi-summary')
+def rebuild_kpi_summary_command():
+    """
+    Recomputes the project KPI summary from projects_data.
+
+    Usage: flask projects rebuild-kpi-summary
+    """
+    groups = ProjectKpiSummary.rebuild()
+    if groups is None:
+        raise click.ClickException('The KPI summary could not be rebuilt.')
+    click.echo('The KPI summary holds {} groups.'.format(groups))
+
+
+@projects_bp.cli.command('snapshot-progress')
+@click.option('--date', 'snapshot_date', type=click.DateTime(['%Y-%m-%d']),
+              help='The snapshot date. Defaults to today.')
+def snapshot_progress_command(snapshot_date):
+    """
+    Snapshots the progress of every project whose progress changed
+    since its last snapshot. Run it daily, for example from cron.
+
+    Usage: flask projects snapshot-progress
+    """
+    count = ProjectProgressSnapshot.capture(
+        snapshot_date.date() if snapshot_date else None)
+    if count is None:
+        raise click.ClickException('The progress could not be snapshotted.')
+    click.echo('{} projects snapshotted.'.format(count))
+
+
+@projects_bp.cli.command('guarantee-digest')
+@click.option('--date', 'digest_date', type=click.DateTime(['%Y-%m-%d']),
+              help='The digest date. Defaults to today.')
+def guarantee_digest_command(digest_date):
+    """
+    Prints the guarantee expiry digest: the guarantees of open projects
+    that have expired or expire soon. Run it daily or weekly, for
+    example from cron, and mail the output.
+
+    Usage: flask projects guarantee-digest
+    """
+    click.echo(format_digest(guarantee_digest(
+        digest_date.date() if digest_date else None)))
@@ -1,7 +1,13 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, abort, Response
 from flask_login import login_required
 from models.projects import ProjectsData
-from models.plot_functions import today_date, plot_servicing_page_charts
+from models.cache import data_version
+from models.decorators import (
+    conditional_get, data_fingerprint, not_modified, set_validators
+)
+from models.plot_functions import (
+    today_date, build_servicing_charts, find_servicing_project
+)
 
 
 sections_bp = Blueprint('sections', __name__)
@@ -9,28 +15,62 @@ sections_bp = Blueprint('sections', __name__)
 
 @sections_bp.route("/Servicing", strict_slashes=False)
 @login_required
+@conditional_get
 def servicing():
     """
     Renders the 'servicing.html' template with project
     data for servicing contracts.
 
-    This function fetches project data for servicing contracts,
-    generates a bar chart,
+    This function fetches project data for servicing contracts
     and renders the 'servicing.html' template with the necessary data.
+    The bar charts are not rendered inline; the page fetches each one
+    from servicing_chart when it scrolls into view.
 
     Returns:
         Flask.Response: The rendered template.
     """
     projects_data = ProjectsData.projects_data_to_dict_list(1)
-    servicing_data_JSON = plot_servicing_page_charts()
     formatted_date = today_date()
     return render_template("servicing.html", projects_data=projects_data,
-                           today_date=formatted_date,
-                           servicing_data_JSON=servicing_data_JSON)
+                           today_date=formatted_date)
+
+
+@sections_bp.route("/Servicing/charts/<int:project_id>", strict_slashes=False)
+@login_required
+def servicing_chart(project_id):
+    """
+    Returns the JSON bar chart of a single servicing contract.
+
+    The ETag is derived from the contract's data and its position on
+    the page, and Last-Modified from the data version, so a browser
+    that already holds the chart gets a 304 Not Modified without the
+    chart being rebuilt.
+
+    Parameters:
+    - project_id: The id of the servicing project.
+
+    Returns:
+    - The chart JSON, a 304 response, or a 404 error if the project
+    is not a servicing contract.
+    """
+    index, project_data = find_servicing_project(project_id)
+    if project_data is None:
+        abort(404)
+
+    etag = data_fingerprint([index % 2, project_data])
+    last_modified = data_version.last_modified()
+    if not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        chart_json = build_servicing_charts([project_data], index)[0]
+        response = Response(chart_json, mimetype='application/json')
+
+    return set_validators(response, etag, last_modified)
 
 
 @sections_bp.route("/Goods", strict_slashes=True)
 @login_required
+@conditional_get
 def goods():
     """
     Function to handle /Goods route.
@@ -53,6 +93,7 @@ def goods():
 
 @sections_bp.route("/Works", strict_slashes=False)
 @login_required
+@conditional_get
 def works():
     """
     Function to handle works data retrieval and rendering.
@@ -74,6 +115,7 @@ def works():
 
 @sections_bp.route("/Services", strict_slashes=False)
 @login_required
+@conditional_get
 def services():
     """
     Function to handle Services route.
@@ -5,35 +5,61 @@ from flask_login import login_required
 from models.plot_functions import today_date
 from models.engine.database import session
 from models.strategic import StrategicTask
+from models.strategic_evm import strategic_evm
 from models.projects import ProjectManagers
-from models.decorators import required_roles
+from models.decorators import required_roles, conditional_get
+from datetime import date
+import click
 
 
 strategic_bp = Blueprint('strategic', __name__)
 
 
+def form_deadline(value):
+    """
+    Returns the date of a deadline form field, or None if it is empty.
+
+    Raises:
+        ValueError: If the value is not an ISO date.
+    """
+    return date.fromisoformat(value) if value else None
+
+
 @strategic_bp.route("/StrategicPlanning", strict_slashes=False)
 @login_required
+@conditional_get
 def strategic_planning():
     """
     Function to handle Strategic Planning route.
 
-    Retrieves strategic data list and today's date,
-    then renders the strategic_planning.html template.
+    Retrieves strategic data list, its earned value metrics, the
+    overdue tasks and the tasks due this week from indexed deadline
+    queries, and today's date, then renders the
+    strategic_planning.html template.
 
     Parameters:
     - None
 
     Returns:
     - Rendered template "strategic_planning.html"
-    with today's date and strategic data list.
+    with today's date, strategic data list and earned value metrics.
 
     """
     strategic_data_list = StrategicTask.strategic_tasks_to_dict_list()
     formatted_date = today_date()
+    evm = strategic_evm()
+    evm_by_task = ({row['task_id']: row for row in evm['tasks']}
+                   if evm else {})
+    overdue_tasks = StrategicTask.deadline_tasks('overdue')
     return render_template("strategic_planning.html",
                            today_date=formatted_date,
-                           strategic_data_list=strategic_data_list)
+                           strategic_data_list=strategic_data_list,
+                           evm=evm, evm_by_task=evm_by_task,
+                           overdue_tasks=overdue_tasks,
+                           overdue_ids={row['task_id']
+                                        for row in overdue_tasks},
+                           due_this_week=StrategicTask.deadline_tasks(
+                               'this_week'))
 
 
 @strategic_bp.route("/strategic_planning_data", strict_slashes=False)
@@ -89,9 +115,7 @@ def insert_strategic_data():
             if deliverables == '':
                 deliverables = None
             assigned_to = request.form.get('assigned_to')
-            deadline = request.form.get('deadline')
-            if deadline == '':
-                deadline = None
+            deadline = form_deadline(request.form.get('deadline'))
             status = request.form.get('status')
             priority = request.form.get('priority')
             percentage_done = request.form.get('percentage_done')
@@ -126,9 +150,6 @@ def insert_strategic_data():
             flash(f'An error occurred while adding the task: {str(e)}', 'error')
             return redirect(url_for('strategic.strategic_planning_data'))
 
-        finally:
-            session.close()
-
 
 @strategic_bp.route("/update_strategic_data/<int:strategic_data_id>", methods=['POST'])
 @login_required
@@ -158,9 +179,9 @@ def update_strategic_data(strategic_data_id):
                 if task.deliverables == '':
                     task.deliverables = None
                 task.assigned_to = request.form.get('assigned_to')
-                task.deadline = request.form.get('deadline')
-                if task.deadline == '':
-                    task.deadline = None
+                task.deadline = form_deadline(request.form.get('deadline'))
+                if task.deadline is not None:
+                    task.deadline_text = None
                 task.status = request.form.get('status')
                 task.priority = request.form.get('priority')
                 task.percentage_done = request.form.get('percentage_done')
@@ -188,9 +209,6 @@ def update_strategic_data(strategic_data_id):
             flash(f'An error occurred while updating the task: {str(e)}', 'error')
             return redirect(url_for('strategic.strategic_planning_data'))
 
-        finally:
-            session.close()
-
 
 @strategic_bp.route("/delete_strategic_data/<int:strategic_data_id>")
 @login_required
@@ -224,5 +242,25 @@ def delete_strategic_data(strategic_data_id):
         flash(f'An error occurred while deleting the task: {str(e)}', 'error')
         return redirect(url_for('strategic.strategic_planning_data'))
 
-    finally:
-        session.close()
+
+@strategic_bp.cli.command('backfill-deadlines')
+def backfill_deadlines_command():
+    """
+    Parses the free-text deadlines kept in deadline_text into the
+    deadline date column, reporting the ones that are not dates and the
+    slashed dates that were read day first but are also valid month
+    first.
+
+    Usage: flask strategic backfill-deadlines
+    """
+    result = StrategicTask.backfill_deadlines()
+    if result is None:
+        raise click.ClickException('The deadlines could not be updated.')
+    click.echo('{} deadlines parsed.'.format(result['updated']))
+    for row in result['unparsed']:
+        click.echo('Task {}: {!r} is not a date.'.format(
+            row['task_id'], row['deadline_text']), err=True)
+    for row in result['ambiguous']:
+        click.echo('Task {}: {!r} was read as {}; check it.'.format(
+            row['task_id'], row['deadline_text'],
+            row['deadline'].isoformat()), err=True)
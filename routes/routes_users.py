@@ -6,6 +6,7 @@ from flask_login import login_required
 from models.users import Users
 from models.plot_functions import today_date
 from models.engine.database import session
+from models.cache import user_cache
 from models.decorators import required_roles
 
 
@@ -69,8 +70,6 @@ def insert_user_data():
             session.rollback()
             flash('An error occurred: {}'.format(str(e)), 'error')
             return redirect(url_for('users.users'))
-        finally:
-            session.close()
 
 
 
@@ -117,6 +116,7 @@ def update_user_data(user_data_id):
                 user.role = role
 
                 session.commit()
+                user_cache.invalidate(user_data_id)
                 flash('User data updated successfully!', 'success')
                 return redirect(url_for('users.users'))
 
@@ -124,9 +124,6 @@ def update_user_data(user_data_id):
                 session.rollback()
                 flash(f'An error occurred: {str(e)}', 'error')
                 return redirect(url_for('users.edit_user', user_data_id=user_data_id))
-
-            finally:
-                session.close()
         else:
             flash('User not found.', 'error')
             return redirect(url_for('users.users'))
@@ -152,14 +149,13 @@ def delete_user_data(user_data_id):
         try:
             session.delete(user)
             session.commit()
+            user_cache.invalidate(user_data_id)
             flash('User deleted successfully!', 'success')
             return redirect(url_for('users.users'))
         except Exception as e:
             session.rollback()
             flash(f'An error occurred while deleting the user: {str(e)}', 'error')
             return redirect(url_for('users.users'))
-        finally:
-            session.close()
     else:
         flash('User not found....', 'error')
         return redirect(url_for('users.users'))
\ No newline at end of file
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+from models.cache import projects_cache
+from models.aggregations import home_distributions
+
+
+class TestHomeDistributions(unittest.TestCase):
+    """ Tests for the home_distributions function. """
+
+    def setUp(self):
+        projects_cache.clear()
+
+    def tearDown(self):
+        projects_cache.clear()
+
+    @patch('models.aggregations.ProjectsData.fetch_dicts')
+    def test_distributions_are_cached(self, mock_fetch_dicts):
+        """Test that the five GROUP BY queries run once until invalidated."""
+        mock_fetch_dicts.return_value = [{'number_of_projects': 1}]
+
+        first = home_distributions()
+        second = home_distributions()
+
+        self.assertIs(first, second)
+        self.assertEqual(mock_fetch_dicts.call_count, 5)
+        self.assertEqual(set(first), {'by_year', 'by_status', 'by_manager',
+                                      'totals_by_status',
+                                      'totals_by_section'})
+
+        projects_cache.clear()
+        home_distributions()
+        self.assertEqual(mock_fetch_dicts.call_count, 10)
+
+    @patch('models.aggregations.session')
+    @patch('models.aggregations.ProjectsData.fetch_dicts')
+    def test_database_error(self, mock_fetch_dicts, mock_session):
+        """Test that a failed query returns empty lists without caching."""
+        mock_fetch_dicts.side_effect = Exception("Database error")
+
+        result = home_distributions()
+
+        mock_session.rollback.assert_called_once()
+        self.assertEqual(result['by_year'], [])
+        self.assertEqual(len(projects_cache), 0)
+
+    def test_queries_group_in_the_database(self):
+        """Test that the counts are computed with GROUP BY queries."""
+        with patch('models.aggregations.ProjectsData.fetch_dicts') as mock:
+            mock.return_value = []
+            home_distributions()
+
+        for call in mock.call_args_list:
+            sql = str(call.args[0])
+            self.assertIn('GROUP BY', sql)
+            self.assertIn('count(*)', sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
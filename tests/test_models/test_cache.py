@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import patch
+from sqlalchemy import create_engine, insert, Column, Integer
+from models.base import Base
+from models.engine.database import Session
+from models.cache import (
+    TTLCache, DataVersion, VersionedMemo, data_version, projects_cache,
+    projects_changed, on_projects_changed
+)
+
+
+class TestTTLCache(unittest.TestCase):
+    """ Tests for the TTLCache class. """
+
+    def test_set_and_get(self):
+        """Test that a stored value is returned for its key."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set(1, ["project"])
+        self.assertEqual(cache.get(1), ["project"])
+        self.assertIsNone(cache.get(2))
+
+    def test_entries_expire(self):
+        """Test that entries are dropped once their ttl has passed."""
+        cache = TTLCache(maxsize=2, ttl=10)
+        with patch('models.cache.time.monotonic', return_value=100):
+            cache.set(None, ["project"])
+        with patch('models.cache.time.monotonic', return_value=109):
+            self.assertEqual(cache.get(None), ["project"])
+        with patch('models.cache.time.monotonic', return_value=111):
+            self.assertIsNone(cache.get(None))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+        self.assertEqual(cache.get(1), "a")
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), "c")
+
+    def test_invalidate_and_clear(self):
+        """Test that entries can be removed one by one or all at once."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.invalidate(1)
+        self.assertIsNone(cache.get(1))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_projects_changed_notifies_listeners(self):
+        """Test that projects_changed clears the cache and runs listeners."""
+        calls = []
+        projects_cache.set(None, ["project"])
+        with patch('models.cache._projects_listeners', []):
+            on_projects_changed(lambda: calls.append(True))
+            projects_changed()
+        self.assertIsNone(projects_cache.get(None))
+        self.assertEqual(calls, [True])
+
+
+class TestDataVersion(unittest.TestCase):
+    """ Tests for the DataVersion class and its session events. """
+
+    def test_etag_changes_on_bump(self):
+        """Test that the ETag changes when the version is bumped."""
+        version = DataVersion(ttl=60)
+        etag = version.etag('1', '/home')
+        self.assertEqual(version.etag('1', '/home'), etag)
+        self.assertNotEqual(version.etag('2', '/home'), etag)
+        version.bump()
+        self.assertNotEqual(version.etag('1', '/home'), etag)
+
+    def test_etag_changes_each_period(self):
+        """Test that the ETag changes once the ttl period is over."""
+        version = DataVersion(ttl=60)
+        with patch('models.cache.time.time', return_value=0):
+            etag = version.etag()
+        with patch('models.cache.time.time', return_value=59):
+            self.assertEqual(version.etag(), etag)
+        with patch('models.cache.time.time', return_value=61):
+            self.assertNotEqual(version.etag(), etag)
+
+    def test_last_modified(self):
+        """Test that Last-Modified follows writes and ttl periods."""
+        with patch('models.cache.time.time', return_value=130.5):
+            version = DataVersion(ttl=60)
+            self.assertEqual(version.last_modified().timestamp(), 130)
+        with patch('models.cache.time.time', return_value=185):
+            self.assertEqual(version.last_modified().timestamp(), 180)
+            version.bump()
+            self.assertEqual(version.last_modified().timestamp(), 185)
+
+    def test_commits_with_writes_bump_the_version(self):
+        """Test that only committed writes bump the data version."""
+        class VersionedRow(Base):
+            __tablename__ = 'versioned_rows'
+            id = Column(Integer, primary_key=True)
+
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine, tables=[VersionedRow.__table__])
+        session = Session(bind=engine)
+        try:
+            start = data_version.version
+            session.query(VersionedRow).all()
+            session.commit()
+            self.assertEqual(data_version.version, start)
+
+            session.add(VersionedRow())
+            session.flush()
+            session.rollback()
+            session.commit()
+            self.assertEqual(data_version.version, start)
+
+            session.add(VersionedRow())
+            session.commit()
+            self.assertEqual(data_version.version, start + 1)
+
+            session.execute(insert(VersionedRow.__table__), [{'id': 10}])
+            session.commit()
+            self.assertEqual(data_version.version, start + 2)
+        finally:
+            session.close()
+
+
+class TestVersionedMemo(unittest.TestCase):
+    """ Tests for the VersionedMemo class. """
+
+    def test_recomputes_after_bump_or_new_args(self):
+        """Test that results are reused until the data or args change."""
+        calls = []
+        version = DataVersion(ttl=60)
+        memo = VersionedMemo(lambda value: calls.append(value) or value * 2,
+                             version)
+
+        self.assertEqual(memo(1), 2)
+        self.assertEqual(memo(1), 2)
+        self.assertEqual(calls, [1])
+        version.bump()
+        memo(1)
+        memo(2)
+        self.assertEqual(calls, [1, 1, 2])
+        memo.clear()
+        memo(2)
+        self.assertEqual(calls, [1, 1, 2, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
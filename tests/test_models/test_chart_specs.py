@@ -0,0 +1,215 @@
+import unittest
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+from models.chart_specs import (
+    column_values, bar_traces, pie_trace, hierarchy_trace, figure,
+    figure_json, encode_value
+)
+from models.plot_functions import plot_home_page_charts, build_servicing_charts
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), 'golden_charts.json')
+
+
+def project(number, manager, contract_type, physical, financial):
+    return {
+        "contract_number": number,
+        "physical_progress_percentage": physical,
+        "financial_progress_percentage": financial,
+        "project_manager": manager,
+        "contract_type": contract_type,
+    }
+
+
+# The datasets of the golden charts, which were produced by the
+# plotly_express implementation of plot_functions.
+HOME_CASES = {
+    'decimal': (
+        [
+            project("BCC/001", "Alice", "Works", Decimal("50.00"),
+                    Decimal("60.25")),
+            project("BCC/002", None, "Goods", Decimal("10.00"), None),
+            project("BCC/003", "Bob", "Works", None, Decimal("70.00")),
+            project("BCC/004", "Carol", None, Decimal("99.99"),
+                    Decimal("0.00")),
+            project("BCC/005", "Alice", "Servicing", Decimal("0.50"),
+                    Decimal("12.00")),
+            project("BCC/006", "Bob", "Goods", Decimal("100.00"),
+                    Decimal("100.00")),
+        ],
+        {
+            'by_year': [{'year': '2023', 'number_of_projects': 2},
+                        {'year': '2021', 'number_of_projects': 3},
+                        {'year': '2022', 'number_of_projects': 1}],
+            'by_status': [
+                {'project_status': 'Yet to start', 'number_of_projects': 1},
+                {'project_status': 'Completed', 'number_of_projects': 2},
+                {'project_status': 'Cancelled', 'number_of_projects': 1},
+                {'project_status': 'Stopped', 'number_of_projects': 1},
+                {'project_status': 'Retendered', 'number_of_projects': 1},
+                {'project_status': 'In Progress', 'number_of_projects': 4}],
+            'by_manager': [
+                {'project_manager': 'Carol', 'number_of_projects': 1},
+                {'project_manager': 'Alice', 'number_of_projects': 2},
+                {'project_manager': 'Bob', 'number_of_projects': 2}],
+        },
+    ),
+    'integer': (
+        [
+            project("001", "Alice", "Type A", 50, 60),
+            project("002", "Bob", "Type B", None, 70),
+            project("003", "Alice", "Type A", 80, 90),
+        ],
+        {
+            'by_year': [{'year': 2022, 'number_of_projects': 1},
+                        {'year': 2021, 'number_of_projects': 2}],
+            'by_status': [
+                {'project_status': 'Stopped', 'number_of_projects': 1},
+                {'project_status': 'Completed', 'number_of_projects': 1},
+                {'project_status': 'In Progress', 'number_of_projects': 1}],
+            'by_manager': [
+                {'project_manager': 'Bob', 'number_of_projects': 1},
+                {'project_manager': 'Alice', 'number_of_projects': 2}],
+        },
+    ),
+    'single_group': (
+        [
+            project("A-1", "Dave", None, None, 12.5),
+            project("A-2", "Dave", None, None, 40),
+        ],
+        {'by_year': [], 'by_status': [], 'by_manager': []},
+    ),
+}
+
+SERVICING_DATA = [
+    {
+        "contract_name": "Servicing of Stand 1",
+        "contractor": "Contractor A",
+        "link": "http://example.com/1",
+        "water_progress": Decimal("20.50"),
+        "sewer_progress": None,
+        "roads_progress": Decimal("40.00"),
+        "storm_drainage_progress": Decimal("50.00"),
+        "public_lighting_progress": Decimal("60.00"),
+        "physical_progress_percentage": Decimal("70.00"),
+    },
+    {
+        "contract_name": None,
+        "contractor": None,
+        "link": None,
+        "water_progress": Decimal("10.00"),
+        "sewer_progress": Decimal("20.00"),
+        "roads_progress": Decimal("30.00"),
+        "storm_drainage_progress": Decimal("40.00"),
+        "public_lighting_progress": Decimal("50.00"),
+        "physical_progress_percentage": None,
+    },
+]
+
+
+def load_golden_charts():
+    with open(GOLDEN_FILE) as golden_file:
+        return json.load(golden_file)
+
+
+class TestGoldenCharts(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.golden = load_golden_charts()
+
+    def test_home_page_charts(self):
+        for name, (projects_data, distributions) in HOME_CASES.items():
+            with self.subTest(name):
+                charts = plot_home_page_charts(projects_data, distributions)
+                self.assertEqual(list(charts), self.golden['home'][name])
+
+    def test_servicing_charts(self):
+        self.assertEqual(build_servicing_charts(SERVICING_DATA),
+                         self.golden['servicing'])
+
+    def test_servicing_charts_first_index(self):
+        charts = build_servicing_charts(SERVICING_DATA[:1], first_index=1)
+
+        self.assertEqual(json.loads(charts[0])['layout']['paper_bgcolor'],
+                         'rgba(47, 182, 182, 0.2)')
+
+
+class TestChartSpecs(unittest.TestCase):
+
+    def test_column_values_integers(self):
+        self.assertEqual(column_values([{'a': 1}, {'a': 2}], 'a'), [1, 2])
+
+    def test_column_values_integers_with_nulls_become_floats(self):
+        values = column_values([{'a': 1}, {'a': None}], 'a')
+
+        self.assertEqual(values, [1.0, None])
+        self.assertIsInstance(values[0], float)
+
+    def test_column_values_objects(self):
+        values = column_values(
+            [{'a': Decimal('1.50')}, {'a': float('nan')}, {}], 'a')
+
+        self.assertEqual(values, [Decimal('1.50'), None, None])
+
+    def test_bar_traces_groups_in_order_of_appearance(self):
+        traces = bar_traces(['1', '2', '3', '4'], [1, 2, 3, 4],
+                            ['B', None, 'A', 'B'],
+                            ('x', 'y', 'c'), ['red', 'green', 'blue'])
+
+        self.assertEqual([trace['name'] for trace in traces], ['B', 'A'])
+        self.assertEqual(traces[0]['x'], ['1', '4'])
+        # The null group is dropped but still takes a color.
+        self.assertEqual([trace['marker']['color'] for trace in traces],
+                         ['red', 'blue'])
+
+    def test_bar_traces_empty(self):
+        self.assertEqual(bar_traces([], [], [], ('x', 'y', 'c'), ['red']),
+                         [])
+
+    def test_pie_trace(self):
+        trace = pie_trace(['2021'], [3], ('year', 'count'))
+
+        self.assertEqual(trace['labels'], ['2021'])
+        self.assertEqual(trace['values'], [3])
+        self.assertEqual(trace['type'], 'pie')
+
+    def test_hierarchy_trace_sorts_and_sums(self):
+        trace = hierarchy_trace('sunburst', ['b', 'a', 'b'], [1, 2, 3],
+                                ('name', 'count'))
+
+        self.assertEqual(trace['ids'], ['a', 'b'])
+        self.assertEqual(trace['values'], [2, 4])
+        self.assertNotIn('marker', trace)
+
+    def test_hierarchy_trace_colors(self):
+        trace = hierarchy_trace('treemap', ['a', 'b', 'c'], [1, 1, 1],
+                                ('name', 'count'), ['red', 'green', 'blue'],
+                                color_map={'b': 'black'})
+
+        self.assertEqual(trace['marker']['colors'],
+                         ['green', 'black', 'blue'])
+        self.assertEqual(trace['customdata'], [['a'], ['b'], ['c']])
+
+    def test_figure_json_adds_template(self):
+        chart = json.loads(figure_json(figure([], {'title': {'text': 't'}})))
+
+        self.assertEqual(list(chart['layout']), ['template', 'title'])
+        self.assertIn('data', chart['layout']['template'])
+
+    def test_encode_value(self):
+        self.assertEqual(encode_value(Decimal('1.50')), 1.5)
+        self.assertIsNone(encode_value(Decimal('NaN')))
+        self.assertEqual(encode_value(date(2024, 1, 2)), '2024-01-02')
+        self.assertEqual(encode_value(datetime(2024, 1, 2, 3)),
+                         '2024-01-02T03:00:00')
+        self.assertEqual(encode_value(np.int64(3)), 3)
+        self.assertEqual(encode_value(np.array([1, 2])), [1, 2])
+        with self.assertRaises(TypeError):
+            encode_value(object())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import unittest
+from unittest.mock import patch
+from models.cache import DataVersion
+from models.chart_store import HomeChartStore
+from models.decorators import data_fingerprint
+
+
+PROJECTS_DATA = [
+    {"id": 1, "contract_number": "001", "physical_progress_percentage": 50},
+    {"id": 2, "contract_number": "002", "physical_progress_percentage": 70},
+]
+
+CHARTS = ("{}", "{}", "{}", "{}", "{}")
+
+
+@patch('models.chart_store.plot_home_page_charts', return_value=CHARTS)
+@patch('models.chart_store.ProjectsData.projects_data_to_dict_list')
+class TestHomeChartStore(unittest.TestCase):
+    """ Tests for the HomeChartStore class. """
+
+    def test_get_charts_builds_once(self, mock_data, mock_plot):
+        """Test that the charts are built on first use and then reused."""
+        mock_data.return_value = PROJECTS_DATA
+        store = HomeChartStore()
+
+        self.assertEqual(store.get_charts(), CHARTS)
+        self.assertEqual(store.get_charts(), CHARTS)
+
+        mock_plot.assert_called_once_with(PROJECTS_DATA)
+        self.assertEqual(store.fingerprint, data_fingerprint(PROJECTS_DATA))
+
+    def test_stale_version_is_rebuilt_in_the_background(
+            self, mock_data, mock_plot):
+        """Test that a new data version does not plot on the request."""
+        mock_data.return_value = PROJECTS_DATA
+        version = DataVersion()
+        store = HomeChartStore(version)
+        store.get_charts()
+
+        with patch.object(store, 'schedule_rebuild') as mock_schedule:
+            store.get_charts()
+            mock_schedule.assert_not_called()
+
+            version.bump()
+            self.assertEqual(store.get_charts(), CHARTS)
+            mock_schedule.assert_called_once_with()
+        mock_data.assert_called_once()
+        mock_plot.assert_called_once()
+
+    def test_first_build_runs_once(self, mock_data, mock_plot):
+        """Test that concurrent first calls share a single build."""
+        mock_data.return_value = PROJECTS_DATA
+        store = HomeChartStore()
+        threads = [threading.Thread(target=store.get_charts)
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        mock_plot.assert_called_once()
+
+    def test_rebuild_skips_unchanged_data(self, mock_data, mock_plot):
+        """Test that plotting is skipped when the data has not changed."""
+        mock_data.return_value = PROJECTS_DATA
+        store = HomeChartStore()
+
+        self.assertTrue(store.rebuild())
+        self.assertFalse(store.rebuild())
+
+        mock_data.return_value = PROJECTS_DATA[:1]
+        self.assertTrue(store.rebuild())
+        self.assertEqual(mock_plot.call_count, 2)
+
+    def test_schedule_rebuild_runs_in_background(self, mock_data, mock_plot):
+        """Test that a scheduled rebuild runs off the calling thread."""
+        mock_data.return_value = PROJECTS_DATA
+        store = HomeChartStore()
+
+        store.schedule_rebuild()
+        worker = store._worker
+        if worker is not None:
+            worker.join(timeout=5)
+
+        self.assertEqual(store.charts, CHARTS)
+        mock_plot.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
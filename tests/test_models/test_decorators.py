@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timezone
+from flask import Flask, flash
+from models.decorators import conditional_get, data_fingerprint, not_modified
+from models.cache import data_version
+
+
+class TestConditionalGet(unittest.TestCase):
+    """ Tests for the conditional_get decorator. """
+
+    def setUp(self):
+        self.calls = []
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+
+        @self.app.route('/page')
+        @conditional_get
+        def page():
+            self.calls.append(True)
+            return 'page'
+
+        @self.app.route('/flash')
+        def flash_message():
+            flash('Saved')
+            return 'ok'
+
+        self.client = self.app.test_client()
+        patcher = patch('flask_login.utils._get_user')
+        self.mock_get_user = patcher.start()
+        self.mock_get_user.return_value.get_id.return_value = '1'
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_page_is_not_rendered(self):
+        """Test that a matching ETag gets a 304 without calling the view."""
+        etag = self.client.get('/page').headers['ETag']
+
+        response = self.client.get('/page', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_write_changes_etag(self):
+        """Test that bumping the data version invalidates the ETag."""
+        etag = self.client.get('/page').headers['ETag']
+        data_version.bump()
+
+        response = self.client.get('/page', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        """Test that different users get different ETags."""
+        etag = self.client.get('/page').headers['ETag']
+        self.mock_get_user.return_value.get_id.return_value = '2'
+
+        response = self.client.get('/page', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_role(self):
+        """Test that a page cached for one role is not reused for another."""
+        self.mock_get_user.return_value.role = 'admin'
+        etag = self.client.get('/page').headers['ETag']
+        self.mock_get_user.return_value.role = 'user'
+
+        response = self.client.get('/page', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_flash_is_rendered(self):
+        """Test that pages with pending flash messages are always rendered."""
+        etag = self.client.get('/page').headers['ETag']
+        self.client.get('/flash')
+
+        response = self.client.get('/page', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+
+
+
+class TestValidators(unittest.TestCase):
+    """ Tests for the data_fingerprint and not_modified helpers. """
+
+    LAST_MODIFIED = datetime(2024, 7, 1, 12, 0, tzinfo=timezone.utc)
+
+    def test_data_fingerprint(self):
+        """Test that the fingerprint follows the data, not key order."""
+        self.assertEqual(data_fingerprint({'a': 1, 'b': 2}),
+                         data_fingerprint({'b': 2, 'a': 1}))
+        self.assertNotEqual(data_fingerprint({'a': 1}),
+                            data_fingerprint({'a': 2}))
+
+    def test_not_modified(self):
+        """Test If-None-Match first, then If-Modified-Since."""
+        app = Flask(__name__)
+        cases = [
+            ({'If-None-Match': '"abc"'}, True),
+            ({'If-None-Match': '"xyz"',
+              'If-Modified-Since': 'Mon, 01 Jul 2024 12:00:00 GMT'}, False),
+            ({'If-Modified-Since': 'Mon, 01 Jul 2024 12:00:00 GMT'}, True),
+            ({'If-Modified-Since': 'Mon, 01 Jul 2024 11:59:59 GMT'}, False),
+            ({}, False),
+        ]
+        for headers, expected in cases:
+            with self.subTest(headers):
+                with app.test_request_context(headers=headers):
+                    self.assertEqual(
+                        not_modified('abc', self.LAST_MODIFIED), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
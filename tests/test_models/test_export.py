@@ -0,0 +1,48 @@
+import unittest
+import json
+from datetime import date
+from decimal import Decimal
+from models.export import json_default, ndjson_lines, csv_lines
+
+
+ROWS = [
+    {"id": 1, "contract_number": "C1", "contract_value": Decimal("10.50"),
+     "early_start_date": date(2024, 1, 31)},
+    {"id": 2, "contract_number": "C2, Phase 2", "contract_value": None,
+     "early_start_date": None},
+]
+
+
+class TestExport(unittest.TestCase):
+    """ Tests for the streaming export helpers. """
+
+    def test_json_default(self):
+        """Test that dates and decimals are serialised without loss."""
+        self.assertEqual(json_default(date(2024, 1, 31)), "2024-01-31")
+        self.assertEqual(json_default(Decimal("10.50")), "10.50")
+        with self.assertRaises(TypeError):
+            json_default(object())
+
+    def test_ndjson_lines(self):
+        """Test that every row becomes one JSON document per line."""
+        lines = list(ndjson_lines(ROWS))
+
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(all(line.endswith("\n") for line in lines))
+        self.assertEqual(json.loads(lines[0])["contract_value"], "10.50")
+        self.assertEqual(json.loads(lines[0])["early_start_date"],
+                         "2024-01-31")
+        self.assertIsNone(json.loads(lines[1])["early_start_date"])
+
+    def test_csv_lines(self):
+        """Test that a header is written followed by one line per row."""
+        columns = ["id", "contract_number", "early_start_date"]
+        lines = list(csv_lines(columns, ROWS))
+
+        self.assertEqual(lines[0], "id,contract_number,early_start_date\r\n")
+        self.assertEqual(lines[1], "1,C1,2024-01-31\r\n")
+        self.assertEqual(lines[2], '2,"C2, Phase 2",\r\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
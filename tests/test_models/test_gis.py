@@ -5,10 +5,36 @@ from models.gis import (
     Activity,
     ResponsiblePerson,
     Task,
+    GISHierarchy,
     gis_data_to_dict_list
 )
 
 
+def gis_row(kind, id, name, output_id=None, responsible_person_id=None,
+            activity_id=None, designation=None, percentage_of_activity=None):
+    """Builds a row in the shape returned by GISHierarchy.query."""
+    return {
+        "kind": kind, "id": id, "name": name, "output_id": output_id,
+        "responsible_person_id": responsible_person_id,
+        "activity_id": activity_id, "designation": designation,
+        "percentage_of_activity": percentage_of_activity
+    }
+
+
+GIS_ROWS = [
+    gis_row("output", 1, "Mapping"),
+    gis_row("output", 2, "Training"),
+    gis_row("activity", 1, "Field Survey", output_id=1,
+            responsible_person_id=1),
+    gis_row("activity", 2, "Digitising", output_id=1),
+    gis_row("responsible_person", 1, "John Doe", designation="Engineer"),
+    gis_row("task", 1, "Prepare maps", activity_id=1,
+            percentage_of_activity=60),
+    gis_row("task", 2, "Collect points", activity_id=1,
+            percentage_of_activity=40),
+]
+
+
 class TestGISModels(unittest.TestCase):
     """ Tests for the GIS models and their methods. """
 
@@ -71,6 +97,76 @@ class TestGISModels(unittest.TestCase):
         self.assertEqual(result[0]["task_description"], "Prepare maps")
         mock_gis_task_data_to_dict_list.assert_called_once()
 
+    def test_gis_hierarchy_tree(self):
+        """Test that GISHierarchy links activities and tasks to their parents."""
+        hierarchy = GISHierarchy(GIS_ROWS)
+        mapping = hierarchy.outputs[1]
+        self.assertEqual([a["activity_name"] for a in mapping["activities"]],
+                         ["Field Survey", "Digitising"])
+        self.assertEqual(len(hierarchy.activities[1]["tasks"]), 2)
+        self.assertEqual(hierarchy.outputs[2]["activities"], [])
+
+    def test_gis_hierarchy_flat_join(self):
+        """Test that the flat view matches the outer join of gis_data_to_dict_list."""
+        gis_data = GISHierarchy(GIS_ROWS).gis_data()
+        self.assertEqual(len(gis_data), 4)
+        self.assertEqual(gis_data[0], {
+            "output_id": 1, "output_name": "Mapping",
+            "activity": "Field Survey", "responsible_person": "John Doe",
+            "designation": "Engineer", "task_description": "Prepare maps",
+            "percentage_of_activity": 60
+        })
+        self.assertIsNone(gis_data[2]["responsible_person"])
+        self.assertIsNone(gis_data[2]["task_description"])
+        self.assertIsNone(gis_data[3]["activity"])
+
+    def test_gis_hierarchy_lookup_lists(self):
+        """Test that the lookup lists use the keys of the model methods."""
+        hierarchy = GISHierarchy(GIS_ROWS)
+        self.assertEqual(hierarchy.output_list()[0],
+                         {"output_id": 1, "output_name": "Mapping"})
+        self.assertEqual(hierarchy.activity_list()[1], {
+            "activity_id": 2, "activity_name": "Digitising",
+            "output_id": 1, "responsible_person_id": None
+        })
+        self.assertEqual(hierarchy.responsible_person_list(), [{
+            "responsible_person_id": 1,
+            "responsible_person_name": "John Doe",
+            "designation": "Engineer"
+        }])
+        self.assertEqual(hierarchy.task_list()[1], {
+            "task_id": 2, "task_description": "Collect points",
+            "percentage_of_activity": 40, "activity_id": 1
+        })
+
+    def test_grouped_outputs_are_not_split(self):
+        """Test that rows arriving out of order still form one group per output."""
+        rows = [
+            gis_row("output", 2, "Training"),
+            gis_row("activity", 3, "Workshop", output_id=2),
+            gis_row("output", 1, "Mapping"),
+            gis_row("activity", 1, "Field Survey", output_id=1),
+            gis_row("activity", 4, "Printing", output_id=2),
+        ]
+        grouped = GISHierarchy(rows).grouped_outputs()
+        self.assertEqual([output["output_name"] for output in grouped],
+                         ["Training", "Mapping"])
+        self.assertEqual([row["activity"] for row in grouped[0]["rows"]],
+                         ["Workshop", "Printing"])
+
+    def test_grouped_outputs_completion(self):
+        """Test the per-activity and per-output completion totals."""
+        grouped = GISHierarchy(GIS_ROWS).grouped_outputs()
+        mapping, training = grouped
+
+        self.assertEqual(
+            [a["percentage_total"] for a in mapping["activities"]], [100, 0])
+        self.assertEqual(mapping["percentage_total"], 100)
+        self.assertEqual(mapping["completion"], 50)
+        self.assertEqual(len(mapping["rows"]), 3)
+        self.assertEqual(training["completion"], 0)
+        self.assertEqual(len(training["rows"]), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import unittest
+from unittest.mock import patch
+from datetime import date
+from decimal import Decimal
+from models.guarantee_expiry import (
+    ExpiryTimeline, expiring_guarantees, guarantee_digest, format_digest
+)
+
+TODAY = date(2024, 7, 1)
+
+
+def guarantee(project_id, guarantee_type, expiry_date, value=None):
+    return {
+        'project_id': project_id,
+        'contract_number': f'BCC/{project_id:03}',
+        'contract_name': None,
+        'project_status': 'In Progress',
+        'project_manager': 'Ann',
+        'section': 'Roads',
+        'guarantee_value': None if value is None else Decimal(value),
+        'expiry_date': expiry_date,
+        'guarantee': guarantee_type,
+    }
+
+
+def timelines():
+    return {
+        'performance': ExpiryTimeline([
+            guarantee(1, 'performance', date(2024, 6, 1), '100.00'),
+            guarantee(2, 'performance', date(2024, 7, 1), '200.00'),
+            guarantee(3, 'performance', date(2024, 7, 31)),
+            guarantee(4, 'performance', date(2024, 12, 1), '400.00'),
+        ]),
+        'advance_payment': ExpiryTimeline([
+            guarantee(2, 'advance_payment', date(2024, 7, 5), '50.00'),
+            guarantee(5, 'advance_payment', date(2024, 8, 1), '60.00'),
+        ]),
+    }
+
+
+class TestExpiryTimeline(unittest.TestCase):
+    """ Tests for binary search window queries over a timeline. """
+
+    def setUp(self):
+        self.timeline = timelines()['performance']
+
+    def test_window_includes_both_ends(self):
+        rows = self.timeline.window(date(2024, 7, 1), date(2024, 7, 31))
+
+        self.assertEqual([row['project_id'] for row in rows], [2, 3])
+
+    def test_open_ended_windows(self):
+        self.assertEqual(
+            [row['project_id']
+             for row in self.timeline.window(end=date(2024, 6, 30))], [1])
+        self.assertEqual(len(self.timeline.window(date(2024, 8, 1))), 1)
+        self.assertEqual(len(self.timeline.window()), 4)
+
+    def test_empty_and_inverted_windows(self):
+        self.assertEqual(ExpiryTimeline([]).window(TODAY, TODAY), [])
+        self.assertEqual(
+            self.timeline.window(date(2024, 8, 1), date(2024, 7, 1)), [])
+
+    def test_totals(self):
+        self.assertEqual(self.timeline.totals(end=date(2024, 7, 31)),
+                         {'count': 3, 'value': Decimal('300.00')})
+
+
+@patch('models.guarantee_expiry.expiry_timelines', side_effect=timelines)
+class TestExpiringGuarantees(unittest.TestCase):
+    """ Tests for the expiring guarantee queries and digest. """
+
+    def test_merges_types_by_expiry_date(self, mock_timelines):
+        rows = expiring_guarantees(30, TODAY)
+
+        self.assertEqual(
+            [(row['guarantee'], row['project_id'], row['days_to_expiry'])
+             for row in rows],
+            [('performance', 2, 0), ('advance_payment', 2, 4),
+             ('performance', 3, 30)])
+
+    def test_filters_and_expired(self, mock_timelines):
+        rows = expiring_guarantees(0, TODAY, guarantee='performance',
+                                   include_expired=True)
+
+        self.assertEqual([row['days_to_expiry'] for row in rows], [-30, 0])
+
+    def test_invalid_arguments(self, mock_timelines):
+        with self.assertRaises(ValueError):
+            expiring_guarantees(-1, TODAY)
+        with self.assertRaises(ValueError):
+            expiring_guarantees(30, TODAY, guarantee='bid')
+
+    def test_digest(self, mock_timelines):
+        digest = guarantee_digest(TODAY)
+
+        self.assertEqual(digest['windows'], [7, 30, 90])
+        self.assertEqual(digest['guarantees']['performance'], {
+            'expired': {'count': 1, 'value': Decimal('100.00')},
+            'within_7_days': {'count': 1, 'value': Decimal('200.00')},
+            'within_30_days': {'count': 2, 'value': Decimal('200.00')},
+            'within_90_days': {'count': 2, 'value': Decimal('200.00')},
+        })
+        self.assertEqual(
+            digest['guarantees']['advance_payment']['within_90_days'],
+            {'count': 2, 'value': Decimal('110.00')})
+        self.assertEqual([row['project_id']
+                          for row in digest['expiring_soon']], [2, 2])
+
+    def test_format_digest(self, mock_timelines):
+        report = format_digest(guarantee_digest(TODAY))
+
+        self.assertIn('Guarantee expiry digest for 2024-07-01', report)
+        self.assertIn('Advance payment guarantees:', report)
+        self.assertIn('2024-07-05  BCC/002', report)
+        self.assertIn('50.00', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import patch
+from flask import Flask, render_template_string
+from models.engine.database import engine
+from models import metrics
+from models.metrics import (
+    RequestMetrics, EndpointStats, percentile, timed, current_metrics
+)
+
+
+class TestRequestMetrics(unittest.TestCase):
+    """ Tests for the RequestMetrics class. """
+
+    def test_add_query_keeps_the_slowest_statement(self):
+        """Test that query counts, totals and the slowest query are kept."""
+        request_metrics = RequestMetrics()
+        request_metrics.add_query("SELECT 1", 0.002)
+        request_metrics.add_query("SELECT 2", 0.005)
+        request_metrics.add_query("SELECT 3", 0.001)
+
+        self.assertEqual(request_metrics.query_count, 3)
+        self.assertAlmostEqual(request_metrics.sql_time, 0.008)
+        self.assertEqual(request_metrics.slowest_query, "SELECT 2")
+
+    def test_server_timing(self):
+        """Test that the Server-Timing value lists every timing in ms."""
+        request_metrics = RequestMetrics()
+        request_metrics.add_query("SELECT 1", 0.0025)
+        request_metrics.timings['plotly'] += 0.004
+
+        header = request_metrics.server_timing()
+
+        self.assertIn('db;dur=2.50;desc="1 queries"', header)
+        self.assertIn('db-slowest;dur=2.50', header)
+        self.assertIn('plotly;dur=4.00', header)
+        self.assertIn('total;dur=', header)
+        self.assertNotIn('SELECT', header)
+
+    def test_timed_outside_a_request_is_ignored(self):
+        """Test that timed and current_metrics work without a request."""
+        with timed('plotly'):
+            pass
+        self.assertIsNone(current_metrics())
+
+
+class TestEndpointStats(unittest.TestCase):
+    """ Tests for the EndpointStats class. """
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 90), 90)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summary(self):
+        """Test that samples are summarised per endpoint, slowest first."""
+        stats = EndpointStats(sample_size=3)
+        for duration in (0.010, 0.020, 0.030, 0.040):
+            request_metrics = RequestMetrics()
+            request_metrics.add_query("SELECT {}".format(duration), duration)
+            stats.record('home.index', request_metrics, duration)
+        stats.record('api.projects_data', RequestMetrics(), 0.001)
+
+        summary = stats.summary()
+
+        self.assertEqual([row['endpoint'] for row in summary],
+                         ['home.index', 'api.projects_data'])
+        home = summary[0]
+        self.assertEqual(home['count'], 3)
+        self.assertAlmostEqual(home['p50'], 30)
+        self.assertAlmostEqual(home['p99'], 40)
+        self.assertEqual(home['queries'], 1)
+        self.assertEqual(home['slowest_query'], "SELECT 0.04")
+        self.assertIsNone(summary[1]['slowest_query'])
+
+
+class TestRequestHooks(unittest.TestCase):
+    """ Tests for the hooks registered by metrics.init_app. """
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        metrics.init_app(self.app)
+
+        @self.app.route('/page')
+        def page():
+            with engine.connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+            return render_template_string("{{ value }}", value=1)
+
+    def test_request_gets_server_timing_and_is_recorded(self):
+        """Test that a request is timed and recorded for its endpoint."""
+        stats = EndpointStats()
+        with patch('models.metrics.endpoint_stats', stats):
+            response = self.app.test_client().get('/page')
+
+        header = response.headers['Server-Timing']
+        self.assertIn('desc="1 queries"', header)
+        self.assertIn('render;dur=', header)
+        summary = stats.summary()
+        self.assertEqual(summary[0]['endpoint'], 'page')
+        self.assertEqual(summary[0]['count'], 1)
+        self.assertEqual(summary[0]['queries'], 1)
+        self.assertEqual(summary[0]['slowest_query'], "SELECT 1")
+
+
+    def test_application_registers_the_hooks_once(self):
+        """Test that the dashboard records each request once."""
+        from app import app
+
+        hooks = [hook.__name__ for hook in app.after_request_funcs[None]]
+        self.assertEqual(hooks.count('finish_request_metrics'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
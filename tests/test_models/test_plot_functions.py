@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 import json
 from datetime import datetime
+from decimal import Decimal
 from models.plot_functions import today_date, plot_home_page_charts, plot_servicing_page_charts
 
 
@@ -48,7 +49,19 @@ class TestPlotFunctions(unittest.TestCase):
             },
         ]
 
-        graph1JSON, graph2JSON, graph3JSON, graph4JSON, graph5JSON = plot_home_page_charts()
+        distributions = {
+            'by_year': [{'year': 2022, 'number_of_projects': 1},
+                        {'year': 2021, 'number_of_projects': 2}],
+            'by_status': [{'project_status': 'Stopped', 'number_of_projects': 1},
+                          {'project_status': 'Completed', 'number_of_projects': 1},
+                          {'project_status': 'In Progress', 'number_of_projects': 1}],
+            'by_manager': [{'project_manager': 'Bob', 'number_of_projects': 1},
+                           {'project_manager': 'Alice', 'number_of_projects': 2}],
+        }
+
+        with patch('models.plot_functions.home_distributions',
+                   return_value=distributions):
+            graph1JSON, graph2JSON, graph3JSON, graph4JSON, graph5JSON = plot_home_page_charts()
 
         self.assertIsInstance(graph1JSON, str)
         self.assertIsInstance(graph2JSON, str)
@@ -60,6 +73,12 @@ class TestPlotFunctions(unittest.TestCase):
         self.assertIn('data', graph1)
         self.assertEqual(len(graph1['data']), 1)
 
+        graph3 = json.loads(graph3JSON)
+        self.assertEqual(graph3['data'][0]['labels'], [2021, 2022])
+        self.assertEqual(graph3['data'][0]['values'], [2, 1])
+        graph5 = json.loads(graph5JSON)
+        self.assertEqual(graph5['data'][0]['labels'], ['Alice', 'Bob'])
+
     @patch('models.projects.ContractType.contract_type_data_dict')
     def test_plot_servicing_page_charts(self, mock_contract_data):
         mock_contract_data.return_value = [
@@ -95,6 +114,47 @@ class TestPlotFunctions(unittest.TestCase):
         chart1 = json.loads(servicing_charts[0])
         self.assertIn('data', chart1)
 
+    @patch('models.projects.ContractType.contract_type_data_dict')
+    def test_plot_servicing_page_charts_values(self, mock_contract_data):
+        mock_contract_data.return_value = [
+            {
+                "contract_name": "Contract 1",
+                "contractor": "Contractor A",
+                "link": "http://example.com",
+                "water_progress": Decimal("20.50"),
+                "sewer_progress": None,
+                "roads_progress": Decimal("40.00"),
+                "storm_drainage_progress": Decimal("50.00"),
+                "public_lighting_progress": Decimal("60.00"),
+                "physical_progress_percentage": Decimal("70.00")
+            },
+            {
+                "contract_name": "Contract 2",
+                "contractor": "Contractor B",
+                "link": "http://example.com/2",
+                "water_progress": Decimal("10.00"),
+                "sewer_progress": Decimal("20.00"),
+                "roads_progress": Decimal("30.00"),
+                "storm_drainage_progress": Decimal("40.00"),
+                "public_lighting_progress": Decimal("50.00"),
+                "physical_progress_percentage": Decimal("60.00")
+            }
+        ]
+
+        chart1, chart2 = [json.loads(chart)
+                          for chart in plot_servicing_page_charts()]
+
+        self.assertEqual([trace['name'] for trace in chart1['data']],
+                         ["Water", "Sewer", "Roads", "Storm Drainage",
+                          "Public Lighting", "Total Progress"])
+        self.assertEqual([trace['y'][0] for trace in chart1['data']],
+                         [20.5, None, 40.0, 50.0, 60.0, 70.0])
+        self.assertEqual(chart1['layout']['title']['text'], "Contract 1")
+        self.assertEqual(chart2['layout']['title']['text'], "Contract 2")
+        self.assertIn("Contractor B", chart2['layout']['xaxis']['title']['text'])
+        self.assertNotEqual(chart1['layout']['paper_bgcolor'],
+                            chart2['layout']['paper_bgcolor'])
+
     @patch('models.projects.ContractType.contract_type_data_dict')
     def test_plot_servicing_page_charts_no_data(self, mock_contract_data):
         mock_contract_data.return_value = []
@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import patch
+from datetime import date
+from decimal import Decimal
+from models.progress_history import (
+    sample_dates, project_progress_curves, section_progress_curves
+)
+
+
+def snapshot(project_id, day, section_id, physical, payments=None):
+    return {
+        'project_id': project_id,
+        'snapshot_date': date(2024, 1, day),
+        'section_id': section_id,
+        'physical_progress_percentage':
+            None if physical is None else Decimal(physical),
+        'financial_progress_percentage': None,
+        'total_certified_interim_payments_to_date':
+            None if payments is None else Decimal(payments),
+    }
+
+
+class TestSampleDates(unittest.TestCase):
+    """ Tests for choosing the dates a curve is sampled at. """
+
+    def test_keeps_change_dates(self):
+        dates = sample_dates([date(2024, 1, 5), date(2024, 1, 3)],
+                             date(2024, 1, 1), date(2024, 1, 31), 10)
+
+        self.assertEqual(dates, [date(2024, 1, 1), date(2024, 1, 3),
+                                 date(2024, 1, 5)])
+
+    def test_downsamples_long_ranges(self):
+        changes = [date(2024, 1, day) for day in range(1, 32)]
+
+        dates = sample_dates(changes, date(2024, 1, 1), date(2024, 1, 31), 4)
+
+        self.assertEqual(dates, [date(2024, 1, 1), date(2024, 1, 11),
+                                 date(2024, 1, 21), date(2024, 1, 31)])
+
+
+class TestProgressCurves(unittest.TestCase):
+    """ Tests for the project and section progress curves. """
+
+    @patch('models.progress_history.load_snapshots')
+    def test_project_curves_carry_values_forward(self, mock_load_snapshots):
+        mock_load_snapshots.return_value = (
+            [snapshot(1, 1, 1, '10.00')],
+            [snapshot(2, 3, 1, '5.00'), snapshot(1, 5, 1, '20.00')],
+        )
+
+        curves = project_progress_curves([1, 2, 1], date(2024, 1, 2),
+                                         date(2024, 1, 9))
+
+        self.assertEqual(mock_load_snapshots.call_args.args,
+                         (date(2024, 1, 2), date(2024, 1, 9), [1, 2]))
+        self.assertEqual(curves[0]['dates'],
+                         ['2024-01-02', '2024-01-03', '2024-01-05'])
+        self.assertEqual(curves[0]['physical_progress_percentage'],
+                         [Decimal('10.00'), Decimal('10.00'),
+                          Decimal('20.00')])
+        self.assertEqual(curves[1]['dates'], ['2024-01-03', '2024-01-05'])
+
+    def test_project_curves_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            project_progress_curves([], date(2024, 1, 1), date(2024, 1, 2))
+        with self.assertRaises(ValueError):
+            project_progress_curves([1], date(2024, 1, 2), date(2024, 1, 1))
+        with self.assertRaises(ValueError):
+            project_progress_curves([1], date(2024, 1, 1), date(2024, 1, 2),
+                                    max_points=1)
+
+    @patch('models.progress_history.Section.fetch_dicts')
+    @patch('models.progress_history.load_snapshots')
+    def test_section_curves(self, mock_load_snapshots, mock_fetch_dicts):
+        mock_fetch_dicts.return_value = [{'id': 1, 'name': 'Water'},
+                                         {'id': 2, 'name': 'Roads'}]
+        mock_load_snapshots.return_value = (
+            [snapshot(1, 1, 1, '10.00', '100.00'),
+             snapshot(2, 1, 1, None, '50.00')],
+            [snapshot(1, 4, 2, '30.00', '300.00')],
+        )
+
+        water, roads = section_progress_curves(date(2024, 1, 2),
+                                               date(2024, 1, 9))
+
+        self.assertEqual(water['section'], 'Water')
+        self.assertEqual(water['dates'], ['2024-01-02', '2024-01-04'])
+        self.assertEqual(water['number_of_projects'], [2, 1])
+        self.assertEqual(water['total_certified_interim_payments_to_date'],
+                         [Decimal('150.00'), Decimal('50.00')])
+        self.assertEqual(water['physical_progress_percentage'],
+                         [Decimal('10.00'), None])
+        self.assertEqual(roads['number_of_projects'], [0, 1])
+        self.assertEqual(roads['physical_progress_percentage'],
+                         [None, Decimal('30.00')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,16 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+from decimal import Decimal
+from models.cache import projects_cache
 from models.projects import (
     Section,
     ProjectManagers,
     ContractType,
-    ProjectsData
+    ProjectsData,
+    ProjectKpiSummary,
+    ProjectProgressSnapshot
 )
+from datetime import date
 
 
 class TestProjectsModels(unittest.TestCase):
@@ -69,16 +74,16 @@ class TestProjectsModels(unittest.TestCase):
 
     def test_projects_data_filtering_by_contract_type(self):
         """
-        Tests that the contract_type_data_dict method filters data correctly
-        based on the contract_type_id.
+        Tests that the contract_type_data_dict method passes the
+        contract_type_id down so the filtering happens in the database.
         """
         with patch('models.projects.ProjectsData.projects_data_to_dict_list') as mock_data:
             mock_data.return_value = [
                 {"contract_number": "CN123", "contract_type_id": 1},
-                {"contract_number": "CN456", "contract_type_id": 2},
             ]
-            
+
             filtered_data = ContractType.contract_type_data_dict(1)
+            mock_data.assert_called_once_with(1)
             self.assertEqual(len(filtered_data), 1)
             self.assertEqual(filtered_data[0]["contract_number"], "CN123")
 
@@ -117,6 +122,271 @@ class TestProjectsModels(unittest.TestCase):
             all_data = ProjectsData.projects_data_to_dict_list()
             self.assertEqual(len(all_data), 2)
 
+    @patch('models.projects.ProjectsData.fetch_dicts', return_value=[])
+    def test_projects_data_is_cached(self, mock_fetch_dicts):
+        """
+        Tests that projects_data_to_dict_list only queries the database
+        once per contract_type_id until the cache is cleared.
+        """
+        projects_cache.clear()
+        try:
+            ProjectsData.projects_data_to_dict_list()
+            ProjectsData.projects_data_to_dict_list()
+            self.assertEqual(mock_fetch_dicts.call_count, 1)
+
+            ProjectsData.projects_data_to_dict_list(1)
+            self.assertEqual(mock_fetch_dicts.call_count, 2)
+
+            projects_cache.clear()
+            ProjectsData.projects_data_to_dict_list()
+            self.assertEqual(mock_fetch_dicts.call_count, 3)
+        finally:
+            projects_cache.clear()
+
+    def test_projects_data_table_invalid_column(self):
+        """
+        Tests that projects_data_table rejects unknown columns and
+        order directions before querying the database.
+        """
+        with self.assertRaises(ValueError):
+            ProjectsData.projects_data_table(order_by="password")
+        with self.assertRaises(ValueError):
+            ProjectsData.projects_data_table(column_filters={"nope": "x"})
+        with self.assertRaises(ValueError):
+            ProjectsData.projects_data_table(order_dir="sideways")
+        with self.assertRaises(ValueError):
+            ProjectsData.projects_data_table(
+                columns=["contract_number", "link"],
+                allowed_columns=ProjectsData.HOME_TABLE_COLUMNS)
+        with self.assertRaises(ValueError):
+            ProjectsData.projects_data_table(
+                column_filters={"tax_clearance_validation": "Valid"},
+                allowed_columns=ProjectsData.HOME_TABLE_COLUMNS)
+
+    @patch('models.projects.ProjectProgressSnapshot.record')
+    @patch('models.projects.ProjectKpiSummary.apply_changes')
+    @patch('models.projects.ProjectKpiSummary.snapshot')
+    @patch('models.projects.projects_changed')
+    @patch('models.projects.session')
+    def test_update_progress(self, mock_session, mock_projects_changed,
+                             mock_snapshot, mock_apply_changes, mock_record):
+        """
+        Tests that update_progress validates every change, applies the
+        valid ones with a single executemany UPDATE, updates the KPI
+        summary and progress snapshots and invalidates the cache once.
+        """
+        mock_snapshot.side_effect = [["before"], ["after"]]
+        existing = MagicMock()
+        existing.scalars.return_value = [1, 2]
+        mock_session.execute.side_effect = [existing, None]
+
+        results = ProjectsData.update_progress([
+            {"id": 1, "water_progress": 50.555},
+            {"id": 2, "roads_progress": "20"},
+            {"id": 3, "roads_progress": 10},
+            {"id": 1, "sewer_progress": 101},
+            {"id": 2, "password": "x"},
+        ])
+
+        self.assertEqual([result['status'] for result in results],
+                         ['updated', 'updated', 'not_found', 'invalid',
+                          'invalid'])
+        self.assertEqual(mock_session.execute.call_count, 2)
+        params = mock_session.execute.call_args_list[1].args[1]
+        self.assertEqual(params, [
+            {'project_id': 1,
+             'set_roads_progress': False, 'value_roads_progress': None,
+             'set_water_progress': True,
+             'value_water_progress': Decimal('50.56')},
+            {'project_id': 2,
+             'set_roads_progress': True,
+             'value_roads_progress': Decimal('20.00'),
+             'set_water_progress': False, 'value_water_progress': None},
+        ])
+        mock_apply_changes.assert_called_once_with(["before"], ["after"])
+        mock_record.assert_called_once()
+        mock_session.commit.assert_called_once()
+        mock_projects_changed.assert_called_once()
+
+    @patch('models.projects.session')
+    def test_update_progress_rejects_values_that_are_not_finite(
+            self, mock_session):
+        """
+        Tests that NaN and infinite percentages are reported as invalid
+        instead of failing the range check.
+        """
+        results = ProjectsData.update_progress([
+            {"id": 1, "water_progress": "NaN"},
+            {"id": 1, "water_progress": "sNaN"},
+            {"id": 1, "water_progress": "-Infinity"},
+        ])
+
+        self.assertEqual([result['status'] for result in results],
+                         ['invalid'] * 3)
+        self.assertEqual(results[0]['error'],
+                         'water_progress is not a number')
+        mock_session.execute.assert_not_called()
+
+    @patch('models.projects.projects_changed')
+    @patch('models.projects.session')
+    def test_update_progress_error(self, mock_session, mock_projects_changed):
+        """
+        Tests that a failed update is rolled back and reported for
+        every change in the batch.
+        """
+        mock_session.execute.side_effect = Exception("Database error")
+
+        results = ProjectsData.update_progress([{"id": 1,
+                                                 "water_progress": 1}])
+
+        mock_session.rollback.assert_called_once()
+        self.assertEqual(results[0]['status'], 'error')
+        mock_projects_changed.assert_not_called()
+
+
+class TestProjectKpiSummary(unittest.TestCase):
+    """ Tests for the ProjectKpiSummary class. """
+
+    def project(self, **values):
+        project = {
+            'section_id': 1, 'contract_type_id': 2,
+            'project_manager_id': 3, 'year': '2024',
+            'contract_value_including_ten_percent_contingency':
+                Decimal('1000.00'),
+            'total_certified_interim_payments_to_date': Decimal('100.00'),
+            'physical_progress_percentage': Decimal('50.00'),
+            'financial_progress_percentage': None,
+        }
+        project.update(values)
+        return project
+
+    def test_contribution(self):
+        """
+        Tests that progress is weighted by contract value and skipped
+        when either is missing.
+        """
+        key, amounts = ProjectKpiSummary.contribution(self.project())
+
+        self.assertEqual(key, (1, 2, 3, '2024'))
+        self.assertEqual(amounts['number_of_projects'], 1)
+        self.assertEqual(amounts['physical_progress_weighted'],
+                         Decimal('50000.0000'))
+        self.assertEqual(amounts['physical_progress_weight'],
+                         Decimal('1000.00'))
+        self.assertEqual(amounts['financial_progress_weight'], 0)
+
+    @patch('models.projects.session')
+    def test_apply_changes_writes_only_changed_groups(self, mock_session):
+        """
+        Tests that a changed project updates its group by the difference
+        and that moving a project to a new group inserts that group.
+        """
+        mock_session.execute.return_value.scalar.side_effect = [7, None]
+        before = self.project()
+        after = self.project(physical_progress_percentage=Decimal('60.00'))
+        moved = self.project(year='2025')
+
+        ProjectKpiSummary.apply_changes([before, before],
+                                        [after, moved])
+
+        statements = [str(call.args[0])
+                      for call in mock_session.execute.call_args_list]
+        self.assertEqual(len(statements), 4)
+        self.assertTrue(statements[1].startswith('UPDATE project_kpi_summary'))
+        self.assertIn('number_of_projects=(project_kpi_summary.'
+                      'number_of_projects', statements[1])
+        self.assertTrue(statements[3].startswith(
+            'INSERT INTO project_kpi_summary'))
+
+    @patch('models.projects.ProjectsData.fetch_dicts')
+    def test_summary(self, mock_fetch_dicts):
+        """
+        Tests that the summary computes the weighted progress and drops
+        empty groups.
+        """
+        mock_fetch_dicts.return_value = [
+            {'section': 'Water', 'number_of_projects': 2,
+             'contract_value': Decimal('3000.00'),
+             'certified_payments': Decimal('100.00'),
+             'physical_progress_weighted': Decimal('120000.0000'),
+             'physical_progress_weight': Decimal('3000.00'),
+             'financial_progress_weighted': 0,
+             'financial_progress_weight': 0},
+            {'section': 'Projects', 'number_of_projects': 0,
+             'contract_value': 0, 'certified_payments': 0,
+             'physical_progress_weighted': 0, 'physical_progress_weight': 0,
+             'financial_progress_weighted': 0,
+             'financial_progress_weight': 0},
+        ]
+
+        summary = ProjectKpiSummary.summary(('section',))
+
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(summary[0]['physical_progress'], Decimal('40.00'))
+        self.assertIsNone(summary[0]['financial_progress'])
+        with self.assertRaises(ValueError):
+            ProjectKpiSummary.summary(('colour',))
+
+
+class TestProjectProgressSnapshot(unittest.TestCase):
+    """ Tests for the ProjectProgressSnapshot class. """
+
+    def project(self, project_id, progress):
+        return {'project_id': project_id, 'section_id': 1,
+                'physical_progress_percentage': Decimal(progress),
+                'financial_progress_percentage': None,
+                'total_certified_interim_payments_to_date': None}
+
+    @patch('models.projects.session')
+    @patch('models.projects.ProjectProgressSnapshot.latest')
+    @patch('models.projects.ProjectsData.fetch_dicts')
+    def test_record_writes_only_changes(self, mock_fetch_dicts, mock_latest,
+                                        mock_session):
+        """
+        Tests that unchanged projects are skipped, a project already
+        snapshotted that day is updated and the others are inserted.
+        """
+        today = date(2024, 5, 2)
+        mock_fetch_dicts.return_value = [
+            self.project(1, '10.00'), self.project(2, '20.00'),
+            self.project(3, '30.00'), self.project(4, '40.00')]
+        mock_latest.return_value = [
+            dict(self.project(1, '10.00'), snapshot_date=date(2024, 5, 1)),
+            dict(self.project(2, '15.00'), snapshot_date=date(2024, 5, 1)),
+            dict(self.project(3, '25.00'), snapshot_date=today),
+        ]
+
+        count = ProjectProgressSnapshot.record(ProjectsData.id > 0, today)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(mock_latest.call_args.args,
+                         ([1, 2, 3, 4], date(2024, 5, 3)))
+        insert_call, update_call = mock_session.execute.call_args_list
+        self.assertTrue(str(insert_call.args[0]).startswith(
+            'INSERT INTO project_progress_snapshot'))
+        self.assertEqual([row['project_id'] for row in insert_call.args[1]],
+                         [2, 4])
+        self.assertEqual(insert_call.args[1][0]['snapshot_date'], today)
+        self.assertTrue(str(update_call.args[0]).startswith(
+            'UPDATE project_progress_snapshot'))
+        self.assertEqual(update_call.args[1][0]['match_project_id'], 3)
+        mock_session.commit.assert_not_called()
+
+    @patch('models.projects.session')
+    @patch('models.projects.ProjectsData.fetch_dicts', return_value=[])
+    def test_record_without_projects(self, mock_fetch_dicts, mock_session):
+        """Tests that nothing is written when no project matches."""
+        self.assertEqual(ProjectProgressSnapshot.record(), 0)
+        mock_session.execute.assert_not_called()
+
+    @patch('models.projects.session')
+    @patch('models.projects.ProjectProgressSnapshot.record',
+           side_effect=Exception('boom'))
+    def test_capture_error(self, mock_record, mock_session):
+        """Tests that a failed capture is rolled back."""
+        self.assertIsNone(ProjectProgressSnapshot.capture())
+        mock_session.rollback.assert_called_once()
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
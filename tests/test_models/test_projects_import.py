@@ -0,0 +1,222 @@
+import io
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from models.projects import ProjectsData
+from models.projects_import import (
+    ProjectsImport, RowError, coerce_value, import_projects_data, read_rows
+)
+
+COLUMNS = ProjectsData.__table__.columns
+
+NAMES = {
+    'contract_type': {'servicing': 1, 'works': 4},
+    'project_manager': {'ann': 1, 'bob': None},
+    'section': {'projects': 1},
+}
+
+
+class TestCoerceValue(unittest.TestCase):
+    """ Tests for the coerce_value function. """
+
+    def test_dates(self):
+        """Test that ISO and day/month/year dates are accepted."""
+        column = COLUMNS['early_start_date']
+        self.assertEqual(coerce_value(column, '2024-03-01'), date(2024, 3, 1))
+        self.assertEqual(coerce_value(column, '01/03/2024'), date(2024, 3, 1))
+        with self.assertRaises(RowError):
+            coerce_value(column, 'March')
+
+    def test_decimals(self):
+        """Test that decimals are rounded to the column scale."""
+        column = COLUMNS['physical_progress_percentage']
+        self.assertEqual(coerce_value(column, '55.555'), Decimal('55.56'))
+        self.assertEqual(coerce_value(column, '1,000'), Decimal('1000.00'))
+        with self.assertRaises(RowError):
+            coerce_value(column, 'abc')
+        with self.assertRaises(RowError):
+            coerce_value(column, '1e9')
+        with self.assertRaises(RowError):
+            coerce_value(column, '1e30')
+        with self.assertRaises(RowError):
+            coerce_value(column, '99999999.999')
+
+    def test_integers_and_strings(self):
+        """Test whole numbers and string lengths."""
+        self.assertEqual(coerce_value(COLUMNS['section_id'], '2'), 2)
+        with self.assertRaises(RowError):
+            coerce_value(COLUMNS['section_id'], '2.5')
+        self.assertEqual(coerce_value(COLUMNS['year'], 2024.0), '2024')
+        with self.assertRaises(RowError):
+            coerce_value(COLUMNS['year'], 'x' * 21)
+
+    def test_empty_values(self):
+        """Test that empty cells are None unless the column is required."""
+        self.assertIsNone(coerce_value(COLUMNS['contract_name'], ' '))
+        with self.assertRaises(RowError):
+            coerce_value(COLUMNS['contract_number'], '')
+
+
+class TestProjectsImport(unittest.TestCase):
+    """ Tests for the ProjectsImport class. """
+
+    def test_invalid_headers(self):
+        """Test that unknown columns and a missing contract number fail."""
+        projects_import = ProjectsImport()
+        with self.assertRaises(ValueError):
+            projects_import.parse_header(['contract_number', 'colour'])
+        with self.assertRaises(ValueError):
+            projects_import.parse_header(['contract_name'])
+
+    def test_unsupported_file_type(self):
+        """Test that only CSV and Excel files are read."""
+        with self.assertRaises(ValueError):
+            read_rows(io.BytesIO(b''), 'projects.txt')
+
+    def test_corrupt_workbook(self):
+        """Test that a file that is not a workbook fails cleanly."""
+        with self.assertRaisesRegex(ValueError, 'not a valid Excel'):
+            import_projects_data(io.BytesIO(b'contract_number\nC1\n'),
+                                 'projects.xlsx')
+
+    @patch('models.projects_import.ProjectProgressSnapshot.record')
+    @patch('models.projects_import.ProjectKpiSummary.apply_changes')
+    @patch('models.projects_import.ProjectKpiSummary.snapshot')
+    @patch('models.projects_import.projects_changed')
+    @patch('models.projects_import.lookup_maps', return_value=NAMES)
+    @patch('models.projects_import.session')
+    def test_decode_error_keeps_the_rows_read(
+            self, mock_session, mock_lookup_maps, mock_projects_changed,
+            mock_snapshot, mock_apply_changes, mock_record):
+        """Test that rows before an undecodable byte are imported."""
+        mock_session.execute.return_value.scalars.return_value = []
+        # More rows than the text wrapper decodes at once, so the first
+        # ones are read before the bad byte is decoded.
+        csv_file = io.BytesIO(
+            b"contract_number,contract_type_id,project_manager_id,"
+            b"section_id\n"
+            + b"".join(b"C%d,1,1,1\n" % number for number in range(1000))
+            + b"C\xff,1,1,1\n"
+        )
+
+        result = import_projects_data(csv_file, 'projects.csv',
+                                      chunk_size=300)
+
+        # The rows decoded with the bad byte are not read either.
+        self.assertGreater(result['inserted'], 0)
+        self.assertEqual(result['error_count'], 1)
+        self.assertEqual(result['errors'][0]['row'], result['inserted'] + 2)
+        self.assertIn('could not be read', result['errors'][0]['error'])
+        mock_projects_changed.assert_called_once()
+
+    @patch('models.projects_import.projects_changed')
+    @patch('models.projects_import.lookup_maps', return_value=NAMES)
+    @patch('models.projects_import.session')
+    def test_changes_are_published_on_failure(
+            self, mock_session, mock_lookup_maps, mock_projects_changed):
+        """Test that written chunks invalidate the cache on an error."""
+        projects_import = ProjectsImport(chunk_size=1)
+
+        def write_chunk(records, row_numbers):
+            if projects_import.inserted:
+                raise KeyboardInterrupt
+            projects_import.inserted += len(records)
+
+        projects_import.write_chunk = write_chunk
+        rows = [('contract_number',), ('C1',), ('C2',)]
+
+        with self.assertRaises(KeyboardInterrupt):
+            projects_import.run(rows)
+        mock_projects_changed.assert_called_once()
+
+    @patch('models.projects_import.ProjectProgressSnapshot.record')
+    @patch('models.projects_import.ProjectKpiSummary.apply_changes')
+    @patch('models.projects_import.ProjectKpiSummary.snapshot')
+    @patch('models.projects_import.projects_changed')
+    @patch('models.projects_import.lookup_maps', return_value=NAMES)
+    @patch('models.projects_import.session')
+    def test_import_inserts_and_updates(self, mock_session, mock_lookup_maps,
+                                        mock_projects_changed, mock_snapshot,
+                                        mock_apply_changes, mock_record):
+        """Test that rows are upserted on contract number in chunks."""
+        existing = MagicMock()
+        existing.scalars.return_value = ['C1']
+        mock_session.execute.side_effect = [existing, None, None]
+        csv_file = io.BytesIO(
+            b"id,contract_number,contract_name,contract_type,"
+            b"project_manager,section,water_progress\n"
+            b"7,C1,Updated,Servicing,Ann,Projects,12.5\n"
+            b",C2,New,works,ann,projects,\n"
+            b",C3,Bad,Goods,Ann,Projects,1\n"
+            b",C4,Shared,Works,Bob,Projects,1\n"
+            b",C5,Orphan,,,,\n"
+        )
+
+        result = import_projects_data(csv_file, 'projects.csv')
+
+        self.assertEqual(result['inserted'], 1)
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual([error['row'] for error in result['errors']],
+                         [4, 5, 6])
+        insert_call, update_call = mock_session.execute.call_args_list[1:]
+        self.assertEqual(insert_call.args[1], [{
+            'contract_number': 'C2', 'contract_name': 'New',
+            'water_progress': None, 'contract_type_id': 4,
+            'project_manager_id': 1, 'section_id': 1,
+        }])
+        self.assertEqual(update_call.args[1][0]['match_contract_number'],
+                         'C1')
+        self.assertEqual(update_call.args[1][0]['water_progress'],
+                         Decimal('12.50'))
+        self.assertNotIn('id', update_call.args[1][0])
+        mock_apply_changes.assert_called_once()
+        mock_record.assert_called_once()
+        mock_session.commit.assert_called_once()
+        mock_projects_changed.assert_called_once()
+
+    @patch('models.projects_import.ProjectProgressSnapshot.record')
+    @patch('models.projects_import.ProjectKpiSummary.apply_changes')
+    @patch('models.projects_import.ProjectKpiSummary.snapshot')
+    @patch('models.projects_import.projects_changed')
+    @patch('models.projects_import.lookup_maps', return_value=NAMES)
+    @patch('models.projects_import.session')
+    def test_blank_names_keep_the_keys_of_a_chunk(
+            self, mock_session, mock_lookup_maps, mock_projects_changed,
+            mock_snapshot, mock_apply_changes, mock_record):
+        """Test that a blank name is written as None, not left out."""
+        existing = MagicMock()
+        existing.scalars.return_value = ['C1', 'C2']
+        mock_session.execute.side_effect = [existing, None]
+        rows = [('contract_number', 'project_manager'), ('C1', ''),
+                ('C2', 'Ann')]
+
+        result = ProjectsImport().run(rows)
+
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(mock_session.execute.call_args_list[1].args[1], [
+            {'contract_number': 'C1', 'project_manager_id': None,
+             'match_contract_number': 'C1'},
+            {'contract_number': 'C2', 'project_manager_id': 1,
+             'match_contract_number': 'C2'},
+        ])
+
+    @patch('models.projects_import.projects_changed')
+    @patch('models.projects_import.lookup_maps', return_value=NAMES)
+    @patch('models.projects_import.session')
+    def test_failed_chunk_is_rolled_back(self, mock_session, mock_lookup_maps,
+                                         mock_projects_changed):
+        """Test that a chunk that cannot be written is reported."""
+        mock_session.execute.side_effect = Exception("Database error")
+        rows = [('contract_number', 'contract_type_id'), ('C1', '1')]
+
+        result = ProjectsImport().run(rows)
+
+        mock_session.rollback.assert_called_once()
+        self.assertEqual(result['error_count'], 1)
+        self.assertEqual(result['errors'][0]['row'], 2)
+        mock_projects_changed.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+from unittest.mock import patch
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from models.cache import projects_cache
+from models.schedule_risk import (
+    DATE_COLUMNS, NUMBER_COLUMNS, TEXT_COLUMNS, analyse_schedules,
+    day_numbers, numbers, schedule_risk
+)
+
+TODAY = date(2024, 7, 1)
+
+
+def project(project_id, **values):
+    row = {name: None for name in DATE_COLUMNS + NUMBER_COLUMNS + TEXT_COLUMNS}
+    row.update(id=project_id, contract_number=f'BCC/{project_id:03}',
+               project_status='In Progress')
+    row.update(values)
+    return row
+
+
+def columns(*projects):
+    """Builds the arrays load_schedule_columns returns from projects."""
+    result = {'id': np.array([row['id'] for row in projects], dtype=np.int64)}
+    for name in DATE_COLUMNS:
+        result[name] = day_numbers([row[name] for row in projects])
+    for name in NUMBER_COLUMNS:
+        result[name] = numbers([row[name] for row in projects])
+    for name in TEXT_COLUMNS:
+        result[name] = np.array([row[name] for row in projects], dtype=object)
+    return result
+
+
+# Half way through a 200 day schedule, at 20% physical progress.
+BEHIND = project(1, early_start_date=date(2024, 3, 23),
+                 early_finish_date=date(2024, 10, 9),
+                 physical_progress_percentage=Decimal('20.00'))
+# On schedule, finish taken from the contract duration.
+ON_TIME = project(2, early_start_date=date(2024, 6, 3),
+                  contract_duration_weeks=Decimal('10.00'),
+                  physical_progress_percentage=Decimal('40.00'),
+                  performance_guarantee_expiry_date=date(2024, 7, 15))
+# Extended by 70 days and 20 days past the extended finish.
+OVERDUE = project(3, early_start_date=date(2024, 1, 1),
+                  early_finish_date=date(2024, 4, 2),
+                  extension_of_time=date(2024, 6, 11),
+                  physical_progress_percentage=Decimal('90.00'),
+                  advance_payment_guarantee_expiry_date=date(2024, 6, 1))
+COMPLETED = project(4, early_start_date=date(2023, 1, 1),
+                    early_finish_date=date(2023, 6, 1),
+                    project_status='Completed',
+                    performance_guarantee_expiry_date=date(2024, 6, 1))
+NO_DATES = project(5, physical_progress_percentage=Decimal('5.00'))
+
+
+class TestAnalyseSchedules(unittest.TestCase):
+    """ Tests for the vectorised schedule analysis. """
+
+    def setUp(self):
+        self.analysis = analyse_schedules(
+            columns(BEHIND, ON_TIME, OVERDUE, COMPLETED, NO_DATES), TODAY)
+
+    def values(self, name):
+        return [None if isinstance(value, float) and np.isnan(value)
+                else value for value in self.analysis[name].tolist()]
+
+    def test_expected_progress_from_elapsed_time(self):
+        self.assertEqual(self.values('expected_progress'),
+                         [50.0, 40.0, 100.0, 100.0, None])
+        self.assertEqual(self.values('progress_gap'),
+                         [30.0, 0.0, 10.0, None, None])
+        self.assertEqual(self.values('days_behind'),
+                         [60.0, 0.0, 16.0, None, None])
+
+    def test_planned_finish_and_extension(self):
+        self.assertEqual(self.values('days_to_finish'),
+                         [100.0, 42.0, -20.0, -396.0, None])
+        self.assertEqual(self.values('extension_days'),
+                         [None, None, 70.0, None, None])
+
+    def test_guarantee_days_to_expiry(self):
+        self.assertEqual(
+            self.values('performance_guarantee_days_to_expiry'),
+            [None, 14.0, None, -30.0, None])
+        self.assertEqual(
+            self.values('advance_payment_guarantee_days_to_expiry'),
+            [None, None, -30.0, None, None])
+
+    def test_slippage_scores_and_risk_levels(self):
+        # 0.6 * 10 + 0.25 * 20 / 162 * 100 + 0.15 * 70 / 92 * 100
+        self.assertEqual(self.values('slippage_score'),
+                         [18.0, 0.0, 20.5, None, None])
+        self.assertEqual(self.values('risk_level'),
+                         ['low', 'low', 'medium', 'closed', 'unknown'])
+
+    def test_empty_portfolio(self):
+        analysis = analyse_schedules(columns(), TODAY)
+
+        self.assertEqual(len(analysis['slippage_score']), 0)
+
+
+class TestScheduleRisk(unittest.TestCase):
+    """ Tests for the schedule risk report. """
+
+    def setUp(self):
+        projects_cache.clear()
+        self.addCleanup(projects_cache.clear)
+        patcher = patch('models.schedule_risk.load_schedule_columns')
+        self.mock_load = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_load.return_value = columns(
+            BEHIND, ON_TIME, OVERDUE, COMPLETED, NO_DATES)
+
+    def test_projects_ordered_by_slippage_score(self):
+        risk = schedule_risk(TODAY)
+
+        self.assertEqual(risk['as_of'], '2024-07-01')
+        self.assertEqual([row['id'] for row in risk['projects']], [3, 1, 2])
+        self.assertEqual(risk['projects'][0]['planned_finish'], '2024-06-11')
+        self.assertEqual(risk['projects'][0]['contract_number'], 'BCC/003')
+        self.assertIsNone(
+            risk['projects'][0]['performance_guarantee_days_to_expiry'])
+
+    def test_summary(self):
+        summary = schedule_risk(TODAY)['summary']
+
+        self.assertEqual(summary['number_of_projects'], 5)
+        self.assertEqual(summary['by_risk_level'], {
+            'high': 0, 'medium': 1, 'low': 2, 'unknown': 1, 'closed': 1})
+        self.assertEqual(summary['overdue'], 1)
+        self.assertEqual(summary['mean_progress_gap'], 13.33)
+        # The guarantee of the completed project is not counted.
+        self.assertEqual(summary['performance_guarantees'],
+                         {'expired': 0, 'expiring': 1})
+        self.assertEqual(summary['advance_payment_guarantees'],
+                         {'expired': 1, 'expiring': 0})
+
+    def test_limit_and_risk_level(self):
+        self.assertEqual(
+            [row['id'] for row in schedule_risk(TODAY, limit=1)['projects']],
+            [3])
+        self.assertEqual(
+            [row['id'] for row in
+             schedule_risk(TODAY, risk_level='unknown')['projects']], [5])
+
+    def test_analysis_is_cached(self):
+        schedule_risk(TODAY)
+        schedule_risk(TODAY, limit=1)
+
+        self.mock_load.assert_called_once_with()
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            schedule_risk(TODAY, limit=0)
+        with self.assertRaises(ValueError):
+            schedule_risk(TODAY, risk_level='severe')
+
+
+if __name__ == '__main__':
+    unittest.main()
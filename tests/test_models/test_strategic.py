@@ -1,9 +1,11 @@
 import unittest
+from unittest.mock import patch
+from datetime import date
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from models.base import Base
 from models.projects import ProjectManagers
-from models.strategic import StrategicTask
+from models.strategic import StrategicTask, parse_deadline
 
 
 class TestStrategicTask(unittest.TestCase):
@@ -30,7 +32,7 @@ class TestStrategicTask(unittest.TestCase):
         task = StrategicTask(
             status="Pending",
             priority="High",
-            deadline="2024-12-31",
+            deadline=date(2024, 12, 31),
             task="Implement feature X",
             description="Description of the task",
             assigned_to=self.pm.id,
@@ -50,7 +52,7 @@ class TestStrategicTask(unittest.TestCase):
         task = StrategicTask(
             status="Pending",
             priority="High",
-            deadline="2024-12-31",
+            deadline=date(2024, 12, 31),
             task="Implement feature X",
             description="Description of the task",
             assigned_to=self.pm.id,
@@ -67,5 +69,124 @@ class TestStrategicTask(unittest.TestCase):
         StrategicTask.strategic_tasks_to_dict_list()
 
 
+
+class TestParseDeadline(unittest.TestCase):
+    """ Tests for parsing the free-text deadlines. """
+
+    def test_formats(self):
+        self.assertEqual(parse_deadline('2024-07-31'),
+                         (date(2024, 7, 31), False))
+        self.assertEqual(parse_deadline('31/07/2024'),
+                         (date(2024, 7, 31), False))
+        self.assertEqual(parse_deadline('1st July, 2024'),
+                         (date(2024, 7, 1), False))
+        self.assertEqual(parse_deadline(' Jul 1 2024 '),
+                         (date(2024, 7, 1), False))
+
+    def test_month_first_only_when_not_day_first(self):
+        self.assertEqual(parse_deadline('02/16/2024'),
+                         (date(2024, 2, 16), False))
+
+    def test_ambiguous_slashed_date_is_read_day_first(self):
+        self.assertEqual(parse_deadline('03/04/2024'),
+                         (date(2024, 4, 3), True))
+        self.assertEqual(parse_deadline('05/05/2024'),
+                         (date(2024, 5, 5), False))
+
+    def test_not_a_date(self):
+        self.assertEqual(parse_deadline('Monthly'), (None, False))
+        self.assertEqual(parse_deadline(''), (None, False))
+
+
+class TestDeadlineQueries(unittest.TestCase):
+    """ Tests for the deadline queries, on an in-memory database. """
+
+    TODAY = date(2024, 7, 3)  # A Wednesday.
+
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.addCleanup(self.session.close)
+        for target in ('models.strategic.session', 'models.base.session'):
+            patcher = patch(target, self.session)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        manager = ProjectManagers(name="Jane Doe", section="Roads")
+        self.session.add(manager)
+        self.session.commit()
+        for status, deadline in [
+                ('In Progress', date(2024, 7, 1)),
+                ('Complete', date(2024, 6, 1)),
+                ('Not Started', date(2024, 7, 7)),
+                ('In Progress', date(2024, 7, 8)),
+                (None, date(2024, 7, 3)),
+                ('Not Started', None)]:
+            self.session.add(StrategicTask(
+                status=status, priority='High', deadline=deadline,
+                task=f'Task due {deadline}', description=None,
+                assigned_to=manager.id, deliverables=None,
+                percentage_done=0, fixed_cost=None, estimated_hours=None,
+                actual_hours=None))
+        self.session.commit()
+
+    def test_overdue_tasks(self):
+        rows = StrategicTask.deadline_tasks('overdue', today=self.TODAY)
+
+        self.assertEqual([row['deadline'] for row in rows],
+                         [date(2024, 7, 1)])
+        self.assertEqual(rows[0]['project_manager'], 'Jane Doe')
+
+    def test_due_this_week(self):
+        rows = StrategicTask.deadline_tasks('this_week', today=self.TODAY)
+
+        self.assertEqual([row['deadline'] for row in rows],
+                         [date(2024, 7, 3), date(2024, 7, 7)])
+
+    def test_status_filter(self):
+        rows = StrategicTask.deadline_tasks(status='Not Started',
+                                            today=self.TODAY)
+
+        self.assertEqual(len(rows), 2)
+
+    def test_invalid_due_filter(self):
+        with self.assertRaises(ValueError):
+            StrategicTask.deadline_tasks('soon')
+
+    def test_deadline_summary(self):
+        summary = StrategicTask.deadline_summary(self.TODAY)
+
+        self.assertEqual(summary, [
+            {'status': None, 'number_of_tasks': 1, 'overdue': 0,
+             'due_this_week': 1},
+            {'status': 'Complete', 'number_of_tasks': 1, 'overdue': 0,
+             'due_this_week': 0},
+            {'status': 'In Progress', 'number_of_tasks': 2, 'overdue': 1,
+             'due_this_week': 0},
+            {'status': 'Not Started', 'number_of_tasks': 2, 'overdue': 0,
+             'due_this_week': 1},
+        ])
+
+    def test_backfill_deadlines(self):
+        tasks = self.session.query(StrategicTask).order_by(
+            StrategicTask.task_id).all()
+        for task, text in zip(tasks, ['31/07/2024', '03/04/2024',
+                                      'Monthly']):
+            task.deadline, task.deadline_text = None, text
+        self.session.commit()
+
+        result = StrategicTask.backfill_deadlines(chunk_size=1)
+
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(result['unparsed'], [
+            {'task_id': tasks[2].task_id, 'deadline_text': 'Monthly'}])
+        self.assertEqual([row['task_id'] for row in result['ambiguous']],
+                         [tasks[1].task_id])
+        self.session.expire_all()
+        self.assertEqual([task.deadline for task in tasks[:3]],
+                         [date(2024, 7, 31), date(2024, 4, 3), None])
+
+
 if __name__ == '__main__':
     unittest.main()
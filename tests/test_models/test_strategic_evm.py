@@ -0,0 +1,180 @@
+import unittest
+import math
+from unittest.mock import patch
+from datetime import date
+from decimal import Decimal
+from models.strategic_evm import (
+    cents, deadline_days, task_amounts, compute_evm, strategic_evm,
+    _evm_memo
+)
+
+TODAY = date(2024, 7, 1)
+
+
+def tasks(*rows):
+    """Builds the lists load_tasks returns from task tuples."""
+    names = ('task_id', 'project_manager', 'section', 'deadline',
+             'percentage_done', 'fixed_cost', 'estimated_hours',
+             'actual_hours')
+    result = {name: [row[position] for row in rows]
+              for position, name in enumerate(names)}
+    result['task'] = [f'Task {task_id}' for task_id in result['task_id']]
+    result['status'] = ['In Progress'] * len(rows)
+    return result
+
+
+TASKS = tasks(
+    # Due, half done, on budget so far.
+    (1, 'Ann', 'Roads', date(2024, 6, 30), Decimal('50.00'),
+     Decimal('1000.00'), Decimal('10.00'), Decimal('5.00')),
+    # Not due yet, a quarter done at half the hours.
+    (2, 'Ann', 'Roads', date(2024, 12, 31), Decimal('25.00'),
+     Decimal('400.00'), Decimal('20.00'), Decimal('10.00')),
+    # No deadline date, so not scheduled.
+    (3, 'Bob', 'Water', None, Decimal('100.00'), Decimal('300.00'),
+     Decimal('3.00'), Decimal('2.00')),
+    # No fixed cost, so not costed.
+    (4, 'Bob', None, date(2024, 1, 1), Decimal('10.00'), None,
+     Decimal('8.00'), Decimal('8.00')),
+)
+
+
+class TestTaskAmounts(unittest.TestCase):
+    """ Tests for the vectorised earned value amounts. """
+
+    def test_cents_are_exact(self):
+        self.assertEqual(cents([Decimal('0.07'), None, Decimal('12.345')])
+                         .tolist(), [7, 0, 1234])
+
+    def test_deadline_days(self):
+        days = deadline_days([TODAY, None])
+
+        self.assertEqual(days[0], TODAY.toordinal())
+        self.assertTrue(math.isnan(days[1]))
+
+    def test_amounts(self):
+        amounts = task_amounts(TASKS, TODAY)
+
+        self.assertEqual(amounts['budget_at_completion'].tolist(),
+                         [100000, 40000, 30000, 0])
+        self.assertEqual(amounts['earned_value'].tolist(),
+                         [50000, 10000, 30000, 0])
+        self.assertEqual(amounts['actual_cost'].tolist(),
+                         [50000, 20000, 20000, 0])
+        self.assertEqual(amounts['planned_value'].tolist(),
+                         [100000, 0, 0, 0])
+        self.assertEqual(amounts['costed'].tolist(),
+                         [True, True, True, False])
+        self.assertEqual(amounts['scheduled'].tolist(),
+                         [True, True, False, False])
+
+
+class TestComputeEvm(unittest.TestCase):
+    """ Tests for the task, group and total earned value metrics. """
+
+    @classmethod
+    def setUpClass(cls):
+        with patch('models.strategic_evm.load_tasks', return_value=TASKS):
+            cls.evm = compute_evm(TODAY)
+
+    def test_task_metrics(self):
+        task = self.evm['tasks'][1]
+
+        self.assertEqual(task['task_id'], 2)
+        self.assertEqual(task['earned_value'], Decimal('100.00'))
+        self.assertEqual(task['cost_variance'], Decimal('-100.00'))
+        self.assertEqual(task['cost_performance_index'], 0.5)
+        self.assertIsNone(task['schedule_performance_index'])
+        self.assertEqual(task['estimate_at_completion'], Decimal('800.00'))
+        self.assertEqual(task['estimate_to_complete'], Decimal('600.00'))
+        self.assertEqual(task['variance_at_completion'], Decimal('-400.00'))
+
+    def test_uncosted_task(self):
+        task = self.evm['tasks'][3]
+
+        self.assertFalse(task['costed'])
+        self.assertIsNone(task['cost_performance_index'])
+        self.assertEqual(task['estimate_at_completion'], Decimal('0.00'))
+
+    def test_group_metrics(self):
+        ann, bob = self.evm['by_project_manager']
+
+        self.assertEqual(ann['project_manager'], 'Ann')
+        self.assertEqual(ann['number_of_tasks'], 2)
+        self.assertEqual(ann['budget_at_completion'], Decimal('1400.00'))
+        self.assertEqual(ann['cost_performance_index'], 0.857)
+        # Only the earned value of scheduled tasks counts towards SPI.
+        self.assertEqual(ann['schedule_performance_index'], 0.6)
+        self.assertEqual(bob['costed_tasks'], 1)
+        self.assertEqual(bob['scheduled_tasks'], 0)
+        self.assertEqual([row['section'] for row in self.evm['by_section']],
+                         ['Roads', 'Water', None])
+
+    def test_totals(self):
+        totals = self.evm['totals']
+
+        self.assertEqual(totals['number_of_tasks'], 4)
+        self.assertEqual(totals['earned_value'], Decimal('900.00'))
+        self.assertEqual(totals['actual_cost'], Decimal('900.00'))
+        self.assertEqual(totals['cost_performance_index'], 1.0)
+        self.assertEqual(totals['schedule_variance'], Decimal('-400.00'))
+
+    def test_no_tasks(self):
+        with patch('models.strategic_evm.load_tasks',
+                   return_value=tasks()):
+            evm = compute_evm(TODAY)
+
+        self.assertEqual(evm['tasks'], [])
+        self.assertEqual(evm['by_section'], [])
+        self.assertEqual(evm['totals']['number_of_tasks'], 0)
+
+
+    def test_large_budget_does_not_overflow(self):
+        large = tasks((5, 'Ann', 'Roads', date(2024, 12, 31),
+                       Decimal('50.00'), Decimal('50000000.00'),
+                       Decimal('10.00'), Decimal('6.00')))
+        with patch('models.strategic_evm.load_tasks', return_value=large):
+            task = compute_evm(TODAY)['tasks'][0]
+
+        self.assertEqual(task['actual_cost'], Decimal('30000000.00'))
+        self.assertEqual(task['estimate_at_completion'],
+                         Decimal('60000000.00'))
+        self.assertEqual(task['variance_at_completion'],
+                         Decimal('-10000000.00'))
+
+    def test_earned_value_without_spend(self):
+        unspent = tasks((6, 'Ann', 'Roads', date(2024, 12, 31),
+                         Decimal('20.00'), Decimal('500.00'),
+                         Decimal('10.00'), None))
+        with patch('models.strategic_evm.load_tasks', return_value=unspent):
+            task = compute_evm(TODAY)['tasks'][0]
+
+        self.assertEqual(task['earned_value'], Decimal('100.00'))
+        self.assertIsNone(task['cost_performance_index'])
+        self.assertEqual(task['estimate_at_completion'], Decimal('500.00'))
+        self.assertEqual(task['estimate_to_complete'], Decimal('500.00'))
+
+
+class TestStrategicEvm(unittest.TestCase):
+    """ Tests for memoising the earned value metrics. """
+
+    def setUp(self):
+        _evm_memo.clear()
+        self.addCleanup(_evm_memo.clear)
+
+    @patch('models.strategic_evm.load_tasks', return_value=TASKS)
+    def test_memoised_against_data_version(self, mock_load_tasks):
+        first = strategic_evm(TODAY)
+
+        self.assertIs(strategic_evm(TODAY), first)
+        mock_load_tasks.assert_called_once_with()
+
+    @patch('models.strategic_evm.session')
+    @patch('models.strategic_evm.load_tasks', side_effect=Exception('down'))
+    def test_database_error(self, mock_load_tasks, mock_session):
+        self.assertIsNone(strategic_evm(TODAY))
+        mock_session.rollback.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
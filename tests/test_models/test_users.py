@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from models.users import Users
+from models.cache import user_cache
+
+
+class TestUsersGetCached(unittest.TestCase):
+    """ Tests for the Users.get_cached method. """
+
+    def setUp(self):
+        user_cache.clear()
+
+    def tearDown(self):
+        user_cache.clear()
+
+    @patch('models.users.session')
+    def test_user_is_loaded_once(self, mock_session):
+        """Test that a loaded user is detached and served from the cache."""
+        user = MagicMock(role="admin")
+        mock_session.get.return_value = user
+
+        self.assertIs(Users.get_cached(1), user)
+        self.assertIs(Users.get_cached(1), user)
+
+        mock_session.get.assert_called_once_with(Users, 1)
+        mock_session.expunge.assert_called_once_with(user)
+
+    @patch('models.users.session')
+    def test_missing_user_is_not_cached(self, mock_session):
+        """Test that a lookup for a missing user is retried."""
+        mock_session.get.return_value = None
+
+        self.assertIsNone(Users.get_cached(2))
+        self.assertIsNone(Users.get_cached(2))
+        self.assertEqual(mock_session.get.call_count, 2)
+
+    @patch('models.users.session')
+    def test_invalidated_user_is_reloaded(self, mock_session):
+        """Test that invalidating a user forces a reload."""
+        mock_session.get.side_effect = [MagicMock(), MagicMock()]
+
+        first = Users.get_cached(3)
+        user_cache.invalidate(3)
+        second = Users.get_cached(3)
+
+        self.assertIsNot(first, second)
+
+    @patch('models.users.session')
+    def test_database_error_returns_none(self, mock_session):
+        """Test that a database error rolls back and returns None."""
+        mock_session.get.side_effect = Exception("Database error")
+
+        self.assertIsNone(Users.get_cached(4))
+        mock_session.rollback.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,492 @@
+import unittest
+from unittest.mock import patch
+from werkzeug.datastructures import MultiDict
+from app import app
+from models.projects import ProjectsData
+from routes.routes_APIs import (
+    datatables_args, MAX_PAGE_LENGTH, MAX_PROGRESS_CHANGES
+)
+from models.progress_history import MAX_POINTS
+from datetime import date
+
+
+class TestDatatablesArgs(unittest.TestCase):
+    """ Tests for parsing DataTables server-side parameters. """
+
+    def test_parses_columns_order_and_search(self):
+        args = MultiDict({
+            'draw': '3',
+            'start': '20',
+            'length': '10',
+            'columns[0][data]': 'contract_number',
+            'columns[0][search][value]': '',
+            'columns[1][data]': 'project_manager',
+            'columns[1][search][value]': 'Ann',
+            'order[0][column]': '1',
+            'order[0][dir]': 'desc',
+            'search[value]': 'road',
+        })
+
+        result = datatables_args(args)
+
+        self.assertEqual(result['start'], 20)
+        self.assertEqual(result['length'], 10)
+        self.assertEqual(result['columns'],
+                         ['contract_number', 'project_manager'])
+        self.assertEqual(result['column_filters'], {'project_manager': 'Ann'})
+        self.assertEqual(result['order_by'], 'project_manager')
+        self.assertEqual(result['order_dir'], 'desc')
+        self.assertEqual(result['search'], 'road')
+        self.assertIsNone(result['after_id'])
+
+    def test_defaults_and_length_cap(self):
+        result = datatables_args(MultiDict({'length': '-1'}))
+
+        self.assertEqual(result['start'], 0)
+        self.assertEqual(result['length'], MAX_PAGE_LENGTH)
+        self.assertEqual(result['order_by'], 'id')
+        self.assertIsNone(result['columns'])
+        self.assertIsNone(result['search'])
+
+
+class TestProjectsDataTableRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.ProjectsData.projects_data_table')
+    @patch('flask_login.utils._get_user')
+    def test_returns_datatables_response(self, mock_get_user, mock_table):
+        mock_get_user.return_value.is_authenticated = True
+        mock_table.return_value = (
+            5, 1, [{'contract_number': 'C1', 'early_start_date': None}]
+        )
+
+        response = self.app.get('/api/projects_data/table?draw=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['draw'], 2)
+        self.assertEqual(response.json['recordsTotal'], 5)
+        self.assertEqual(response.json['recordsFiltered'], 1)
+        self.assertEqual(response.json['data'][0]['contract_number'], 'C1')
+
+    @patch('flask_login.utils._get_user')
+    def test_invalid_column_is_rejected(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+
+        response = self.app.get(
+            '/api/projects_data/table?columns[0][data]=password')
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch('routes.routes_APIs.ProjectsData.projects_data_table')
+    @patch('flask_login.utils._get_user')
+    def test_users_only_read_the_home_table_columns(self, mock_get_user,
+                                                    mock_table):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: role == 'user'
+        mock_table.return_value = (0, 0, [])
+
+        self.app.get('/api/projects_data/table')
+
+        self.assertEqual(mock_table.call_args.kwargs['allowed_columns'],
+                         ProjectsData.HOME_TABLE_COLUMNS)
+
+    @patch('flask_login.utils._get_user')
+    def test_users_cannot_read_contract_values(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: role == 'user'
+
+        response = self.app.get(
+            '/api/projects_data/table?columns[0][data]=contract_number'
+            '&columns[1][data]=performance_guarantee_value')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestProjectsSummaryRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.home_distributions')
+    @patch('flask_login.utils._get_user')
+    def test_summary(self, mock_get_user, mock_distributions):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+        mock_distributions.return_value = {'by_year': []}
+
+        response = self.app.get('/api/projects_data/summary')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'by_year': []})
+
+    @patch('routes.routes_APIs.ProjectKpiSummary.summary')
+    @patch('flask_login.utils._get_user')
+    def test_kpi_summary(self, mock_get_user, mock_summary):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+        mock_summary.return_value = [{'section': 'Roads'}]
+
+        response = self.app.get(
+            '/api/projects_data/kpi_summary?group_by=section,year')
+
+        self.assertEqual(response.status_code, 200)
+        mock_summary.assert_called_once_with(('section', 'year'))
+
+    @patch('flask_login.utils._get_user')
+    def test_financial_summaries_are_admin_only(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: role == 'user'
+
+        for path in ('/api/projects_data/summary',
+                     '/api/projects_data/kpi_summary'):
+            with self.subTest(path):
+                response = self.app.get(path)
+                self.assertEqual(response.status_code, 302)
+                self.assertIn('/denied_access', response.location)
+
+
+class TestProgressRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.ProjectsData.update_progress')
+    @patch('flask_login.utils._get_user')
+    def test_applies_changes(self, mock_get_user, mock_update_progress):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+        mock_update_progress.return_value = [
+            {'id': 1, 'status': 'updated'},
+            {'id': 2, 'status': 'not_found', 'error': 'No project'},
+        ]
+        changes = [{'id': 1, 'water_progress': 5},
+                   {'id': 2, 'roads_progress': 6}]
+
+        response = self.app.patch('/api/projects_data/progress',
+                                  json=changes)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['updated'], 1)
+        self.assertEqual(len(response.json['results']), 2)
+        mock_update_progress.assert_called_once_with(changes)
+
+    @patch('routes.routes_APIs.ProjectsData.update_progress')
+    @patch('flask_login.utils._get_user')
+    def test_rejects_invalid_body(self, mock_get_user, mock_update_progress):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+
+        response = self.app.patch('/api/projects_data/progress',
+                                  json={'id': 1})
+        self.assertEqual(response.status_code, 400)
+        response = self.app.patch(
+            '/api/projects_data/progress',
+            json=[{'id': 1}] * (MAX_PROGRESS_CHANGES + 1))
+        self.assertEqual(response.status_code, 400)
+        mock_update_progress.assert_not_called()
+
+    @patch('flask_login.utils._get_user')
+    def test_reports_values_that_are_not_finite(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+
+        response = self.app.patch('/api/projects_data/progress',
+                                  json=[{'id': 1, 'water_progress': 'NaN'}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['updated'], 0)
+        self.assertEqual(response.json['results'][0]['status'], 'invalid')
+
+
+class TestProgressHistoryRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.project_progress_curves')
+    @patch('flask_login.utils._get_user')
+    def test_project_history(self, mock_get_user, mock_curves):
+        mock_get_user.return_value.is_authenticated = True
+        mock_curves.return_value = [{'project_id': 1, 'dates': []}]
+
+        response = self.app.get('/api/projects_data/progress_history'
+                                '?project_id=1,2&start=2024-01-01'
+                                '&end=2024-06-30&max_points=50')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{'project_id': 1, 'dates': []}])
+        mock_curves.assert_called_once_with(
+            [1, 2], start=date(2024, 1, 1), end=date(2024, 6, 30),
+            max_points=50)
+
+    @patch('routes.routes_APIs.section_progress_curves')
+    @patch('flask_login.utils._get_user')
+    def test_section_history_defaults(self, mock_get_user, mock_curves):
+        mock_get_user.return_value.is_authenticated = True
+        mock_curves.return_value = []
+
+        response = self.app.get('/api/sections/progress_history')
+
+        self.assertEqual(response.status_code, 200)
+        kwargs = mock_curves.call_args.kwargs
+        self.assertIsNone(kwargs['section_ids'])
+        self.assertEqual(kwargs['end'], date.today())
+        self.assertEqual(kwargs['max_points'], MAX_POINTS)
+
+    @patch('routes.routes_APIs.section_progress_curves')
+    @patch('routes.routes_APIs.project_progress_curves')
+    @patch('flask_login.utils._get_user')
+    def test_certified_payments_are_for_admins(self, mock_get_user,
+                                               mock_project_curves,
+                                               mock_section_curves):
+        mock_get_user.return_value.is_authenticated = True
+        curve = {'dates': ['2024-01-01'],
+                 'physical_progress_percentage': [10.0],
+                 'financial_progress_percentage': [8.0],
+                 'total_certified_interim_payments_to_date': [1000.0]}
+        mock_project_curves.return_value = [dict(curve, project_id=1)]
+        mock_section_curves.return_value = [dict(curve, section_id=2)]
+        paths = ('/api/projects_data/progress_history?project_id=1',
+                 '/api/sections/progress_history')
+
+        mock_get_user.return_value.has_role = lambda role: role == 'user'
+        for path in paths:
+            with self.subTest(path):
+                response = self.app.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('total_certified_interim_payments_to_date',
+                                 response.json[0])
+                self.assertEqual(
+                    response.json[0]['physical_progress_percentage'], [10.0])
+
+        mock_get_user.return_value.has_role = lambda role: True
+        for path in paths:
+            with self.subTest(path):
+                response = self.app.get(path)
+                self.assertEqual(
+                    response.json[0]
+                    ['total_certified_interim_payments_to_date'], [1000.0])
+
+    @patch('flask_login.utils._get_user')
+    def test_invalid_history_arguments(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+
+        for path in ('/api/projects_data/progress_history?project_id=x',
+                     '/api/projects_data/progress_history',
+                     '/api/sections/progress_history?start=2024-13-01',
+                     '/api/sections/progress_history?start=2024-02-01'
+                     '&end=2024-01-01'):
+            with self.subTest(path):
+                self.assertEqual(self.app.get(path).status_code, 400)
+
+
+class TestScheduleRiskRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.schedule_risk')
+    @patch('flask_login.utils._get_user')
+    def test_schedule_risk(self, mock_get_user, mock_schedule_risk):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+        mock_schedule_risk.return_value = {'as_of': '2024-07-01',
+                                           'summary': {}, 'projects': []}
+
+        response = self.app.get('/api/projects_data/schedule_risk'
+                                '?limit=5&risk_level=high')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['as_of'], '2024-07-01')
+        mock_schedule_risk.assert_called_once_with(limit=5,
+                                                   risk_level='high')
+
+    @patch('flask_login.utils._get_user')
+    def test_invalid_schedule_risk_arguments(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+
+        for query in ('limit=x', 'limit=0', 'risk_level=severe'):
+            with self.subTest(query):
+                response = self.app.get(
+                    '/api/projects_data/schedule_risk?' + query)
+                self.assertEqual(response.status_code, 400)
+
+    @patch('flask_login.utils._get_user')
+    def test_schedule_risk_is_admin_only(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: role == 'user'
+
+        response = self.app.get('/api/projects_data/schedule_risk')
+
+        self.assertEqual(response.status_code, 302)
+
+
+class TestGuaranteeExpiryRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.expiring_guarantees')
+    @patch('flask_login.utils._get_user')
+    def test_guarantee_expiry(self, mock_get_user, mock_expiring):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+        mock_expiring.return_value = [{'project_id': 1,
+                                       'expiry_date': date(2024, 7, 5)}]
+
+        response = self.app.get('/api/projects_data/guarantee_expiry'
+                                '?days=60&guarantee=performance'
+                                '&include_expired=true')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{'project_id': 1,
+                                          'expiry_date': '2024-07-05'}])
+        mock_expiring.assert_called_once_with(
+            days=60, guarantee='performance', include_expired=True)
+
+    @patch('flask_login.utils._get_user')
+    def test_invalid_guarantee_expiry_arguments(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+
+        for query in ('days=x', 'days=-1', 'guarantee=bid'):
+            with self.subTest(query):
+                response = self.app.get(
+                    '/api/projects_data/guarantee_expiry?' + query)
+                self.assertEqual(response.status_code, 400)
+
+    @patch('routes.routes_APIs.guarantee_digest')
+    @patch('flask_login.utils._get_user')
+    def test_guarantee_digest(self, mock_get_user, mock_digest):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+        mock_digest.return_value = {
+            'as_of': '2024-07-01', 'windows': [7], 'guarantees': {},
+            'expiring_soon': [{'expiry_date': date(2024, 7, 2)}]}
+
+        response = self.app.get(
+            '/api/projects_data/guarantee_expiry/digest')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['expiring_soon'],
+                         [{'expiry_date': '2024-07-02'}])
+
+    @patch('flask_login.utils._get_user')
+    def test_guarantees_are_admin_only(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: role == 'user'
+
+        for path in ('/api/projects_data/guarantee_expiry',
+                     '/api/projects_data/guarantee_expiry/digest'):
+            with self.subTest(path):
+                self.assertEqual(self.app.get(path).status_code, 302)
+
+
+class TestStrategicEvmRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.strategic_evm')
+    @patch('flask_login.utils._get_user')
+    def test_strategic_evm(self, mock_get_user, mock_strategic_evm):
+        mock_get_user.return_value.is_authenticated = True
+        mock_strategic_evm.return_value = {'as_of': '2024-07-01',
+                                           'tasks': []}
+
+        response = self.app.get('/api/strategic_tasks/evm')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['as_of'], '2024-07-01')
+
+    @patch('routes.routes_APIs.strategic_evm', return_value=None)
+    @patch('flask_login.utils._get_user')
+    def test_strategic_evm_error(self, mock_get_user, mock_strategic_evm):
+        mock_get_user.return_value.is_authenticated = True
+
+        response = self.app.get('/api/strategic_tasks/evm')
+
+        self.assertEqual(response.status_code, 500)
+
+
+class TestStrategicDeadlineRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_APIs.StrategicTask.deadline_tasks')
+    @patch('flask_login.utils._get_user')
+    def test_strategic_tasks(self, mock_get_user, mock_deadline_tasks):
+        mock_get_user.return_value.is_authenticated = True
+        mock_deadline_tasks.return_value = [
+            {'task_id': 1, 'deadline': date(2024, 7, 1)},
+            {'task_id': 2, 'deadline': None}]
+
+        response = self.app.get(
+            '/api/strategic_tasks?due=overdue&status=In%20Progress')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [
+            {'task_id': 1, 'deadline': '2024-07-01'},
+            {'task_id': 2, 'deadline': None}])
+        mock_deadline_tasks.assert_called_once_with(due='overdue',
+                                                    status='In Progress')
+
+    @patch('flask_login.utils._get_user')
+    def test_invalid_due_filter(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+
+        response = self.app.get('/api/strategic_tasks?due=soon')
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch('routes.routes_APIs.StrategicTask.deadline_summary')
+    @patch('flask_login.utils._get_user')
+    def test_deadline_summary(self, mock_get_user, mock_deadline_summary):
+        mock_get_user.return_value.is_authenticated = True
+        mock_deadline_summary.return_value = [
+            {'status': 'In Progress', 'number_of_tasks': 2, 'overdue': 1,
+             'due_this_week': 0}]
+
+        response = self.app.get('/api/strategic_tasks/deadlines')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['overdue'], 1)
+
+
+class TestExportRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('flask_login.utils._get_user')
+    def test_unknown_export_is_not_found(self, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+
+        self.assertEqual(
+            self.app.get('/api/export/users.csv').status_code, 404)
+        self.assertEqual(
+            self.app.get('/api/export/projects_data.xml').status_code, 404)
+
+    @patch('routes.routes_APIs.stream_rows')
+    @patch('flask_login.utils._get_user')
+    def test_streams_csv(self, mock_get_user, mock_stream_rows):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.has_role = lambda role: True
+        mock_stream_rows.return_value = iter([])
+
+        response = self.app.get('/api/export/gis_data.csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertTrue(response.is_streamed)
+        self.assertTrue(response.get_data(as_text=True)
+                        .startswith('output_id,output_name,'))
+
+
+if __name__ == '__main__':
+    unittest.main()
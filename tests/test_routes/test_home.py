@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+from app import app
+
+CHARTS = ("{}", "{}", "{}", "{}", "{}")
+
+SCHEDULE_RISK = {
+    'summary': {
+        'by_risk_level': {'high': 1, 'medium': 0, 'low': 0},
+        'overdue': 0,
+        'guarantee_warning_days': 30,
+        'performance_guarantees': {'expired': 0, 'expiring': 1},
+        'advance_payment_guarantees': {'expired': 0, 'expiring': 0},
+    },
+    'projects': [{
+        'contract_number': 'C1', 'contract_name': 'Contract 1',
+        'project_manager': 'Ann', 'planned_finish': '2024-12-31',
+        'expected_progress': 50.0, 'physical_progress_percentage': 10.0,
+        'days_to_finish': 100,
+        'performance_guarantee_days_to_expiry': 12345,
+        'advance_payment_guarantee_days_to_expiry': 54321,
+        'slippage_score': 45.0, 'risk_level': 'high',
+    }],
+}
+
+
+@patch('routes.routes_home.home_schedule_risk', return_value=SCHEDULE_RISK)
+@patch('routes.routes_home.home_chart_store.get_charts', return_value=CHARTS)
+@patch('flask_login.utils._get_user')
+class TestHomeRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    def get_home(self, mock_get_user, role):
+        mock_get_user.return_value.is_authenticated = True
+        mock_get_user.return_value.role = role
+        mock_get_user.return_value.has_role = lambda name: name == role
+        response = self.app.get('/home')
+        self.assertEqual(response.status_code, 200)
+        return response.get_data(as_text=True)
+
+    def test_admins_see_guarantee_days(self, mock_get_user, mock_charts,
+                                       mock_risk):
+        page = self.get_home(mock_get_user, 'admin')
+
+        self.assertIn('Performance Guarantee (Days)', page)
+        self.assertIn('12345', page)
+
+    def test_users_do_not_see_guarantee_days(self, mock_get_user,
+                                             mock_charts, mock_risk):
+        page = self.get_home(mock_get_user, 'user')
+
+        self.assertIn('Schedule Risk', page)
+        self.assertNotIn('Performance Guarantee (Days)', page)
+        self.assertNotIn('12345', page)
+        self.assertNotIn('54321', page)
+
+
+if __name__ == '__main__':
+    unittest.main()
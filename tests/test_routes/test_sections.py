@@ -0,0 +1,81 @@
+import unittest
+import json
+from decimal import Decimal
+from unittest.mock import patch
+from app import app
+
+
+PROJECT_DATA = {
+    "id": 7,
+    "contract_name": "Contract 1",
+    "contractor": "Contractor A",
+    "link": "http://example.com",
+    "water_progress": Decimal("20.00"),
+    "sewer_progress": Decimal("30.00"),
+    "roads_progress": Decimal("40.00"),
+    "storm_drainage_progress": Decimal("50.00"),
+    "public_lighting_progress": Decimal("60.00"),
+    "physical_progress_percentage": Decimal("70.00")
+}
+
+
+@patch('flask_login.utils._get_user')
+class TestServicingChartRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    @patch('routes.routes_sections.find_servicing_project',
+           return_value=(None, None))
+    def test_unknown_project_is_not_found(self, mock_find, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+
+        response = self.app.get('/Servicing/charts/99')
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch('routes.routes_sections.find_servicing_project',
+           return_value=(0, PROJECT_DATA))
+    def test_chart_and_etag(self, mock_find, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+
+        response = self.app.get('/Servicing/charts/7')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.headers.get('ETag'))
+        chart = json.loads(response.data)
+        self.assertEqual(chart['layout']['title']['text'], "Contract 1")
+
+    @patch('routes.routes_sections.build_servicing_charts')
+    @patch('routes.routes_sections.find_servicing_project',
+           return_value=(0, PROJECT_DATA))
+    def test_unchanged_chart_is_not_rebuilt(self, mock_find, mock_build,
+                                            mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_build.return_value = ['{}']
+        etag = self.app.get('/Servicing/charts/7').headers['ETag']
+
+        response = self.app.get('/Servicing/charts/7',
+                                headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        mock_build.assert_called_once()
+
+    @patch('routes.routes_sections.build_servicing_charts')
+    @patch('routes.routes_sections.find_servicing_project',
+           return_value=(0, PROJECT_DATA))
+    def test_last_modified(self, mock_find, mock_build, mock_get_user):
+        mock_get_user.return_value.is_authenticated = True
+        mock_build.return_value = ['{}']
+        last_modified = self.app.get(
+            '/Servicing/charts/7').headers['Last-Modified']
+
+        response = self.app.get('/Servicing/charts/7',
+                                headers={'If-Modified-Since': last_modified})
+
+        self.assertEqual(response.status_code, 304)
+        mock_build.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()